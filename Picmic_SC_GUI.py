@@ -59,7 +59,6 @@ import math
 import numpy as np
 import ctypes as ct
 import configparser    # for the ini file configuration retrieving 
-import csv
 
 
 LoggingFileName =  os.path.abspath(os.path.join(os.getcwd(),'logging','logging_SC.conf'))
@@ -174,6 +173,9 @@ class Picmic_SC_GUI_Class (QMainWindow ):
         self.Flag_Set_DACSW = 0
         self.Flag_Set_VpulseSw = 0
 
+        # 1 => the calibrated pixels are read back and checked after writing them
+        self.Flag_Calibrated_ReadBack = 1
+
         self.lstDC = []
         self.lstRMS = []
         self.LstRegValDac = []
@@ -1293,7 +1295,7 @@ class Picmic_SC_GUI_Class (QMainWindow ):
 
         VFDialog = QFileDialog(self)
         VFDialog.setWindowTitle('Open Conf file')
-        VFDialog.setNameFilter('text Files (*.txt)')
+        VFDialog.setNameFilter('bitmap Files (*.txt *.pm0b)')
         VFDialog.setDirectory(VOldFilePath)
         VFDialog.setFileMode(QFileDialog.ExistingFile)
         
@@ -1319,7 +1321,7 @@ class Picmic_SC_GUI_Class (QMainWindow ):
 
         VFDialog = QFileDialog(self)
         VFDialog.setWindowTitle('Open Conf file')
-        VFDialog.setNameFilter('text Files (*.txt)')
+        VFDialog.setNameFilter('bitmap Files (*.txt *.pm0b)')
         VFDialog.setDirectory(VOldFilePath)
         VFDialog.setFileMode(QFileDialog.ExistingFiles)
         
@@ -1378,37 +1380,28 @@ class Picmic_SC_GUI_Class (QMainWindow ):
         VFileName  = self.ui.leFileName_Calibrated.text()
         thisFileName = VFilePath +'/'+VFileName
         
-        with open(thisFileName,'r') as thisFile :
-            csvreader = csv.reader(thisFile)
-            headers = next(csvreader)
-            for row in csvreader :
-                r = row[0].strip()
-                c = row[1].strip()
-                name = row[2].strip()
-                val = "AF"
-                self.ui.Text_Set_Row_PixConf.setText(r)
-                self.ui.Text_Set_Col_PixConf.setText(c)
-                self.ui.Text_Set_Data_PixConf.setText(val)
-                
-                self.ui.Text_Set_Data_PixConf.textChanged.connect(self.Text_Set_Data_PixConf_textChanged)
-                
-                #   using Pixel Conf COL button functions
-                self.Set_Button_Col_PixConf_Clicked()       # Col Set Button
-                self.Get_Col_PixConf_Clicked()              # Col Get Button
-                
-                #   using Pixel Conf ROW button functions
-                self.Set_Button_Row_PixConf_Clicked()       # Row Set Button
-                self.Get_Row_PixConf_Clicked()              # Row Get Button
-                
-                #   using Pixel Conf DATA button functions
-                self.Set_Button_Data_PixConf_Clicked()      # Data Set Button
-                self.Get_Data_PixConf_Clicked()             # Data Get Button
-                
-                print('Row:',r,', Col:',c,', Set to :', val)
-        # set to no values 
-        self.ui.Text_Set_Row_PixConf.setText('')
-        self.ui.Text_Set_Col_PixConf.setText('')
-        self.ui.Text_Set_Data_PixConf.setText('0')
+        def FShowProgress(VPixDone, VPixNb):
+            self.ui.statusbar.showMessage('Calibration : {:d} / {:d} pixels written'.format(VPixDone, VPixNb),0) # le 0 est un temps en seconde 
+            QApplication.processEvents() # update the GUI
+        
+        # all the pixels of the file written in one batch, value "AF" if not given in the file
+        VErr, VTrimMap, VPixNb = PicmicHLF.FSetCalibratedWaysFromFile(thisFileName, 0xAF, 0xFF, FShowProgress)
+        
+        if VErr < 0 :
+            #Error
+            self.ui.statusbar.setStyleSheet("QStatusBar{background:red;color:white;font-weight:bold;}")      
+            self.ui.statusbar.showMessage('Calibration FAILED',0) # le 0 est un temps en seconde 
+        else:
+            # OK
+            self.ui.statusbar.setStyleSheet("QStatusBar{background:MidLight;color:black;font-weight:normal;}")      
+            self.ui.statusbar.showMessage('Calibration applied to {:d} pixels'.format(VPixNb),0) # le 0 est un temps en seconde 
+            
+            # read back only the pixels of the file and compare them to the file values
+            if self.Flag_Calibrated_ReadBack == 1 :
+                VErr, VAPixRd, VAMismatch = PicmicHLF.FReadPixelMemory(VTrimMap, VTrimMap >= 0)
+                if VErr != 0 or VAMismatch.any() :
+                    self.ui.statusbar.setStyleSheet("QStatusBar{background:red;color:white;font-weight:bold;}")      
+                    self.ui.statusbar.showMessage('Calibration read back FAILED : {:d} pixels <> file'.format(int(VAMismatch.sum())),0) # le 0 est un temps en seconde 
         print('------------> Calibration applied <-------------')
     
     def LEPulsingPPRegValue_Changed(self) : #Bit 0 à 2
@@ -1998,16 +1991,8 @@ class Picmic_SC_GUI_Class (QMainWindow ):
             VEnabled = False
         sc_p0_hlf.PM0SC.FEnableRegsSavingInFile(0)
         try:
-            # Open the file
-            with open(VFileName,"r") as infile:
-                for line in infile:
-                    if line[0] == ':':
-                        #comment line : line ignored
-                        pass
-                    else:
-                        AddrStr , ValueStr = line.split(",")
-                        PicmicHLF.FWrOneI2CRegs(int(AddrStr),[int(ValueStr)])
-                        self.logger.info("Sent the value :addr({0}):value {1}".format(int(AddrStr), int(ValueStr)))
+            # Text or binary format, comment lines ignored : the file is compiled once ( contiguous addresses merged ) and sent in pipeline
+            PicmicHLF.FReplayI2CRegsFile(VFileName)
 
         except IOError as e:
             print ("I/O error({0}): {1}".format(e.errno, e.strerror))
@@ -3932,6 +3917,8 @@ class Picmic_SC_GUI_Class (QMainWindow ):
 
         LstValDac = [Dac0,Dac1,Dac2,Dac3,Dac4]
 
+        PicmicHLF.FResetCmdMetrics()        # slow control commands latency / throughput of this scan
+
         VErr = PicmicHLF.FSetDacRegs(LstValDac)
 
         #VCurrStep1 = 0
@@ -4043,7 +4030,10 @@ class Picmic_SC_GUI_Class (QMainWindow ):
                         os.remove(os.path.join(VFilePath,f)) 
             ResultFileDC.close()
             ResultFileDD.close()
-        self.ui.LECarDisRunStatus.setText('Discri caracterisation ended')
+        MetricsFileName = VFilePath +'/'+ self.ui.LECarDisSPFileName.text()+'_'+innerLoop+'_'+currentLoop+'_Run'+str(VRunNb)+'_ScMetrics.txt'
+        PicmicHLF.FDumpCmdMetrics(MetricsFileName,'Discri caracterisation '+innerLoop+' / '+currentLoop+' Run '+str(VRunNb))
+        VDMetrics = PicmicHLF.FGetCmdMetrics()
+        self.ui.LECarDisRunStatus.setText('Discri caracterisation ended - SC : {:d} cmd, {:.1f} cmd/s, {:d} timeouts'.format(VDMetrics["CmdNb"],VDMetrics["CmdPerS"],VDMetrics["TimeoutNb"]))
 
 
     def MegaButtonClicked(self):
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Micro-benchmark of the Firmata 7 bits / 8 bits codec of the slow control module
+
+Compares for payloads from 1 to 60 W8
+- decoding of DUE answers  : FConVectMidi7bTo8bV1 / V2 ( loops ) and FConVectMidi7bTo8bV3 ( translation tables )
+- encoding of DUE requests : FConVect8bToMidi7b + bytearray ( loop ) and FConVect8bToMidi7bV2 ( translation tables )
+
+Usage, from the software directory
+
+python Picmic_SC_codec_bench.py [repeat nb]
+
+ Version V1.0
+
+ Versions list
+
+ V1.0 18/10/2026 : first implementation
+
+"""
+
+__version__ = '0.1.0'
+__date__ = "2026-10-18"
+
+
+import sys
+import random
+import timeit
+
+import importlib
+import configparser    # for the ini file configuration retrieving
+
+# retrieve the modules names from the Modules.conf file
+config = configparser.ConfigParser(allow_no_value=True)
+config.read("modules/Modules.conf")
+
+PM0SC_Name = config['ModuleName']['slowControlLowLevel']
+PM0SC = importlib.import_module(PM0SC_Name, package=None)
+
+
+VPayloadSizes = [1, 2, 4, 8, 16, 24, 32, 48, 60]
+
+
+def FBenchOne ( Funct, Src, RepeatNb ) :
+    """
+        Returns the best execution time of Funct ( Src ) in us
+    """
+    VATime = timeit.repeat ( lambda : Funct ( Src ), number = RepeatNb, repeat = 5 )
+
+    return ( min ( VATime ) / RepeatNb * 1e6 )
+
+
+def FEncodeOld ( Src ) :
+    """
+        Encoding as done by FSendCmd up to V25 : list of 7 bits words then bytearray
+    """
+    return ( bytearray ( PM0SC.FConVect8bToMidi7b ( Src, 0 ) ) )
+
+
+def FEncodeNew ( Src ) :
+    return ( PM0SC.FConVect8bToMidi7bV2 ( Src, 0 ) )
+
+
+def FDecodeV1 ( Src ) :
+    return ( PM0SC.FConVectMidi7bTo8bV1 ( Src, 0 ) )
+
+
+def FDecodeV2 ( Src ) :
+    return ( PM0SC.FConVectMidi7bTo8bV2 ( Src, 0 ) )
+
+
+def FDecodeV3 ( Src ) :
+    return ( PM0SC.FConVectMidi7bTo8bV3 ( Src, 0 ) )
+
+
+def FMain ( RepeatNb ) :
+
+    print ( "Firmata codec benchmark, times in us, best of 5 x {:d} calls".format (RepeatNb) )
+    print ( "" )
+    print ( "{:>5s} | {:>9s} {:>9s} {:>9s} {:>7s} | {:>9s} {:>9s} {:>7s}".format ("W8", "dec V1", "dec V2", "dec V3", "gain", "enc old", "enc V2", "gain") )
+
+    for VSz in VPayloadSizes :
+
+        VAW8 = [random.randrange ( 256 ) for _ in range ( VSz )]
+
+        # Answers are given by pyfirmata as a tuple of int
+
+        VAW7 = tuple ( PM0SC.FConVect8bToMidi7b ( VAW8, 0 ) )
+
+        # Check the new codec gives the same results as the old one
+
+        if ( (PM0SC.FConVectMidi7bTo8bV3 ( VAW7, 0 ) != VAW8) or (FEncodeNew ( VAW8 ) != FEncodeOld ( VAW8 )) ):
+            print ( "Error : codecs results differ for {:d} W8".format (VSz) )
+            return (-1)
+
+        VDecV1  = FBenchOne ( FDecodeV1, VAW7, RepeatNb )
+        VDecV2  = FBenchOne ( FDecodeV2, VAW7, RepeatNb )
+        VDecV3  = FBenchOne ( FDecodeV3, VAW7, RepeatNb )
+        VEncOld = FBenchOne ( FEncodeOld, VAW8, RepeatNb )
+        VEncNew = FBenchOne ( FEncodeNew, VAW8, RepeatNb )
+
+        print ( "{:5d} | {:9.2f} {:9.2f} {:9.2f} {:6.1f}x | {:9.2f} {:9.2f} {:6.1f}x".format (VSz, VDecV1, VDecV2, VDecV3, VDecV1 / VDecV3, VEncOld, VEncNew, VEncOld / VEncNew) )
+
+    return (0)
+
+
+if __name__ == "__main__" :
+
+    VRepeatNb = 10000
+
+    if ( len ( sys.argv ) > 1 ) :
+        VRepeatNb = int ( sys.argv[1] )
+
+    sys.exit ( FMain ( VRepeatNb ) )
@@ -1,16 +1,17 @@
+import os
+import sys
 import numpy as np
-import pandas as pd
+
+# text bitmap parser shared with the slow control ( modules/mod_pm0_bitmap_10.py )
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from modules.mod_pm0_bitmap_10 import FReadBitmapTextFile
 
 
 #filename="Pulsing_Files/cfg_mat128x54_00.txt"
 filename="cfg_mat128x54_01_R424.txt"
 
 def cfg_read(filename="cfg_mat128x54_01_R424.txt"):
-    sf = pd.read_csv(filename, dtype=str, sep=' ', comment=":",header = None)
-    nf=sf.apply(lambda x: "".join(x), axis =1)
-    bitmap=nf.str.split('', expand=True)
-    table=np.asarray(bitmap)[:,1:-1]
-    tab=table.astype(int)
+    result, tab, hitnb, comments = FReadBitmapTextFile(filename)
     result=np.where(tab==1)
     print([(i,j) for i,j in list(zip(result[0], result[1]))])
     return tab
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Module containing the parser of the text bitmap files ( Pulsing_Files/cfg_*.txt ), its cache and the text writer
+
+Text format : lines beginning with ':' are comments, each other line is a row of the pixel matrix,
+its '0' / '1' characters are the pixels of the row ( other characters, such as the spaces, are ignored )
+
+The parsing is done in one pass on the whole file ( numpy ), it gives the bitmap, the hits nb and the comments.
+The results are kept in a cache keyed by file path + modification time, the least recently used files are
+removed when the cache is full => the sweeps which read the same files several times parse them once.
+
+Example
+
+>>> from modules.mod_pm0_bitmap_10 import FReadBitmapTextFile
+>>> Result, BitMap, HitNb, Comments = FReadBitmapTextFile ( "Pulsing_Files/cfg_mat128x54_R16.txt" )
+
+
+ Version V1.1
+
+ Versions list
+
+ V1.0 18/10/2026 : first implementation
+ V1.1 18/10/2026 : added FFormatBitmapText, FWriteBitmapTextFile to write the bitmaps built in memory
+
+"""
+
+__version__ = '0.1.1'
+__date__ = "2026-10-18"
+
+
+# ===========================================================================
+# Modules import
+# ===========================================================================
+
+
+import logging
+import os
+import sys
+import collections
+import threading
+
+import numpy as np
+
+
+# Pixel matrix size
+
+PIX_ROW_NB = 128
+PIX_COL_NB = 54
+
+# Number of files kept in the cache
+
+BITMAP_CACHE_NB = 256
+
+VGDBitmapCache   = collections.OrderedDict () # (path, mtime, size) => (Result, BitMap, HitNb, Comments)
+VGBitmapCacheLock = threading.Lock ()
+
+
+
+def FParseBitmapText ( Text ) :
+
+    '''
+    ...
+
+    Parses the content of a text bitmap file
+
+    Param
+    - Text  = The file content
+
+    Returns
+    - An error code, 0 => OK, -2 => more than 128 rows or 54 cols
+    - BitMap = numpy 128 * 54 array
+    - HitNb = number of hits in the matrix
+    - Comments = a multiline string, the comment lines without their ':'
+
+    '''
+
+    VBitMap = np.zeros ( (PIX_ROW_NB, PIX_COL_NB), dtype = int )
+
+    VALine    = Text.splitlines ( True )
+    VComments = "".join ( [VLine[1:] for VLine in VALine if VLine[0] == ':'] )
+
+    # Rows : one per line, newline terminated, empty lines included
+
+    VARowLine = [VLine if VLine.endswith ( '\n' ) else VLine + '\n' for VLine in VALine if VLine[0] != ':']
+
+    if ( len ( VARowLine ) == 0 ):
+        return (0, VBitMap, 0, VComments)
+
+    VAChar = np.frombuffer ( "".join ( VARowLine ).encode ( "utf-8" ), dtype = np.uint8 )
+
+    VAIsEol   = (VAChar == ord ( '\n' ))
+    VAIsPix   = (VAChar == ord ( '0' )) | (VAChar == ord ( '1' ))
+    VARow     = np.cumsum ( VAIsEol ) - VAIsEol              # Row of each character
+    VAPixNb   = np.cumsum ( VAIsPix )                         # Pixels nb up to each character
+    VARowBeg  = np.concatenate ( ([0], VAPixNb[VAIsEol][:-1]) ) # Pixels nb before each row
+    VACol     = VAPixNb - 1 - VARowBeg[VARow]                 # Col of each pixel character
+
+    VARow = VARow[VAIsPix]
+    VACol = VACol[VAIsPix]
+
+    if ( (len ( VARow ) > 0) and ((VARow.max () >= PIX_ROW_NB) or (VACol.max () >= PIX_COL_NB)) ):
+        return (-2, VBitMap, 0, VComments)
+
+    VBitMap[VARow, VACol] = VAChar[VAIsPix] - ord ( '0' )
+
+    return (0, VBitMap, int ( np.count_nonzero ( VBitMap ) ), VComments)
+
+
+
+def FReadBitmapTextFile ( FileName ) :
+
+    '''
+    ...
+
+    Reads a text bitmap file, the result is taken from the cache if the file has not been modified
+
+    Param
+    - FileName  = Name of the file
+
+    Returns
+    - An error code, 0 => OK, -1 => I/O error, -2 => bitmap format error
+    - BitMap = numpy 128 * 54 array, a copy which can be modified by the caller
+    - HitNb = number of hits in the matrix
+    - Comments = a multiline string
+
+    '''
+
+    logger = logging.getLogger('pm0_emul')
+
+    try :
+        VStat = os.stat ( FileName )
+        VKey  = (os.path.abspath ( FileName ), VStat.st_mtime_ns, VStat.st_size)
+
+        with VGBitmapCacheLock :
+            VEntry = VGDBitmapCache.get ( VKey )
+            if ( VEntry != None ):
+                VGDBitmapCache.move_to_end ( VKey )
+
+        if ( VEntry == None ):
+
+            with open ( FileName, "r" ) as VFile :
+                VEntry = FParseBitmapText ( VFile.read () )
+
+            if ( VEntry[0] < 0 ):
+                logger.error ( "Bitmap format error in {} : more than {:d} rows or {:d} cols".format (FileName, PIX_ROW_NB, PIX_COL_NB) )
+
+            with VGBitmapCacheLock :
+                VGDBitmapCache[VKey] = VEntry
+                while ( len ( VGDBitmapCache ) > BITMAP_CACHE_NB ):
+                    VGDBitmapCache.popitem ( last = False )
+
+    except IOError as e :
+        logger.error ( "I/O error({0}): {1}".format (e.errno, e.strerror) )
+        return (-1, np.zeros ( (PIX_ROW_NB, PIX_COL_NB), dtype = int ), 0, "")
+
+    except :
+        logger.error ( "Unexpected error:{}".format (sys.exc_info()[1]) )
+        return (-2, np.zeros ( (PIX_ROW_NB, PIX_COL_NB), dtype = int ), 0, "")
+
+    VResult, VBitMap, VHitNb, VComments = VEntry
+
+    return (VResult, VBitMap.copy (), VHitNb, VComments)
+
+
+
+def FClearBitmapCache ( ) :
+
+    '''
+    ...
+
+    Empties the cache of the text bitmap files
+
+    '''
+
+    with VGBitmapCacheLock :
+        VGDBitmapCache.clear ()
+
+
+
+def FFormatBitmapText ( BitMap, Comments = "" ) :
+
+    '''
+    ...
+
+    Formats a bitmap in the text bitmap files format, the pixels of a row are grouped by 8
+
+    Param
+    - BitMap    = 128 x 54 array
+    - Comments  = A multiline string, written as ':' lines before the rows
+
+    Returns
+    - The file content
+
+    '''
+
+    VAComment = [":" + VLine for VLine in Comments.splitlines ()]
+
+    VAChar = np.where ( np.asarray ( BitMap ) != 0, '1', '0' )
+    VARow  = [" ".join ( ["".join ( VARowChar[VCol:VCol + 8] ) for VCol in range ( 0, PIX_COL_NB, 8 )] ) for VARowChar in VAChar]
+
+    return ( "\n".join ( VAComment + VARow ) + "\n" )
+
+
+
+def FWriteBitmapTextFile ( FileName, BitMap, Comments = "" ) :
+
+    '''
+    ...
+
+    Writes a bitmap in a text bitmap file, see FFormatBitmapText
+
+    Returns
+    - An error code, 0 => OK, -1 => I/O error
+
+    '''
+
+    logger = logging.getLogger('pm0_emul')
+
+    try :
+        with open ( FileName, "w" ) as VFile :
+            VFile.write ( FFormatBitmapText ( BitMap, Comments ) )
+
+    except IOError as e :
+        logger.error ( "I/O error({0}): {1}".format (e.errno, e.strerror) )
+        return (-1)
+
+    return (0)
@@ -0,0 +1,796 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Module containing a virtual Arduino DUE I2C master + PICMIC 0, used in place of pyfirmata.Arduino
+to run the slow control without hardware ( benchmarks, regression tests )
+
+mod_pm0_sc_XX.FConnect creates a Picmic_EmulDue when the port name begins with "EMUL"
+
+The virtual DUE
+- decodes the SysEx commands sent by mod_pm0_sc_XX ( TCmd ) and answers like the DUE firmware : F0 F0 <status, data ...> F7
+- models the registers RAM image of the DUE and the registers of PICMIC ( VGARegAddr / VGARegW8ESz )
+- models the 128 x 54 pixel memory : row 128 => all rows, col 64 => all cols, col 128 => no col
+- models the timings : serial link baud rate, commands processing, I2C transfers, DUE reception buffer size
+- can inject I2C errors and lost answers
+
+The answers are sent back by a thread through a virtual serial port ( sp ) read by the reader thread
+of the commands pipeline or by iterate () like pyfirmata does
+
+Example
+
+>>> import modules.mod_pm0_sc_25 as PM0SC
+>>> import modules.mod_pm0_due_emul_10 as PM0DUE
+>>> PM0DUE.FSetEmulParams ( I2CErrRate = 0.01 )
+>>> PM0SC.FConnect ( "EMUL" )
+>>> PM0SC.FCmdSetWrReg ( 4, 2, 0, 0, [10,20,30,40,50] )
+>>> PM0SC.VGBoard.FPrintStats ()
+>>> PM0SC.FDisconnect ()
+
+
+ Version V1.0
+
+ Versions list
+
+ V1.0 18/10/2026 : first implementation
+
+"""
+
+__version__ = '0.1.0'
+__date__ = "2026-10-18"
+
+
+# ===========================================================================
+# Modules import
+# ===========================================================================
+
+
+import logging
+import threading
+import queue
+import random
+import time
+
+import numpy as np
+
+import importlib
+import configparser    # for the ini file configuration retrieving
+
+# retrieve the modules names from the Modules.conf file
+config = configparser.ConfigParser(allow_no_value=True)
+config.read("modules/Modules.conf")
+
+
+PM0SC_Name = config['ModuleName']['slowControlLowLevel']
+PM0SC = importlib.import_module(PM0SC_Name, package=None)
+
+
+# ===========================================================================
+# Global variables used as constants
+# ===========================================================================
+
+
+START_SYSEX = 0xF0
+END_SYSEX   = 0xF7
+
+# Pixel matrix size
+
+PIX_ROW_NB = 128
+PIX_COL_NB = 54
+
+# Special values of the pixel config row / col registers
+
+PIX_ROW_ALL  = 0x80 # All rows selected
+PIX_COL_ALL  = 0x40 # All cols selected
+PIX_COL_NONE = 0x80 # No col selected
+
+
+# ===========================================================================
+# Global variables
+# ===========================================================================
+
+
+# Parameters of the next virtual DUE created, see FSetEmulParams
+
+VGEmulBaudRate   = 57600   # Serial link baud rate, pyfirmata default, 10 bits per W8
+VGEmulCmdProcS   = 50e-6   # DUE processing time of a command, without I2C transfers
+VGEmulI2CW8S     = 90e-6   # I2C transfer time of one W8 at 100 kHz
+VGEmulJitterS    = 0.0     # Maximum random delay added to each answer
+VGEmulI2CErrRate = 0.0     # Probability of an I2C error on a command which accesses PICMIC
+VGEmulNoAnsRate  = 0.0     # Probability that the answer of a command is lost
+VGEmulRxBuffSz   = PM0SC.DUE_RX_BUFF_SZ # DUE serial reception buffer size, a command which doesn't fit is lost
+VGEmulSeed       = None    # Seed of the random generator, None => random
+
+
+
+def FSetEmulParams ( BaudRate = 57600, CmdProcS = 50e-6, I2CW8S = 90e-6, JitterS = 0.0, I2CErrRate = 0.0, NoAnsRate = 0.0, RxBuffSz = PM0SC.DUE_RX_BUFF_SZ, Seed = None ) :
+
+    '''
+    ...
+
+    Sets the parameters of the virtual DUE, taken into account at next PM0SC.FConnect ( "EMUL" )
+
+    Param
+    - BaudRate    = Serial link baud rate, 0 => no transmission time
+    - CmdProcS    = DUE processing time of a command in s, without I2C transfers
+    - I2CW8S      = I2C transfer time of one W8 in s
+    - JitterS     = Maximum random delay in s added to each answer
+    - I2CErrRate  = Probability of an I2C error on a command which accesses PICMIC
+    - NoAnsRate   = Probability that the answer of a command is lost => DUE not responding on PC side
+    - RxBuffSz    = DUE serial reception buffer size, a command received when the buffer is full is lost
+    - Seed        = Seed of the random generator, None => random
+
+    Returns
+    - Nothing
+
+    '''
+    global VGEmulBaudRate, VGEmulCmdProcS, VGEmulI2CW8S, VGEmulJitterS, VGEmulI2CErrRate, VGEmulNoAnsRate, VGEmulRxBuffSz, VGEmulSeed
+
+    VGEmulBaudRate   = BaudRate
+    VGEmulCmdProcS   = CmdProcS
+    VGEmulI2CW8S     = I2CW8S
+    VGEmulJitterS    = JitterS
+    VGEmulI2CErrRate = I2CErrRate
+    VGEmulNoAnsRate  = NoAnsRate
+    VGEmulRxBuffSz   = RxBuffSz
+    VGEmulSeed       = Seed
+
+
+
+class Picmic_EmulSerial () :
+
+    '''
+    ...
+
+    Virtual serial port, the part of serial.Serial used by the commands pipeline and by iterate ()
+
+    '''
+
+    def __init__ ( self ) :
+        self.Buff    = bytearray ()
+        self.Cond    = threading.Condition ()
+        self.timeout = None
+
+
+    @property
+    def in_waiting ( self ) :
+        return ( len ( self.Buff ) )
+
+
+    def read ( self, size = 1 ) :
+
+        with self.Cond :
+
+            if ( len ( self.Buff ) == 0 ):
+                self.Cond.wait ( self.timeout )
+
+            VData = bytes ( self.Buff[:size] )
+            del self.Buff[:size]
+
+        return (VData)
+
+
+    def FFeed ( self, Data ) :
+        '''
+            Bytes sent by the virtual DUE
+        '''
+        with self.Cond :
+            self.Buff.extend ( Data )
+            self.Cond.notify_all ()
+
+
+    def reset_input_buffer ( self ) :
+        with self.Cond :
+            self.Buff = bytearray ()
+
+
+    def close ( self ) :
+        pass
+
+
+
+class Picmic_EmulDue () :
+
+    '''
+    ...
+
+    Virtual Arduino DUE I2C master + PICMIC 0, same interface as the part of pyfirmata.Arduino
+    used by mod_pm0_sc_XX
+
+    Param
+    - Port = Port name, only printed
+
+    The parameters are given by the globals VGEmul..., see FSetEmulParams
+
+    '''
+
+    def __init__ ( self, Port = "EMUL" ) :
+
+        self.logger = logging.getLogger('pm0_due_emul')
+
+        self.name             = Port
+        self.firmware         = "PICMIC0 DUE emulator"
+        self.firmware_version = (1, 0)
+        self.firmata_version  = (2, 5)
+        self.sp               = Picmic_EmulSerial ()
+        self._command_handlers = {}
+        self.callback_holder  = dict ()
+
+        self.BaudRate   = VGEmulBaudRate
+        self.CmdProcS   = VGEmulCmdProcS
+        self.I2CW8S     = VGEmulI2CW8S
+        self.JitterS    = VGEmulJitterS
+        self.I2CErrRate = VGEmulI2CErrRate
+        self.NoAnsRate  = VGEmulNoAnsRate
+        self.RxBuffSz   = VGEmulRxBuffSz
+        self.Random     = random.Random ( VGEmulSeed )
+
+        # Registers : W8 address => value, RAM image of the DUE and PICMIC registers
+
+        self.DRegImg  = {}
+        self.DRegChip = {}
+
+        for VRegId in range ( len ( PM0SC.VGARegAddr ) ):
+            for VIndex in range ( PM0SC.VGARegW8ESz[VRegId] ):
+                self.DRegImg[PM0SC.VGARegAddr[VRegId] + VIndex]  = 0
+                self.DRegChip[PM0SC.VGARegAddr[VRegId] + VIndex] = 0
+
+        self.APixel   = np.zeros ( (PIX_ROW_NB, PIX_COL_NB), dtype = np.uint8 )
+        self.AHwSig   = [0, 0, 0, 0] # RST, RST_I2C, START, TESTMODE
+        self.Outputs  = 0
+        self.LogRaw   = 0
+        self.LogCmd   = 0
+
+        # Timings, all times are time.perf_counter () values
+
+        self.LinkTxFreeAt = 0.0                    # PC => DUE link free
+        self.LinkRxFreeAt = 0.0                    # DUE => PC link free
+        self.DueFreeAt    = 0.0                    # DUE has processed all received commands
+        self.ARxBuff      = []                     # (processing begin time, W8 nb) of the commands in DUE reception buffer
+
+        self.FResetStats ()
+
+        self.Lock   = threading.Lock ()
+        self.QAns   = queue.Queue ()
+        self.Sender = threading.Thread ( target = self.FSenderRun, name = "pm0_due_emul" )
+        self.Sender.daemon = True
+        self.Sender.start ()
+
+        self.logger.info ( "Virtual DUE created on port {:s}".format (Port) )
+
+
+    # -----------------------------------------------------------------------
+    # pyfirmata.Arduino interface
+    # -----------------------------------------------------------------------
+
+    def add_cmd_handler ( self, cmd, func ) :
+        self._command_handlers[cmd] = func
+
+
+    def bytes_available ( self ) :
+        return ( self.sp.in_waiting )
+
+
+    def iterate ( self ) :
+
+        '''
+        ...
+
+        Reads one SysEx message on the virtual serial port and gives it to its handler
+
+        '''
+
+        VData = self.sp.read ( 1 )
+
+        if ( (len ( VData ) == 0) or (VData[0] != START_SYSEX) ):
+            return
+
+        VMsg = bytearray ()
+
+        while ( True ):
+
+            VData = self.sp.read ( 1 )
+
+            if ( len ( VData ) == 0 ):
+                return
+
+            if ( VData[0] == END_SYSEX ):
+                break
+
+            VMsg.extend ( VData )
+
+        VHandler = self._command_handlers.get ( VMsg[0] ) if ( len ( VMsg ) > 0 ) else None
+
+        if ( VHandler != None ):
+            VHandler ( *VMsg[1:] )
+
+
+    def send_sysex ( self, sysex_cmd, data = [] ) :
+
+        '''
+        ...
+
+        Receives a command : executes it and queues its answer at the time the DUE would send it
+
+        Param
+        - sysex_cmd  = Command id, see PM0SC.TCmd
+        - data       = Command data in 7 bits bytes
+
+        '''
+
+        VNow = time.perf_counter ()
+        VTxW8Nb = len ( data ) + PM0SC.FIRMATA_FRAME_OVERHEAD_SZ
+
+        with self.Lock :
+
+            self.CmdNb = self.CmdNb + 1
+            self.DCmdNb[sysex_cmd] = self.DCmdNb.get ( sysex_cmd, 0 ) + 1
+
+            # Command received by the DUE at the end of its transmission
+
+            VRxEnd = max ( VNow, self.LinkTxFreeAt ) + self.FGetLinkTimeS ( VTxW8Nb )
+            self.LinkTxFreeAt = VRxEnd
+
+            # Commands not yet processed are in DUE reception buffer => lost if full
+
+            self.ARxBuff = [(VBeg, VW8Nb) for VBeg, VW8Nb in self.ARxBuff if VBeg > VRxEnd]
+
+            if ( sum ( [VW8Nb for VBeg, VW8Nb in self.ARxBuff] ) + VTxW8Nb > self.RxBuffSz ):
+                self.RxOverflowNb = self.RxOverflowNb + 1
+                self.logger.warning ( "DUE reception buffer overflow, command {:d} lost".format (sysex_cmd) )
+                return
+
+            VProcBeg = max ( VRxEnd, self.DueFreeAt )
+            self.ARxBuff.append ( (VProcBeg, VTxW8Nb) )
+
+            # Execution
+
+            VACmdW8 = PM0SC.FConVectMidi7bTo8bV3 ( bytes ( data ), 0 )
+            VRetSz  = VACmdW8[0] if ( len ( VACmdW8 ) > 0 ) else 0
+
+            VI2CW8Nb = self.I2CW8Nb
+            VExtraS  = 0.0
+
+            try :
+                VRet, VAData, VExtraS = self.FExecCmd ( sysex_cmd, VACmdW8[2:], VRetSz )
+            except (IndexError, ValueError) :
+                self.logger.error ( "Bad command {:d} data {}".format (sysex_cmd, VACmdW8) )
+                VRet, VAData = -1, []
+
+            if ( VRet != 0 ):
+                self.ErrNb = self.ErrNb + 1
+
+            VProcS = self.CmdProcS + (self.I2CW8Nb - VI2CW8Nb) * self.I2CW8S + VExtraS
+            self.DueFreeAt = VProcBeg + VProcS
+
+            # Answer = status + VRetSz data
+
+            VAData = (list ( VAData ) + [0] * VRetSz)[:VRetSz]
+            VAns = bytearray ( [START_SYSEX, START_SYSEX] ) + PM0SC.FConVect8bToMidi7bV2 ( [VRet & 0xFF] + VAData, 0 ) + bytearray ( [END_SYSEX] )
+
+            if ( self.Random.random () < self.NoAnsRate ):
+                self.NoAnsNb = self.NoAnsNb + 1
+                return
+
+            VSendBeg = max ( self.DueFreeAt, self.LinkRxFreeAt )
+            self.LinkRxFreeAt = VSendBeg + self.FGetLinkTimeS ( len ( VAns ) )
+
+            self.QAns.put ( (self.LinkRxFreeAt + self.Random.uniform ( 0, self.JitterS ), bytes ( VAns )) )
+
+
+    def exit ( self ) :
+
+        self.QAns.put ( None )
+        self.Sender.join ( 1.0 )
+        self.logger.info ( "Virtual DUE stopped" )
+
+
+    # -----------------------------------------------------------------------
+    # Emulation
+    # -----------------------------------------------------------------------
+
+    def FGetLinkTimeS ( self, W8Nb ) :
+        '''
+            Transmission time of W8Nb on the serial link, 10 bits per W8
+        '''
+        if ( self.BaudRate <= 0 ):
+            return (0.0)
+
+        return ( W8Nb * 10.0 / self.BaudRate )
+
+
+    def FSenderRun ( self ) :
+
+        '''
+        ...
+
+        Sender thread : writes the answers on the virtual serial port at their time, in the commands order
+
+        '''
+
+        while ( True ):
+
+            VItem = self.QAns.get ()
+
+            if ( VItem == None ):
+                break
+
+            VTime, VAns = VItem
+            VWaitS = VTime - time.perf_counter ()
+
+            if ( VWaitS > 0 ):
+                time.sleep ( VWaitS )
+
+            self.sp.FFeed ( VAns )
+
+
+    def FI2CErr ( self ) :
+        '''
+            Returns 1 if an I2C error must be injected
+        '''
+        if ( self.Random.random () < self.I2CErrRate ):
+            self.I2CErrNb = self.I2CErrNb + 1
+            return (1)
+
+        return (0)
+
+
+    def FGetPixSel ( self ) :
+
+        '''
+        ...
+
+        Returns the rows / cols selected by the pixel config row / col registers
+
+        Returns
+        - Rows selection, a row index or slice ( None ) for all rows, None if no row
+        - Cols selection, a col index or slice ( None ) for all cols, None if no col
+
+        '''
+
+        VRow = self.DRegChip[PM0SC.VGARegAddr[PM0SC.TRegId.PIX_CONF_ROW.value]]
+        VCol = self.DRegChip[PM0SC.VGARegAddr[PM0SC.TRegId.CONF_COL.value]]
+
+        if ( VRow & PIX_ROW_ALL ):
+            VRowSel = slice ( None )
+        elif ( VRow < PIX_ROW_NB ):
+            VRowSel = VRow
+        else :
+            VRowSel = None
+
+        if ( VCol & PIX_COL_NONE ):
+            VColSel = None
+        elif ( VCol & PIX_COL_ALL ):
+            VColSel = slice ( None )
+        elif ( VCol < PIX_COL_NB ):
+            VColSel = VCol
+        else :
+            VColSel = None
+
+        return (VRowSel, VColSel)
+
+
+    def FWrChip ( self, Addr, W8 ) :
+
+        '''
+        ...
+
+        Writes one W8 in PICMIC through I2C, a write in pixel config data writes all the selected pixels
+
+        '''
+
+        self.I2CW8Nb = self.I2CW8Nb + 1
+
+        if ( Addr not in self.DRegChip ):
+            return
+
+        self.DRegChip[Addr] = W8
+
+        if ( Addr == PM0SC.VGARegAddr[PM0SC.TRegId.CONF_DATA.value] ):
+
+            VRowSel, VColSel = self.FGetPixSel ()
+
+            if ( (VRowSel != None) and (VColSel != None) ):
+                self.APixel[VRowSel, VColSel] = W8
+                self.PixWrNb = self.PixWrNb + self.APixel[VRowSel, VColSel].size
+
+
+    def FRdChip ( self, Addr ) :
+
+        '''
+        ...
+
+        Reads one W8 from PICMIC through I2C, pixel config data gives the selected pixel if one pixel is selected
+
+        '''
+
+        self.I2CW8Nb = self.I2CW8Nb + 1
+
+        if ( Addr == PM0SC.VGARegAddr[PM0SC.TRegId.CONF_DATA.value] ):
+
+            VRowSel, VColSel = self.FGetPixSel ()
+
+            if ( isinstance ( VRowSel, int ) and isinstance ( VColSel, int ) ):
+                return ( int ( self.APixel[VRowSel, VColSel] ) )
+
+        return ( self.DRegChip.get ( Addr, 0 ) )
+
+
+    def FWrRegs ( self, Addr, RegOp, AW8 ) :
+
+        '''
+        ...
+
+        Writes W8 from address Addr in RAM image and in PICMIC if RegOp <> SW
+
+        Returns
+        - An error code, 0 => OK, -2 I2C error, > 0 number of W8 read back <> written ( RegOp = CHK )
+
+        '''
+
+        for VIndex, VW8 in enumerate ( AW8 ):
+            self.DRegImg[Addr + VIndex] = VW8
+
+        if ( RegOp == PM0SC.TRegOp.SW.value ):
+            return (0)
+
+        if ( self.FI2CErr () ):
+            return (-2)
+
+        for VIndex, VW8 in enumerate ( AW8 ):
+            self.FWrChip ( Addr + VIndex, VW8 )
+
+        if ( RegOp != PM0SC.TRegOp.CHK.value ):
+            return (0)
+
+        # Pixel config data is not read back, the read gives the selected pixel, not the register
+
+        return ( sum ( [(self.FRdChip ( Addr + VIndex ) != VW8) for VIndex, VW8 in enumerate ( AW8 ) if Addr + VIndex != PM0SC.VGARegAddr[PM0SC.TRegId.CONF_DATA.value]] ) )
+
+
+    def FRdRegs ( self, Addr, RegOp, W8Nb ) :
+
+        '''
+        ...
+
+        Reads W8Nb W8 from address Addr, from RAM image if RegOp = SW, from PICMIC otherwise
+
+        Returns
+        - An error code, 0 => OK, -2 I2C error
+        - The W8 read
+
+        '''
+
+        if ( RegOp == PM0SC.TRegOp.SW.value ):
+            return (0, [self.DRegImg.get ( Addr + VIndex, 0 ) for VIndex in range ( W8Nb )])
+
+        if ( self.FI2CErr () ):
+            return (-2, [])
+
+        return (0, [self.FRdChip ( Addr + VIndex ) for VIndex in range ( W8Nb )])
+
+
+    def FExecCmd ( self, CmdId, AW8, RetSz ) :
+
+        '''
+        ...
+
+        Executes a command like the DUE firmware
+
+        Param
+        - CmdId  = Command id, see PM0SC.TCmd
+        - AW8    = Command data, without the answer size W8
+        - RetSz  = Number of data W8 to return
+
+        Returns
+        - Status, 0 => OK, -1 sw error, -2 I2C error, > 0 number of R/W errors
+        - A list of data W8
+        - Extra processing time in s ( pulses )
+
+        '''
+
+        VNbReg = len ( PM0SC.VGARegAddr )
+
+        if ( CmdId == PM0SC.TCmd.SET_LOG.value ):
+            self.LogRaw, self.LogCmd = AW8[0], AW8[1]
+            return (0, [], 0.0)
+
+        if ( CmdId == PM0SC.TCmd.GET_STATUS.value ):
+            return (0, [0, 0], 0.0)
+
+        # [RegId, RegOp,PrePostOp,PrePostParam, RegSz, W8 ...]
+
+        if ( CmdId == PM0SC.TCmd.SET_WR_REG.value ):
+            VRegId, VRegOp, VRegSz = AW8[0], AW8[1], AW8[4]
+            if ( (VRegId >= VNbReg) or (VRegSz != PM0SC.VGARegW8ESz[VRegId]) or (len ( AW8 ) != 5 + VRegSz) ):
+                return (-1, [], 0.0)
+            return (self.FWrRegs ( PM0SC.VGARegAddr[VRegId], VRegOp, AW8[5:] ), [], 0.0)
+
+        # [RegId, RegOp,PrePostOp,PrePostParam, RegSz]
+
+        if ( CmdId == PM0SC.TCmd.GET_RD_REG.value ):
+            VRegId, VRegOp = AW8[0], AW8[1]
+            if ( VRegId >= VNbReg ):
+                return (-1, [], 0.0)
+            VRet, VAData = self.FRdRegs ( PM0SC.VGARegAddr[VRegId], VRegOp, PM0SC.VGARegW8ESz[VRegId] )
+            if ( (VRet == 0) and (VRegOp == PM0SC.TRegOp.CHK.value) and (VRegId != PM0SC.TRegId.CONF_DATA.value) ):
+                if ( VAData != [self.DRegImg[PM0SC.VGARegAddr[VRegId] + VIndex] for VIndex in range ( len ( VAData ) )] ):
+                    VRet = -2
+            return (VRet, VAData, 0.0)
+
+        # [RegOp, DefOp, DefVal]
+
+        if ( CmdId == PM0SC.TCmd.SET_WR_DEF.value ):
+            VRegOp, VDefOp, VDefVal = AW8[0], AW8[1], AW8[2]
+            VRet = 0
+            for VRegId in range ( VNbReg ):
+                VAVal = PM0SC.VGRegDef[VRegId] if ( VDefOp == PM0SC.TDefOp.DEF.value ) else [VDefVal] * PM0SC.VGARegW8ESz[VRegId]
+                VErr = self.FWrRegs ( PM0SC.VGARegAddr[VRegId], VRegOp, VAVal )
+                VRet = VErr if ( (VErr < 0) or (VRet < 0) ) else VRet + VErr
+            return (VRet, [], 0.0)
+
+        # [RegOp]
+
+        if ( CmdId == PM0SC.TCmd.WR_ALL_REG.value ):
+            VRegOp = PM0SC.TRegOp.CHK.value if ( AW8[0] == PM0SC.TRegOp.CHK.value ) else PM0SC.TRegOp.HW.value
+            VRet = 0
+            for VRegId in range ( VNbReg ):
+                VAddr = PM0SC.VGARegAddr[VRegId]
+                VErr = self.FWrRegs ( VAddr, VRegOp, [self.DRegImg[VAddr + VIndex] for VIndex in range ( PM0SC.VGARegW8ESz[VRegId] )] )
+                VRet = VErr if ( (VErr < 0) or (VRet < 0) ) else VRet + VErr
+            return (VRet, [], 0.0)
+
+        if ( CmdId == PM0SC.TCmd.RD_ALL_REG.value ):
+            VRet = 0
+            for VRegId in range ( VNbReg ):
+                VAddr = PM0SC.VGARegAddr[VRegId]
+                VErr, VAData = self.FRdRegs ( VAddr, PM0SC.TRegOp.HW.value, PM0SC.VGARegW8ESz[VRegId] )
+                if ( VErr < 0 ):
+                    return (VErr, [], 0.0)
+                if ( (AW8[0] == PM0SC.TRegOp.CHK.value) and (VRegId != PM0SC.TRegId.CONF_DATA.value) ):
+                    if ( VAData != [self.DRegImg[VAddr + VIndex] for VIndex in range ( len ( VAData ) )] ):
+                        VRet = -2
+                else :
+                    for VIndex, VW8 in enumerate ( VAData ):
+                        self.DRegImg[VAddr + VIndex] = VW8
+            return (VRet, [], 0.0)
+
+        # [Cmd, RstSt, RstI2CSt, StartSt, TestmodeSt, PulseWidthUs low, PulseWidthUs high]
+
+        if ( CmdId == PM0SC.TCmd.CTRL_HW_SIG.value ):
+            return self.FCtrlHwSig ( AW8[0], AW8[1:5], AW8[5] + (AW8[6] << 8) )
+
+        # [RegId, ItNb low, ItNb high] => write / read back of patterns, the registers are restored
+
+        if ( CmdId == PM0SC.TCmd.TEST_I2C_REGS.value ):
+            VRegId, VItNb = AW8[0], AW8[1] + (AW8[2] << 8)
+            if ( VRegId >= VNbReg ):
+                return (-1, [], 0.0)
+            self.I2CW8Nb = self.I2CW8Nb + 2 * VItNb * PM0SC.VGARegW8ESz[VRegId]
+            return (sum ( [self.FI2CErr () for _ in range ( VItNb )] ), [], 0.0)
+
+        if ( CmdId == PM0SC.TCmd.ACTIVATE_OUTPUTS.value ):
+            self.Outputs = 1
+            return (0, [], 0.0)
+
+        if ( CmdId == PM0SC.TCmd.DEACTIVATE_OUTPUTS.value ):
+            self.Outputs = 0
+            return (0, [], 0.0)
+
+        # [RegAddr, RegOp,PrePostOp,PrePostParam, DataSz, W8 ...]
+
+        if ( CmdId == PM0SC.TCmd.WR_REG_LOW_LEVEL.value ):
+            if ( len ( AW8 ) != 5 + AW8[4] ):
+                return (-1, [], 0.0)
+            return (self.FWrRegs ( AW8[0], AW8[1], AW8[5:] ), [], 0.0)
+
+        # [RegAddr, RegOp,PrePostOp,PrePostParam, DataSz]
+
+        if ( CmdId == PM0SC.TCmd.RD_REG_LOW_LEVEL.value ):
+            VRet, VAData = self.FRdRegs ( AW8[0], AW8[1], AW8[4] )
+            return (VRet, VAData, 0.0)
+
+        # [RegOp,PrePostOp,PrePostParam, RegNb, RegId, W8 ..., RegId, W8 ..., ...] => one status per register
+
+        if ( CmdId == PM0SC.TCmd.WR_REG_BATCH.value ):
+            VAStatus = []
+            Vi = PM0SC.WR_REG_BATCH_HEADER_SZ
+            for _ in range ( AW8[3] ):
+                VRegId = AW8[Vi]
+                if ( VRegId >= VNbReg ):
+                    return (-1, [], 0.0)
+                VRegSz = PM0SC.VGARegW8ESz[VRegId]
+                VAStatus.append ( self.FWrRegs ( PM0SC.VGARegAddr[VRegId], AW8[0], AW8[Vi+1:Vi+1+VRegSz] ) & 0xFF )
+                Vi = Vi + 1 + VRegSz
+            return (0, VAStatus, 0.0)
+
+        self.logger.error ( "Unknown command {:d}".format (CmdId) )
+
+        return (-1, [], 0.0)
+
+
+    def FCtrlHwSig ( self, Cmd, ASt, PulseWidthUs ) :
+
+        '''
+        ...
+
+        Executes a CTRL_HW_SIG command, a pulse on RST or RST_I2C resets PICMIC registers
+
+        Param
+        - Cmd           = Command, see PM0SC.TCmdHwSig
+        - ASt           = [RstSt, RstI2CSt, StartSt, TestmodeSt]
+        - PulseWidthUs  = Pulse width in us
+
+        Returns
+        - Same as FExecCmd
+
+        '''
+
+        if ( Cmd == PM0SC.TCmdHwSig.SET_ST_ALL.value ):
+            self.AHwSig = list ( ASt )
+            return (0, [], 0.0)
+
+        if ( PM0SC.TCmdHwSig.SET_ST_RST.value <= Cmd <= PM0SC.TCmdHwSig.SET_ST_TESTMODE.value ):
+            VSig = Cmd - PM0SC.TCmdHwSig.SET_ST_RST.value
+            self.AHwSig[VSig] = ASt[VSig]
+            return (0, [], 0.0)
+
+        if ( PM0SC.TCmdHwSig.PULSE_RST.value <= Cmd <= PM0SC.TCmdHwSig.PULSE_START.value ):
+            if ( Cmd != PM0SC.TCmdHwSig.PULSE_START.value ):
+                for VAddr in self.DRegChip :
+                    self.DRegChip[VAddr] = 0
+            return (0, [], PulseWidthUs * 1e-6)
+
+        if ( Cmd == PM0SC.TCmdHwSig.GET_PRINT_ST.value ):
+            self.logger.info ( "HW signals RST = {:d} RST_I2C = {:d} START = {:d} TESTMODE = {:d}".format (*self.AHwSig) )
+            return (0, [], 0.0)
+
+        return (-1, [], 0.0)
+
+
+    # -----------------------------------------------------------------------
+    # Statistics
+    # -----------------------------------------------------------------------
+
+    def FResetStats ( self ) :
+
+        self.CmdNb        = 0
+        self.DCmdNb       = {}  # CmdId => commands nb
+        self.ErrNb        = 0   # Commands with status <> 0
+        self.I2CW8Nb      = 0   # W8 transfered on I2C
+        self.I2CErrNb     = 0   # I2C errors injected
+        self.NoAnsNb      = 0   # Answers lost on purpose
+        self.RxOverflowNb = 0   # Commands lost because DUE reception buffer was full
+        self.PixWrNb      = 0   # Pixels written
+
+
+    def FGetStats ( self ) :
+
+        '''
+        ...
+
+        Returns
+        - A dict of counters : CmdNb, DCmdNb ( command name => nb ), ErrNb, I2CW8Nb, I2CErrNb, NoAnsNb, RxOverflowNb, PixWrNb
+
+        '''
+
+        with self.Lock :
+            VDStats = { "CmdNb" : self.CmdNb, "ErrNb" : self.ErrNb, "I2CW8Nb" : self.I2CW8Nb, "I2CErrNb" : self.I2CErrNb,
+                        "NoAnsNb" : self.NoAnsNb, "RxOverflowNb" : self.RxOverflowNb, "PixWrNb" : self.PixWrNb,
+                        "DCmdNb" : dict ( [(PM0SC.TCmd(VCmdId).name if ( VCmdId < PM0SC.TCmd.CMD_NB.value ) else "CMD_{:d}".format (VCmdId), VNb) for VCmdId, VNb in self.DCmdNb.items ()] ) }
+
+        return (VDStats)
+
+
+    def FPrintStats ( self ) :
+
+        VDStats = self.FGetStats ()
+
+        print ( "" )
+        print ( "Virtual DUE : {:d} commands - {:d} errors - {:d} I2C W8 - {:d} pixels written".format (VDStats["CmdNb"], VDStats["ErrNb"], VDStats["I2CW8Nb"], VDStats["PixWrNb"]) )
+        print ( "Injected : {:d} I2C errors - {:d} lost answers - DUE RX buffer overflows : {:d}".format (VDStats["I2CErrNb"], VDStats["NoAnsNb"], VDStats["RxOverflowNb"]) )
+
+        for VName, VNb in sorted ( VDStats["DCmdNb"].items () ) :
+            print ( "{:<20s} {:8d}".format (VName, VNb) )
+
+        print ( "" )
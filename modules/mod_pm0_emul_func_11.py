@@ -11,6 +11,15 @@
 # 24/11/2022 V11 M.SPECHT CNRS/IN2P3/IPHC/C4PI 
 # - modified the importing procedure in order to have one place to change the modules names in the project
 #
+# 18/10/2026 V11
+# - FSetBitMapFromFile writes the matrix by PM0SC.FWrPixelMatrix : only the modified pixels are written when Param = 1
+# - added FLoadTrimMapFromFile, FMergeTrimMap, FSetTrimMapFromFile : calibration csv file loaded in a 128 x 54 map and written by PM0SC.FWrPixels
+# - added the binary bitmap files ( FWriteBitmapBinFile, FLoadBitmapFromBinFile, FConvertBitmapFileToBin ), read by FLoadBitmapFromFile and FGetCommentsFromFile
+# - FLoadBitmapFromFile and FGetCommentsFromFile use the cached one pass parser of mod_pm0_bitmap_10 for the text files
+# - FSetBitMapFromFile and FExtractConnectedPixels use the pixel index of mod_pm0_pixgeom_10 ( built once, cached in a numpy file )
+# - added FSetBitMap : sets a bitmap built in memory ( ex by mod_pm0_pattern_10 ), FSetBitMapFromFile loads the file and calls it
+# - the pixels configuration of FSetBitMap is composed by PM0SC.FComposePixCfg / FSetPixCfgLayer ( pulsing values = one layer )
+#
 # Can be loaded as a module under python interpreter and used in interactive mode
 # python
 # >>> import module
@@ -37,11 +46,13 @@ __vdate__ = "24/11/2022" # Module version &date
 import logging
 import numpy as np
 import sys
-import ctypes as ct
 import importlib
 import configparser    # for the ini file configuration retrieving 
 
-import re
+import os
+import glob
+import struct
+import zlib
 
 from time import sleep
 
@@ -54,6 +65,10 @@ config.read("modules/Modules.conf")
 PM0SC_Name = config['ModuleName']['slowControlLowLevel']
 #import mod_pm0_emul_func_11 as PM0EMUL # for the comment extracting of the pulsing files
 PM0SC = importlib.import_module(PM0SC_Name, package=None)
+PM0BM_Name = config['ModuleName']['bitmapFiles']
+PM0BM = importlib.import_module(PM0BM_Name, package=None)
+PM0PG_Name = config['ModuleName']['pixelGeometry']
+PM0PG = importlib.import_module(PM0PG_Name, package=None)
 #import mod_pm0_sc_23 as PM0SC
 
 
@@ -75,6 +90,12 @@ RegOp     = PM0SC.TRegOp.CHK.value
 
 VGStrRegOp = ["SW","HW","CHECK"]
 
+# Binary bitmap files, see FWriteBitmapBinFile
+
+BITMAP_BIN_MAGIC  = b"PM0BM1"
+BITMAP_BIN_EXT    = ".pm0b"
+BITMAP_BIN_HEADER = struct.Struct("<6sHHHHII") # magic, planes nb, rows nb, cols nb, comments sz, hits nb, crc32
+
 # ===========================================================================
 # Functions  
 # ===========================================================================
@@ -246,18 +267,62 @@ def FWrPixSeqLoop ( LoopNb,RegOp, PrePostOp, PrePostParam ) :
 
 
 
-def FSetBitMapFromFile(Param,VFileName,VPulsingReg,VNotPulsingReg,VRegOp, VPrePostOp, VPrePostParam):
+def FSetBitMapFromFile(Param,VFileName,VPulsingReg,VNotPulsingReg,VRegOp, VPrePostOp, VPrePostParam, FullRefresh = 0):
     '''
     ...
     
     - Loads a bitmap file ( name asked to the used in function)
-    - compare the bitmap file with the list of connected pixels of picmic
+    - Set the bitmap to the matrix of picmic, see FSetBitMap
+    
+    Param
+    - Param : selection of the way to treat the bitmap, see FSetBitMap
+    - FullRefresh : see FSetBitMap
+    
+    Returns
+        - Result: 0 if successfull, negative if failed
+        - BitMap: two dimensions list ( 128 x 54 ) containing the  pixel matrix
+        - HitNb: number of hits in the emulated matrix
+    
+    17/02/2022 M.SPECHT CNRS/IN2P3/IPHC/C4PI
+    18/10/2026 : the matrix is set by FSetBitMap
+    
+    '''
+    logger = logging.getLogger('pm0_emul')
+    
+    # Load the bitmap
+    try :
+        Result, BitMap, HitNb = FLoadBitmapFromFile ( VFileName )
+    except:
+        logger.error("Error while loading bitmap from file")
+        Result = -1
+        BitMap = None
+    
+    if Result < 0 :
+        print("Error reading the file !!!! ")
+        VStatus = "Error reading the file !!!! "
+        logger.error(VStatus)
+        return -1, BitMap, 0
+    
+    return FSetBitMap(Param,BitMap,VPulsingReg,VNotPulsingReg,VRegOp, VPrePostOp, VPrePostParam, FullRefresh)
+
+
+def FSetBitMap(Param,BitMap,VPulsingReg,VNotPulsingReg,VRegOp, VPrePostOp, VPrePostParam, FullRefresh = 0):
+    '''
+    ...
+    
+    - compare the bitmap with the list of connected pixels of picmic
     - Set the bitmap to the matrix of picmic
     
+    The bitmap comes from a file ( FSetBitMapFromFile ) or is built in memory ( ex by mod_pm0_pattern_10 ).
+    The matrix is written by PM0SC.FWrPixelMatrix, with Param = 1 only the pixels which differ from
+    the pixels configuration already in PICMIC are written ( see PM0SC.TPixWrMode.DIFF )
+    
     Param
     - Param : selection of the way to treat the bitmap
         - 0 : set all pixels of the matrix, even the one not selected
         - 1 : set only the selected pixels
+    - BitMap : 128 x 54 array, 1 => pulsed pixel, not modified ( the dummy pixels are removed from a copy )
+    - FullRefresh : 1 => with Param = 1, all the pixels are reset to VNotPulsingReg before setting the selected pixels
     
     Returns
         - Result: 0 if successfull, negative if failed
@@ -265,11 +330,16 @@ def FSetBitMapFromFile(Param,VFileName,VPulsingReg,VNotPulsingReg,VRegOp, VPrePo
         - HitNb: number of hits in the emulated matrix
     
     17/02/2022 M.SPECHT CNRS/IN2P3/IPHC/C4PI
+    18/10/2026 : pixels written by PM0SC.FWrPixelMatrix, bitmap given as param
     
     '''
     logger = logging.getLogger('pm0_emul')
-    VErrorNb = 0
     FuncResult = 0
+    HitIndex = 0
+    BitMap = np.array(BitMap, dtype=int)
+    if BitMap.shape != (128,54):
+        logger.error("Bitmap size = {} instead of (128, 54)".format(BitMap.shape))
+        return -1, BitMap, HitIndex
 
 
     # Set Global command to 0x00 (soft stop)
@@ -281,265 +351,55 @@ def FSetBitMapFromFile(Param,VFileName,VPulsingReg,VNotPulsingReg,VRegOp, VPrePo
         logger.error(VStatus)
 
 
-    ConnectedPixelsBitmap = FExtractConnectedPixels('ROnb_xyp1.txt')
-    logger.info("ConnectedPixelsBitmap :{}".format(ConnectedPixelsBitmap))
-        
+    PixIndex = PM0PG.FGetPixIndex()
+    if PixIndex == None:
+        logger.error("Connected pixels list not available")
+        return -1, BitMap, HitIndex
+    
     if Param == 0:  #  all pixels set even the empty ones
-        # Load the bitmap
-        try :
-            Result, BitMap, HitNb = FLoadBitmapFromFile ( VFileName )
-        except:
-            logger.error("Error while loading bitmap from file")
-            Result = -1
-        HitIndex = 0
-        UnconnectedNb = 0
-        if Result < 0 :
-            print("Error reading the file !!!! ")
-            VStatus = "Error reading the file !!!! "
-            logger.error(VStatus)
-            FuncResult = -1
-        else:
-            # reset the matrix
-            # write col value : select all columns
-            VErr = PM0SC.FCmdSetWrReg ( PM0SC.TRegId.CONF_COL.value, VRegOp, VPrePostOp, VPrePostParam, [64] )
-            VStatus = "Reset Matrix Select all col, Reg op = {:s} - Write error = {:d}".format (VGStrRegOp[VRegOp], VErr)
-            if VErr >= 0:
-                logger.debug(VStatus)
-            else:
-                logger.error(VStatus)
-            # write row value : select all rows
-            VErr = PM0SC.FCmdSetWrReg ( PM0SC.TRegId.PIX_CONF_ROW.value, VRegOp, VPrePostOp, VPrePostParam, [128] )
-            VStatus = "Reset Matrix select all Row, Reg op = {:s} - Write error = {:d}".format (VGStrRegOp[VRegOp], VErr)
-            if VErr >= 0:
-                logger.debug(VStatus)
-            else:
-                logger.error(VStatus)
-            # Set data to pixel : MSB at 1
-            VErr = PM0SC.FCmdSetWrReg ( PM0SC.TRegId.CONF_DATA.value, VRegOp, VPrePostOp, VPrePostParam, [VNotPulsingReg] )
-            VStatus = "Reset Matrix set pixel data to 0, Reg op = {:s} - Write error = {:d}".format (VGStrRegOp[VRegOp], VErr)
-            if VErr >= 0:
-                logger.debug(VStatus)
-            else:
-                logger.error(VStatus)
-            # write col value : unselect all columns
-            VErr = PM0SC.FCmdSetWrReg ( PM0SC.TRegId.CONF_COL.value, VRegOp, VPrePostOp, VPrePostParam, [128] )
-            VStatus = "after Reset Matrix unselect all col, Reg op = {:s} - Write error = {:d}".format (VGStrRegOp[VRegOp], VErr)
-            if VErr >= 0:
-                logger.debug(VStatus)
-            else:
-                logger.error(VStatus)
-
-            # set the bitmap to the matrix
-            for Col in range (54):
-                # write col value :
-                VErr = PM0SC.FCmdSetWrReg ( PM0SC.TRegId.CONF_COL.value, VRegOp, VPrePostOp, VPrePostParam, [Col] )
-                VStatus = "Write col = {:d} , Reg op = {:s} - Write error = {:d}".format (Col,VGStrRegOp[VRegOp], VErr)
-                if VErr >= 0:
-                    logger.info(VStatus)
-                else:
-                    logger.error(VStatus)
-                    VErrorNb += 1
-                for Row in range (128):
-                    #logger.info("Pixel[{},{}]".format(Row,Col))
-                    print("Pixel[{},{}] (last:[128,54])".format(Row,Col))
-                    if BitMap[Row,Col] == 1:
-                        if ConnectedPixelsBitmap[Row,Col] == 1:
-                            # Pixel connected, can be emulated
-                            # write row value :
-                            VErr = PM0SC.FCmdSetWrReg ( PM0SC.TRegId.PIX_CONF_ROW.value, VRegOp, VPrePostOp, VPrePostParam, [Row] )
-                            VStatus = "Write row = {:d} , Reg op = {:s} - Write error = {:d}".format (Row,VGStrRegOp[VRegOp], VErr)
-                            if VErr >= 0:
-                                logger.debug(VStatus)
-                            else:
-                                logger.error(VStatus)
-                                VErrorNb += 1
-                            # Set data to pixel : bits 7(pulse) and 6(mask)  at 1
-                            VErr = PM0SC.FCmdSetWrReg ( PM0SC.TRegId.CONF_DATA.value, VRegOp, VPrePostOp, VPrePostParam, [VPulsingReg] )
-                            VStatus = "write pixel reg value = {:d} , Reg op = {:s} - Write error = {:d}".format (128,VGStrRegOp[VRegOp], VErr)
-                            if VErr >= 0:
-                                logger.debug(VStatus)
-                            else:
-                                logger.error(VStatus)
-                                VErrorNb += 1
-                            print("Hit No:{:d} out of {:d}".format(HitIndex,HitNb))
-                            HitIndex += 1
-                        else:
-                            #Pixel not connected, 
-                            UnconnectedNb += 1
-                            BitMap[Row,Col] = 0
-                            logger.error('Pixel Row:{:d}, Col:{:d} is a dummy pixel !!'.format(Row,Col))
-                            # write row value :
-                            VErr = PM0SC.FCmdSetWrReg ( PM0SC.TRegId.PIX_CONF_ROW.value, VRegOp, VPrePostOp, VPrePostParam, [Row] )
-                            VStatus = "Write row = {:d} , Reg op = {:s} - Write error = {:d}".format (Row,VGStrRegOp[VRegOp], VErr)
-                            if VErr >= 0:
-                                logger.debug(VStatus)
-                            else:
-                                logger.error(VStatus)
-                                VErrorNb += 1
-                            # Set data to pixel : MSB at 0
-
-                            VErr = PM0SC.FCmdSetWrReg ( PM0SC.TRegId.CONF_DATA.value, VRegOp, VPrePostOp, VPrePostParam, [VNotPulsingReg] )
-                            VStatus = "write pixel reg value = {:d} , Reg op = {:s} - Write error = {:d}".format (0,VGStrRegOp[VRegOp], VErr)
-                            if VErr >= 0:
-                                logger.debug(VStatus)
-                            else:
-                                logger.error(VStatus)
-                                VErrorNb += 1
-
-                    else:
-                        # write row value :
-                        VErr = PM0SC.FCmdSetWrReg ( PM0SC.TRegId.PIX_CONF_ROW.value, VRegOp, VPrePostOp, VPrePostParam, [Row] )
-                        VStatus = "Write row = {:d} , Reg op = {:s} - Write error = {:d}".format (Row,VGStrRegOp[VRegOp], VErr)
-                        if VErr >= 0:
-                            logger.debug(VStatus)
-                        else:
-                            logger.error(VStatus)
-                            VErrorNb += 1
-                        # Set data to pixel : MSB at 0
-
-                        VErr = PM0SC.FCmdSetWrReg ( PM0SC.TRegId.CONF_DATA.value, VRegOp, VPrePostOp, VPrePostParam, [VNotPulsingReg] )
-                        VStatus = "write pixel reg value = {:d} , Reg op = {:s} - Write error = {:d}".format (0,VGStrRegOp[VRegOp], VErr)
-                        if VErr >= 0:
-                            logger.debug(VStatus)
-                        else:
-                            logger.error(VStatus)
-                            VErrorNb += 1
-
-            # deselect all col : write 0x80 in col_cfg
-            VErr = PM0SC.FCmdSetWrReg ( PM0SC.TRegId.CONF_COL.value, VRegOp, VPrePostOp, VPrePostParam, [0x80] )
-            VStatus = "Unselect all col, Reg op = {:s} - Write error = {:d}".format (VGStrRegOp[VRegOp], VErr)
-            #print the bitmap
-            FPrintBitmap(BitMap)
-            if VErr >= 0:
-                logger.debug(VStatus)
-            else:
-                logger.error(VStatus)
-                VErrorNb += 1
-
-            # set the sequencer registers
-            
-#  MS 18 05 22  test the increasing of the frame size            
-#            VErr = PM0SC.FCmdSetWrReg ( PM0SC.TRegId.PIX_SEQ.value, VRegOp, VPrePostOp, VPrePostParam, [0,0,0,0,0,16,2,3,0,1,12,1,100,12,251,255,0,0,55,67,3,4,36,37] )
-            ##VErr = PM0SC.FCmdSetWrReg ( PM0SC.TRegId.PIX_SEQ.value, VRegOp, VPrePostOp, VPrePostParam, [0,0,0,0,0,100,2,3,0,1,0,0,200,12,251,255,0,0,55,67,3,4,200,201] )
-            ##VStatus = "Reg op = {:s} - Write error = {:d}".format (VGStrRegOp[VRegOp], VErr)
-            ##if VErr >= 0:
-            ##    logger.debug(VStatus)
-            ##else:
-            ##    logger.error(VStatus)
-            ##    VErrorNb += 1
-            # Set Global command to 0x08 (soft start)
-            VErr = PM0SC.FCmdSetWrReg ( PM0SC.TRegId.GLB_CMD.value, VRegOp, VPrePostOp, VPrePostParam, [8] )
-            VStatus = "Reg op = {:s} - Wr val = {:X} Hex - Write error = {:d}".format (VGStrRegOp[VRegOp], 8, VErr)
-            if VErr >= 0:
-                logger.debug(VStatus)
-            else:
-                logger.error(VStatus)
-            if VErrorNb == 0:
-                logger.debug("Matrix set without any com error ")
-                
-            
-            else:
-                logger.error("Matrix set , total err nb : {:d}".format (VErrorNb))
-                FuncResult = -2
-            
-
-    elif Param == 1:  #  only active pixels are set
-        # Load the bitmap
-        Result, BitMap, HitNb = FLoadBitmapFromFile ( VFileName )
-        UnconnectedNb = 0
-        HitIndex = 0
-        if Result < 0 :
-            print("Error reading the file !!!! ")
-            VStatus = "Error reading the file !!!! "
-            logger.error(VStatus)
-            FuncResult = -1
-        else:
-            #input("Type return to continue")
-            # reset the matrix
-            # write col value : select all columns
-            VErr = PM0SC.FCmdSetWrReg ( PM0SC.TRegId.CONF_COL.value, VRegOp, VPrePostOp, VPrePostParam, [64] )
-            # write row value : select all rows
-            VErr = PM0SC.FCmdSetWrReg ( PM0SC.TRegId.PIX_CONF_ROW.value, VRegOp, VPrePostOp, VPrePostParam, [128] )
-            # Set data to pixel : MSB at 1
-            VErr = PM0SC.FCmdSetWrReg ( PM0SC.TRegId.CONF_DATA.value, VRegOp, VPrePostOp, VPrePostParam, [VNotPulsingReg] )
-            VStatus = "write pixel reg value, Reg op = {:s} - Write error = {:d}".format (VGStrRegOp[VRegOp], VErr)
-            if VErr >= 0:
-                logger.debug(VStatus)
-            else:
-                logger.error(VStatus)
-                FuncResult = -2
-            # write col value : unselect all columns
-            VErr = PM0SC.FCmdSetWrReg ( PM0SC.TRegId.CONF_COL.value, VRegOp, VPrePostOp, VPrePostParam, [128] )
-            
-            # set the bitmap to the matrix
-            for Col in range (54):
-                # write col value :
-                VErr = PM0SC.FCmdSetWrReg ( PM0SC.TRegId.CONF_COL.value, VRegOp, VPrePostOp, VPrePostParam, [Col] )
-                VStatus = "Write col, Reg op = {:s} - Write error = {:d}".format (VGStrRegOp[VRegOp], VErr)
-                if VErr >= 0:
-                    logger.debug(VStatus)
-                else:
-                    logger.error(VStatus)
-                    FuncResult = -2
-                for Row in range(128):
-                    #logger.info("Pixel[{},{}]".format(Row,Col))
-                    if BitMap[Row,Col] == 1:
-                        if ConnectedPixelsBitmap[Row,Col] == 1:
-                            # write row value :
-                            VErr = PM0SC.FCmdSetWrReg ( PM0SC.TRegId.PIX_CONF_ROW.value, VRegOp, VPrePostOp, VPrePostParam, [Row] )
-                            VStatus = "Write row, Reg op = {:s} - Write error = {:d}".format (VGStrRegOp[VRegOp], VErr)
-                            if VErr >= 0:
-                                logger.debug(VStatus)
-                            else:
-                                logger.error(VStatus)
-                                FuncResult = -2
-                            # Set data to pixel : MSB at 1 and bit 6 at 1
-                            VErr = PM0SC.FCmdSetWrReg ( PM0SC.TRegId.CONF_DATA.value, VRegOp, VPrePostOp, VPrePostParam, [VPulsingReg] )
-                            VStatus = "write pixel reg value, Reg op = {:s} - Write error = {:d}".format (VGStrRegOp[VRegOp], VErr)
-                            if VErr >= 0:
-                                logger.debug(VStatus)
-                            else:
-                                logger.error(VStatus)
-                                FuncResult = -2
-                            print("Hit No:{:d} out of {:d}".format(HitIndex,HitNb))
-                            HitIndex += 1
-                        else:
-                            # Pixel selected is dummy !!
-                            UnconnectedNb += 1
-                            BitMap[Row,Col] = 0
-                            logger.error('Pixel Row:{:d}, Col:{:d} is a dummy pixel , total {:d} dummies pixels!!'.format(Row,Col,UnconnectedNb))
-
-            # deselect all col : write 0x80 in col_cfg
-            VErr = PM0SC.FCmdSetWrReg ( PM0SC.TRegId.CONF_COL.value, VRegOp, VPrePostOp, VPrePostParam, [0x80] )
-            VStatus = "Write col, Reg op = {:s} - Write error = {:d}".format (VGStrRegOp[VRegOp], VErr)
-            #print the bitmap
-            FPrintBitmap(BitMap)
-
-            if VErr >= 0:
-                logger.debug(VStatus)
-            else:
-                logger.error(VStatus)
-                FuncResult = -2
+        VWrMode = PM0SC.TPixWrMode.ALL.value
+    elif Param == 1 and FullRefresh == 1:  #  only active pixels are set, after a reset of the matrix
+        VWrMode = PM0SC.TPixWrMode.FULL.value
+    elif Param == 1:  #  only active pixels which changed are set
+        VWrMode = PM0SC.TPixWrMode.DIFF.value
+    else:
+        logger.error("Unknown bitmap param = {}".format(Param))
+        return -1, BitMap, HitIndex
+    
+    # Selected pixels which are dummy !!
+    BitMap, DummyPixels = PixIndex.FMaskBitmap(BitMap)
+    for Row, Col in DummyPixels:
+        logger.error('Pixel Row:{:d}, Col:{:d} is a dummy pixel !!'.format(Row,Col))
+    
+    HitIndex = int(np.count_nonzero(BitMap == 1))
+    
+    if len(DummyPixels) > 0:
+        logger.error('{:d} dummies pixels removed from the bitmap'.format(len(DummyPixels)))
+    
+    # set the bitmap to the matrix : bits 7(pulse) and 6(mask) given by VPulsingReg for the hits, VNotPulsingReg for the others
+    VAPixCfg = PM0SC.FSetPixCfgLayer(PM0SC.FComposePixCfg(VNotPulsingReg), BitMap == 1, VPulsingReg)
+    
+    VErr, VRegWrNb = PM0SC.FWrPixelMatrix ( VAPixCfg, VRegOp, VPrePostOp, VPrePostParam, VWrMode )
+    VStatus = "Set matrix, mode = {:s}, {:d} hits, {:d} registers writes, Reg op = {:s} - Write error = {:d}".format (PM0SC.TPixWrMode(VWrMode).name, HitIndex, VRegWrNb, VGStrRegOp[VRegOp], VErr)
+    #print the bitmap
+    FPrintBitmap(BitMap)
+    if VErr == 0:
+        logger.info(VStatus)
+    else:
+        logger.error(VStatus)
+        FuncResult = -2
 
-            # set the sequencer registers
-#  MS 18 05 22  test the increasing of the frame size            
-#            VErr = PM0SC.FCmdSetWrReg ( PM0SC.TRegId.PIX_SEQ.value, VRegOp, VPrePostOp, VPrePostParam, [0,0,0,0,0,16,2,3,0,1,12,1,100,12,251,255,0,0,55,67,3,4,36,37] )
-            #VErr = PM0SC.FCmdSetWrReg ( PM0SC.TRegId.PIX_SEQ.value, VRegOp, VPrePostOp, VPrePostParam, [0,0,0,0,0,100,2,3,0,1,0,0,200,12,251,255,0,0,55,67,3,4,200,201] )
-            
-            VStatus = "Reg op = {:s} - Write error = {:d}".format (VGStrRegOp[VRegOp], VErr)
-            if VErr >= 0:
-                logger.debug(VStatus)
-            else:
-                logger.error(VStatus)
-                FuncResult = -2
-            # Set Global command to 0x08 (soft start)
-            VErr = PM0SC.FCmdSetWrReg ( PM0SC.TRegId.GLB_CMD.value, VRegOp, VPrePostOp, VPrePostParam, [8] )
-            VStatus = "Reg op = {:s} - Wr val = {:X} Hex - Write error = {:d}".format (VGStrRegOp[VRegOp], 8, VErr)
-            if VErr >= 0:
-                logger.debug(VStatus)
-            else:
-                logger.error(VStatus)
-                FuncResult = -2
+    # Set Global command to 0x08 (soft start)
+    VErr = PM0SC.FCmdSetWrReg ( PM0SC.TRegId.GLB_CMD.value, VRegOp, VPrePostOp, VPrePostParam, [8] )
+    VStatus = "Reg op = {:s} - Wr val = {:X} Hex - Write error = {:d}".format (VGStrRegOp[VRegOp], 8, VErr)
+    if VErr >= 0:
+        logger.debug(VStatus)
+    else:
+        logger.error(VStatus)
+        FuncResult = -2
+    
+    if FuncResult == 0:
+        logger.debug("Matrix set without any com error ")
 
     return FuncResult, BitMap, HitIndex
 
@@ -563,47 +423,309 @@ def FLoadBitmapFromFile(FileName):
     '''
     #global BitMap
     logger = logging.getLogger('pm0_emul')
-    #BitMap = []
-    BitMap = np.zeros(shape=(128,54),dtype=int)
-    RowIndex = ct.c_int(0)
-    ColIndex = ct.c_int(0)
     
-    HitNb = 0
+    # binary bitmap file : first plane
+    if FIsBitmapBinFile(FileName):
+        Result, Planes, HitNb, Comments = FLoadBitmapFromBinFile(FileName)
+        logger.info("FLoadBitmapFromFile done,result:{:d}".format(Result))
+        return Result, Planes[0], HitNb
+    
+    # text bitmap file : parsed once, then taken from the cache while the file is not modified
+    Result, BitMap, HitNb, Comments = PM0BM.FReadBitmapTextFile(FileName)
+    logger.info("FLoadBitmapFromFile done,result:{:d}".format(Result))
+    return Result, BitMap, HitNb
+
+
+def FLoadTrimMapFromFile(FileName, DefVal = 0xAF):
+    ''' 
+    ... 
+    
+    Loads a calibration csv file ( calibrated ways ) in a 128 x 54 map of pixel configuration values
+    
+    The file has a header line then one line per pixel : Row, Column, Name [, Value]
+    Row / Column are the values of the pixel config row / col registers, Value is the pixel configuration
+    in hex ( as in the Pixel Configuration tab ), DefVal is used if the line has no Value
+    
+    Param
+    - FileName      = Name of the csv file
+    - DefVal        = Configuration of the pixels without Value
+    
+    Returns
+    - An error code, 0 => OK, < 0 => error
+    - TrimMap = numpy 128 * 54 array, -1 => pixel not in the file
+    - PixNb = number of pixels set in the map
+    
+    '''
+    logger = logging.getLogger('pm0_emul')
+    TrimMap = np.full((128,54), -1, dtype=np.int16)
+    
     try:
-        # Open the file
         with open(FileName,"r") as infile:
-            RowIndex.value = 0
-            for line in infile:
-                #BitMapLine = []
-                if line[0] == ':':
-                    #comment line : line ignored
-                    print("")
-                else:
-                    ColIndex.value = 0
-                    #bitmap line
-                    for ColLineIndex in range (len(line)):
-                        if line[ColLineIndex] in ["0","1"]:
-                            #BitMapLine.append(int(line[ColIndex]))
-                            BitMap[RowIndex.value,ColIndex.value] = int(line[ColLineIndex])
-                            if line[ColLineIndex] in ["1"]:
-                                HitNb += 1
-                            ColIndex.value += 1
-                    RowIndex.value += 1 
+            ALines = [Line.split(',') for Line in infile.read().splitlines()[1:] if Line.strip() != '']
+        
+        ARow = np.array([int(Line[0]) for Line in ALines], dtype=int)
+        ACol = np.array([int(Line[1]) for Line in ALines], dtype=int)
+        AVal = np.array([int(Line[3],16) if len(Line) > 3 and Line[3].strip() != '' else DefVal for Line in ALines], dtype=np.int16)
+    except IOError as e:
+        logger.error("I/O error({0}): {1}".format(e.errno, e.strerror))
+        return -1, TrimMap, 0
+    except:
+        logger.error("Error while loading calibration file {}: {}".format(FileName, sys.exc_info()[1]))
+        return -2, TrimMap, 0
+    
+    # Pixels outside the matrix are not written by PICMIC => ignored
+    AInside = (ARow >= 0) & (ARow < 128) & (ACol >= 0) & (ACol < 54)
+    
+    if not AInside.all():
+        logger.warning("{:d} pixels outside the matrix ignored in {}".format(int(np.count_nonzero(~AInside)), FileName))
+    
+    TrimMap[ARow[AInside], ACol[AInside]] = AVal[AInside]
+    PixNb = int(np.count_nonzero(TrimMap >= 0))
+    
+    logger.info("FLoadTrimMapFromFile done, {:d} pixels".format(PixNb))
+    return 0, TrimMap, PixNb
+
+
+def FMergeTrimMap(PixCfg, TrimMap, Mask = 0xFF):
+    ''' 
+    ... 
+    
+    Merges a trim map in a pixel configuration : bits of Mask taken from the map for the pixels of the map
+    
+    Param
+    - PixCfg        = Pixel configuration, numpy 128 * 54 array, -1 => unknown
+    - TrimMap       = Trim map, see FLoadTrimMapFromFile
+    - Mask          = Bits of the configuration given by the map, ex 0x07 => IADJ only, 0xFF => whole configuration
+    
+    Returns
+    - Merged pixel configuration, -1 => unknown ( pixel unknown in PixCfg and Mask <> 0xFF )
+    
+    '''
+    PixCfg = np.asarray(PixCfg, dtype=np.int16)
+    TrimMap = np.asarray(TrimMap, dtype=np.int16)
+    
+    MergedCfg = np.where((PixCfg >= 0) | (Mask == 0xFF), (PixCfg & ~Mask & 0xFF) | (TrimMap & Mask), -1)
+    
+    return np.where(TrimMap >= 0, MergedCfg, PixCfg).astype(np.int16)
+
+
+def FSetTrimMapFromFile(FileName, DefVal, Mask, VRegOp, VPrePostOp, VPrePostParam, ProgressFunct = None):
+    ''' 
+    ... 
+    
+    - Loads a calibration csv file ( see FLoadTrimMapFromFile )
+    - merges it in the pixels configuration ( see FMergeTrimMap ), the configuration of the pixels is taken
+      from the pixels shadow of the slow control or read back from PICMIC if unknown ( Mask <> 0xFF only )
+    - writes the pixels of the file by PM0SC.FWrPixels, by chunks of 256 pixels
+    
+    Param
+    - FileName      = Name of the csv file
+    - DefVal        = Configuration of the pixels without Value in the file
+    - Mask          = Bits of the configuration given by the file, 0xFF => whole configuration
+    - ProgressFunct = None or function called after each chunk with ( pixels written, pixels nb )
+    
+    Returns
+    - Result: 0 if successfull, negative if failed
+    - TrimMap: numpy 128 * 54 array loaded from the file
+    - PixNb: number of pixels written
+    
+    '''
+    logger = logging.getLogger('pm0_emul')
+    
+    Result, TrimMap, PixNb = FLoadTrimMapFromFile(FileName, DefVal)
+    
+    if Result < 0:
+        return Result, TrimMap, 0
+    
+    # pixels config known only if the registers shadow is enabled, else all the pixels are unknown
+    PixKnown = PM0SC.FGetRegShadow().FGetPixKnown()
+    PixCfg = np.full((128,54), -1, dtype=np.int16) if PixKnown is None else PixKnown.copy()
+    
+    if Mask != 0xFF:
+        AUnknown = (TrimMap >= 0) & (PixCfg < 0)
+        if AUnknown.any():
+            VErr, APixRd, AMismatch = PM0SC.FRdPixelMatrix(None, AUnknown)
+            PixCfg[AUnknown] = APixRd[AUnknown]
+    
+    MergedCfg = FMergeTrimMap(PixCfg, TrimMap, Mask)
+    
+    APix = np.argwhere((TrimMap >= 0) & (MergedCfg >= 0))
+    
+    if len(APix) < PixNb:
+        logger.error("{:d} pixels not read, not calibrated".format(PixNb - len(APix)))
+        Result = -2
+    
+    APixWr = [(int(Row), int(Col), int(MergedCfg[Row,Col])) for Row, Col in APix]
+    
+    for Index in range(0, len(APixWr), 256):
+        VErr, VRegWrNb = PM0SC.FWrPixels(APixWr[Index:Index+256], VRegOp, VPrePostOp, VPrePostParam)
+        VStatus = "Calibration pixels {:d} to {:d}, Reg op = {:s} - Write error = {:d}".format (Index, Index + len(APixWr[Index:Index+256]) - 1, VGStrRegOp[VRegOp], VErr)
+        if VErr == 0:
+            logger.debug(VStatus)
+        else:
+            logger.error(VStatus)
+            Result = -2
+        if ProgressFunct != None:
+            ProgressFunct(Index + len(APixWr[Index:Index+256]), len(APixWr))
+    
+    logger.info("FSetTrimMapFromFile done, {:d} pixels, result:{:d}".format(len(APixWr), Result))
+    return Result, TrimMap, len(APixWr)
+
+
+
+
+def FIsBitmapBinFile(FileName):
+    ''' 
+    ... 
+    
+    Checks if a bitmap file is in the binary format ( see FWriteBitmapBinFile )
+    
+    Returns
+    - True if the file begins with BITMAP_BIN_MAGIC, False otherwise or if it can't be read
+    
+    '''
+    try:
+        with open(FileName,"rb") as infile:
+            return infile.read(len(BITMAP_BIN_MAGIC)) == BITMAP_BIN_MAGIC
+    except IOError:
+        return False
+
+
+def FWriteBitmapBinFile(FileName, Planes, Comments = ""):
+    ''' 
+    ... 
+    
+    Writes bitmap(s) in a binary file
+    
+    Format : header BITMAP_BIN_HEADER ( magic, planes nb, rows nb, cols nb, comments size, hits nb of the first plane,
+    crc32 of comments + planes ), comments utf-8, then each plane packed 8 pixels per W8 ( numpy packbits, row by row )
+    
+    Param
+    - FileName      = Name of the binary file
+    - Planes        = numpy 128 * 54 array ( one bitmap ) or N * 128 * 54 array, pixels <> 0 are set
+    - Comments      = Comments of the file, see FGetCommentsFromFile
+    
+    Returns
+    - An error code, 0 => OK, < 0 => error
+    
+    '''
+    logger = logging.getLogger('pm0_emul')
+    
+    Planes = (np.asarray(Planes) != 0).reshape(-1, 128, 54)
+    PlanesData = np.packbits(Planes.reshape(len(Planes), -1), axis=1).tobytes()
+    CommentsData = Comments.encode("utf-8")
+    
+    Header = BITMAP_BIN_HEADER.pack(BITMAP_BIN_MAGIC, len(Planes), 128, 54, len(CommentsData), int(np.count_nonzero(Planes[0])), zlib.crc32(CommentsData + PlanesData))
+    
+    try:
+        with open(FileName,"wb") as outfile:
+            outfile.write(Header + CommentsData + PlanesData)
         Result = 0
     except IOError as e:
-        print ("I/O error({0}): {1}".format(e.errno, e.strerror))
         logger.error("I/O error({0}): {1}".format(e.errno, e.strerror))
         Result = -1
-    except: #handle other exceptions such as attribute errors
-        print ("Unexpected error:", sys.exc_info()[0])
-        logger.error ("Unexpected error:", sys.exc_info()[0])
-        print ("RowIndex:{:d}".format(RowIndex.value))
-        print ("ColIndex:{:d}".format(ColIndex.value))
-        Result = -2
-    logger.info("FLoadBitmapFromFile done,result:{:d}".format(Result))
-    return Result, BitMap, HitNb
+    
+    return Result
 
 
+def FLoadBitmapFromBinFile(FileName):
+    ''' 
+    ... 
+    
+    Loads a binary bitmap file ( see FWriteBitmapBinFile )
+    
+    Param
+    - FileName      = Name of the binary file
+    
+    Returns
+    - An error code, 0 => OK, -1 => I/O error, -2 => not a binary bitmap file, -3 => checksum error
+    - Planes = numpy N * 128 * 54 array of 0 / 1
+    - HitNb = numbers of hits in the first plane
+    - Comments = a multline string
+    
+    '''
+    logger = logging.getLogger('pm0_emul')
+    Planes = np.zeros(shape=(1,128,54),dtype=np.uint8)
+    
+    try:
+        with open(FileName,"rb") as infile:
+            Data = infile.read()
+    except IOError as e:
+        logger.error("I/O error({0}): {1}".format(e.errno, e.strerror))
+        return -1, Planes, 0, ""
+    
+    if len(Data) < BITMAP_BIN_HEADER.size or Data[:len(BITMAP_BIN_MAGIC)] != BITMAP_BIN_MAGIC:
+        logger.error("{} is not a binary bitmap file".format(FileName))
+        return -2, Planes, 0, ""
+    
+    Magic, PlaneNb, RowNb, ColNb, CommentsSz, HitNb, Crc = BITMAP_BIN_HEADER.unpack_from(Data)
+    PlaneSz = (RowNb * ColNb + 7) // 8
+    
+    if len(Data) != BITMAP_BIN_HEADER.size + CommentsSz + PlaneNb * PlaneSz or zlib.crc32(Data[BITMAP_BIN_HEADER.size:]) != Crc:
+        logger.error("{} checksum / size error".format(FileName))
+        return -3, Planes, 0, ""
+    
+    Comments = Data[BITMAP_BIN_HEADER.size:BITMAP_BIN_HEADER.size + CommentsSz].decode("utf-8")
+    PlanesData = np.frombuffer(Data, dtype=np.uint8, offset=BITMAP_BIN_HEADER.size + CommentsSz).reshape(PlaneNb, PlaneSz)
+    Planes = np.unpackbits(PlanesData, axis=1, count=RowNb * ColNb).reshape(PlaneNb, RowNb, ColNb)
+    
+    return 0, Planes, HitNb, Comments
+
+
+def FConvertBitmapFileToBin(FileName, BinFileName = None):
+    ''' 
+    ... 
+    
+    Converts a text bitmap file ( Pulsing_Files/cfg_*.txt ) to the binary format
+    
+    Param
+    - FileName      = Name of the text file
+    - BinFileName   = Name of the binary file, None => FileName with the BITMAP_BIN_EXT extension
+    
+    Returns
+    - An error code, 0 => OK, < 0 => error
+    - The binary file name
+    
+    '''
+    if BinFileName == None:
+        BinFileName = os.path.splitext(FileName)[0] + BITMAP_BIN_EXT
+    
+    Result, BitMap, HitNb = FLoadBitmapFromFile(FileName)
+    
+    if Result >= 0:
+        Result, Comments = FGetCommentsFromFile(FileName)
+    
+    if Result >= 0:
+        Result = FWriteBitmapBinFile(BinFileName, BitMap, Comments)
+    
+    return Result, BinFileName
+
+
+def FConvertBitmapDirToBin(DirName, Pattern = "cfg_*.txt"):
+    ''' 
+    ... 
+    
+    Converts all the text bitmap files of a directory to the binary format, see FConvertBitmapFileToBin
+    
+    Returns
+    - An error code, 0 => OK, < 0 => number of files not converted
+    - The number of files converted
+    
+    '''
+    logger = logging.getLogger('pm0_emul')
+    ErrNb = 0
+    FileNb = 0
+    
+    for FileName in sorted(glob.glob(os.path.join(DirName, Pattern))):
+        Result, BinFileName = FConvertBitmapFileToBin(FileName)
+        if Result < 0:
+            logger.error("{} not converted".format(FileName))
+            ErrNb += 1
+        else:
+            FileNb += 1
+    
+    logger.info("FConvertBitmapDirToBin done, {:d} files converted, {:d} errors".format(FileNb, ErrNb))
+    return -ErrNb, FileNb
 
 
 def FGetCommentsFromFile(FileName):
@@ -624,24 +746,14 @@ def FGetCommentsFromFile(FileName):
     '''
     logger = logging.getLogger('pm0_emul')
     CommentsFromFile = ""
-    try:
-        # Open the file
-        with open(FileName,"r") as infile:
-            for line in infile:
-                if line[0] == ':':
-                    #comment line : line added to comments
-                    CommentsFromFile = CommentsFromFile.__add__(line[1:])
-                    #CommentFromFile.append (line[1:])
-                    #logger.info("comment:{}".format(CommentFromFile))
-        Result = 0
-    except IOError as e:
-       print ("I/O error({0}): {1}".format(e.errno, e.strerror))
-       logger.error("I/O error({0}): {1}".format(e.errno, e.strerror))
-       Result = -1
-    except: #handle other exceptions such as attribute errors
-       print ("Unexpected error:", sys.exc_info()[0])
-       logger.error ("Unexpected error:{}".format(sys.exc_info()[0]))
-       Result = -2
+    
+    if FIsBitmapBinFile(FileName):
+        Result, Planes, HitNb, CommentsFromFile = FLoadBitmapFromBinFile(FileName)
+        logger.info("FGetCommentsFromFile done,result:{:d}".format(Result))
+        return Result, CommentsFromFile
+    
+    # text bitmap file : comments given by the parsing of the bitmap, see FLoadBitmapFromFile
+    Result, BitMap, HitNb, CommentsFromFile = PM0BM.FReadBitmapTextFile(FileName)
     logger.info("FGetCommentsFromFile done,result:{:d}".format(Result))
     return Result, CommentsFromFile
 
@@ -810,61 +922,25 @@ def FExtractConnectedPixels(Filename):
     - extract the list of connected pixels from a file
     
     Param
-    - Filename : Name of the file containing the connected pixels from picmic
+    - Filename : Name of the file containing the connected pixels from picmic ( .txt list or .csv address table )
     
     Returns
         - Result: matrix containing the connected pixels
     
     29/07/2022 M.SPECHT CNRS/IN2P3/IPHC/C4PI
+    18/10/2026 : taken from the pixel index of PM0PG
     
     '''
     logger = logging.getLogger('pm0_emul')
-    BitMap = np.zeros(shape=(128,54),dtype=int)
-
-    try:
-        logger.info("Bitmap: {}".format(BitMap))    
-    except :
-        logger.error("bitmap not existing")
-            
-            
-    if (Filename.find('.csv')!= -1):
-        logger.info("File is csv type")
-        # Read the file
-        with open (Filename,'r') as f:
-            lines = f.readlines
-        logger.info("File {:s} opened ".format(Filename))
-        #file is csv file
-        for line in lines:
-            if line.find('D<')!= - 1:
-                #Dummy pixel
-                logger.debug("Dummy pixel !!") 
-            else :
-                #Connected pixel
-                extrLine = re.findall(r'\d+',line)
-                Col= int(extrLine[0],10)
-                Row=int(extrLine[1],10)
-                BitMap[Row,Col]=1
-                
-    elif (Filename.find('.txt') != -1):
-        logger.info("File is txt type")
-        # file is text file 
-        # Extract the pixels coords from lines
-        # Read the file
-        with open (Filename,'r') as InFile:
-            #                lines = f.readlines
-            #logger.info("File {:s} opened ".format(Filename))
-            for line in InFile:
-                extrLine = re.findall(r'\d+',line)
-                if extrLine != []:
-                    Col= int(extrLine[0],10)
-                    Row=int(extrLine[1],10)
-                    BitMap[Row,Col]=1
-                    #logger.info("extracted: col:{:d},Row{:d}".format(Col,Row))
-                #else:
-                    #logger.error("extracted data empty")
-                    
-    logger.info("BitMap: {}".format(BitMap))    
-    return BitMap
+    
+    PixIndex = PM0PG.FGetPixIndex(ConnectedFile = Filename)
+    
+    if PixIndex == None:
+        logger.error("Connected pixels not extracted from {}".format(Filename))
+        return np.zeros(shape=(128,54),dtype=int)
+    
+    logger.debug("{:d} connected pixels in {}".format(PixIndex.ConnectedNb, Filename))
+    return PixIndex.AConnected.astype(int)
 
         
 if __name__ == "__main__" :
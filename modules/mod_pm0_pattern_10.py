@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Module containing the generators of pulsing patterns : 128 x 54 bitmaps built in memory ( numpy int arrays, 1 => pulsed pixel )
+
+The patterns are composed by FPatUnion / FPatInter / FPatDiff, they are sent to the matrix without any file
+by PM0EMUL.FSetBitMap ( or HLF.FSetBitmapInPixMem ), and they can be exported in the text bitmap files format
+by FPatWriteFile.
+
+Example
+
+>>> import modules.mod_pm0_pattern_10 as PM0PAT
+>>> VBitMap = PM0PAT.FPatUnion ( PM0PAT.FPatRows ( [16] ), PM0PAT.FPatCols ( [10, 20] ) )
+>>> VBitMap = PM0PAT.FPatRandom ( 213, Seed = 1, Within = PM0PAT.FPatType ( PM0PAT.PM0PG.TPixType.RISING.value ) )
+>>> PM0EMUL.FSetBitMap ( 1, VBitMap, 0x80, 0x00, VRegOp, VPrePostOp, VPrePostParam )
+>>> PM0PAT.FPatWriteFile ( "Pulsing_Files/cfg_Rising_213.txt", VBitMap, "Rising, 213 random pixels, seed 1" )
+
+
+ Version V1.0
+
+ Versions list
+
+ V1.0 18/10/2026 : first implementation
+
+"""
+
+__version__ = '0.1.0'
+__date__ = "2026-10-18"
+
+
+# ===========================================================================
+# Modules import
+# ===========================================================================
+
+
+import logging
+
+import numpy as np
+
+import importlib
+import configparser    # for the ini file configuration retrieving
+
+# retrieve the modules names from the Modules.conf file
+config = configparser.ConfigParser(allow_no_value=True)
+config.read("modules/Modules.conf")
+
+
+PM0BM_Name = config['ModuleName']['bitmapFiles']
+PM0BM = importlib.import_module(PM0BM_Name, package=None)
+PM0PG_Name = config['ModuleName']['pixelGeometry']
+PM0PG = importlib.import_module(PM0PG_Name, package=None)
+
+
+# Pixel matrix size
+
+PIX_ROW_NB = 128
+PIX_COL_NB = 54
+
+
+
+def FPatEmpty ( ) :
+
+    '''
+    ...
+
+    Returns an empty pattern
+
+    '''
+
+    return ( np.zeros ( (PIX_ROW_NB, PIX_COL_NB), dtype = int ) )
+
+
+
+def FPatPixels ( APix ) :
+
+    '''
+    ...
+
+    Pattern of a list of pixels
+
+    Param
+    - APix  = List of (Row, Col), or one (Row, Col)
+
+    '''
+
+    VBitMap = FPatEmpty ()
+    VAPix   = np.array ( APix, dtype = int ).reshape ( -1, 2 )
+
+    VBitMap[VAPix[:, 0], VAPix[:, 1]] = 1
+
+    return (VBitMap)
+
+
+
+def FPatRows ( ARow ) :
+
+    '''
+    ...
+
+    Pattern of whole rows
+
+    Param
+    - ARow  = List of rows, or a slice, ex slice ( 0, 128, 4 ) => one row out of 4
+
+    '''
+
+    VBitMap = FPatEmpty ()
+
+    VBitMap[ARow, :] = 1
+
+    return (VBitMap)
+
+
+
+def FPatCols ( ACol ) :
+
+    '''
+    ...
+
+    Pattern of whole cols
+
+    Param
+    - ACol  = List of cols, or a slice
+
+    '''
+
+    VBitMap = FPatEmpty ()
+
+    VBitMap[:, ACol] = 1
+
+    return (VBitMap)
+
+
+
+def FPatChecker ( Size = 1, Phase = 0 ) :
+
+    '''
+    ...
+
+    Checkerboard pattern
+
+    Param
+    - Size   = Side of the squares in pixels
+    - Phase  = 0 => pixel (0, 0) is pulsed, 1 => complementary checkerboard
+
+    '''
+
+    VARow, VACol = np.indices ( (PIX_ROW_NB, PIX_COL_NB) )
+
+    return ( ((VARow // Size + VACol // Size + Phase + 1) % 2).astype ( int ) )
+
+
+
+def FPatRandom ( Nb, Seed = None, Within = None, Connected = 1 ) :
+
+    '''
+    ...
+
+    Pattern of Nb pixels drawn at random, the same Seed gives the same pattern
+
+    Param
+    - Nb         = Number of pixels, limited to the number of candidate pixels
+    - Seed       = Seed of the random generator, None => different at each call
+    - Within     = None or a pattern, the pixels are drawn among its pixels
+    - Connected  = 1 => the pixels are drawn among the connected pixels only
+
+    '''
+
+    logger = logging.getLogger('pm0_emul')
+
+    VACand = np.ones ( (PIX_ROW_NB, PIX_COL_NB), dtype = bool )
+
+    if ( Within is not None ):
+        VACand &= (np.asarray ( Within ) != 0)
+
+    if ( Connected == 1 ):
+        VIndex = PM0PG.FGetPixIndex ()
+        if ( VIndex != None ):
+            VACand &= VIndex.AConnected
+
+    VAPix = np.argwhere ( VACand )
+
+    if ( Nb > len ( VAPix ) ):
+        logger.warning ( "{:d} random pixels asked, only {:d} candidates".format (Nb, len ( VAPix )) )
+        Nb = len ( VAPix )
+
+    VRng    = np.random.default_rng ( Seed )
+    VBitMap = FPatEmpty ()
+
+    VAPix = VAPix[VRng.choice ( len ( VAPix ), Nb, replace = False )]
+    VBitMap[VAPix[:, 0], VAPix[:, 1]] = 1
+
+    return (VBitMap)
+
+
+
+def FPatType ( Type, WayBeg = 0, WayNb = None ) :
+
+    '''
+    ...
+
+    Pattern of the pixels of one type ( address table ), optionally a range of its ways no
+
+    Param
+    - Type    = PM0PG.TPixType value
+    - WayBeg  = First way no
+    - WayNb   = Number of ways no from WayBeg, None => up to the last one
+
+    '''
+
+    VBitMap = FPatEmpty ()
+    VIndex  = PM0PG.FGetPixIndex ()
+
+    if ( VIndex == None ):
+        return (VBitMap)
+
+    VASel = (VIndex.AType == Type)
+
+    if ( Type != PM0PG.TPixType.DUMMY.value ):
+        VASel &= (VIndex.AWayNo >= WayBeg)
+        if ( WayNb != None ):
+            VASel &= (VIndex.AWayNo < WayBeg + WayNb)
+
+    VBitMap[VASel] = 1
+
+    return (VBitMap)
+
+
+
+def FPatUnion ( *ABitMap ) :
+
+    '''
+    ...
+
+    Pixels pulsed in at least one of the patterns
+
+    '''
+
+    VBitMap = FPatEmpty ()
+
+    for VPat in ABitMap :
+        VBitMap |= (np.asarray ( VPat ) != 0)
+
+    return (VBitMap)
+
+
+
+def FPatInter ( *ABitMap ) :
+
+    '''
+    ...
+
+    Pixels pulsed in all the patterns
+
+    '''
+
+    VBitMap = np.ones ( (PIX_ROW_NB, PIX_COL_NB), dtype = int )
+
+    for VPat in ABitMap :
+        VBitMap &= (np.asarray ( VPat ) != 0)
+
+    return (VBitMap)
+
+
+
+def FPatDiff ( BitMap, *ABitMap ) :
+
+    '''
+    ...
+
+    Pixels of BitMap which are not pulsed in the other patterns
+
+    '''
+
+    return ( FPatInter ( BitMap, 1 - FPatUnion ( *ABitMap ) ) )
+
+
+
+def FPatWriteFile ( FileName, BitMap, Comments = "" ) :
+
+    '''
+    ...
+
+    Exports a pattern in the text bitmap files format, see PM0BM.FWriteBitmapTextFile
+
+    The hits nb and the list of the pulsed pixels are added to the comments, as done by Pulsing_Files/genFiles.py
+
+    Returns
+    - An error code, 0 => OK, -1 => I/O error
+
+    '''
+
+    VAPix = np.argwhere ( np.asarray ( BitMap ) != 0 )
+
+    VComments = Comments + ("\n" if Comments != "" else "")
+    VComments = VComments + "{:d} hits\n".format (len ( VAPix ))
+    VComments = VComments + "".join ( ["({:d},{:d})".format (VRow, VCol) for VRow, VCol in VAPix] )
+
+    return ( PM0BM.FWriteBitmapTextFile ( FileName, BitMap, VComments ) )
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Module containing the index of the PICMIC pixels geometry : connected / dummy pixels and type of each pixel
+
+Sources
+- picmic_adress_table.csv : X ( col ) ; Y ( row ) ; X*128+Y ; type<way no>, type = D ( Dummy ), R ( Rising ), B ( Bending ), Y ( HorYsontal )
+- ROnb_xyp1.txt : list of the connected pixels, one ("I_<col>_<row>" "<type><way no>") per line
+
+The index is built once from the two files, then kept in memory and in a numpy file ( PIX_INDEX_CACHE_FILE ),
+it is rebuilt when one of the source files is modified.
+The lookups are array accesses and the bitmaps are masked in one numpy operation.
+
+Example
+
+>>> from modules.mod_pm0_pixgeom_10 import FGetPixIndex, TPixType
+>>> VIndex = FGetPixIndex ()
+>>> VIndex.FIsConnected ( 10, 1 )
+>>> VIndex.FGetType ( 10, 1 ) == TPixType.HORYSONTAL.value
+>>> VBitMap, VADummy = VIndex.FMaskBitmap ( VBitMap )
+
+
+ Version V1.0
+
+ Versions list
+
+ V1.0 18/10/2026 : first implementation
+
+"""
+
+__version__ = '0.1.0'
+__date__ = "2026-10-18"
+
+
+# ===========================================================================
+# Modules import
+# ===========================================================================
+
+
+import logging
+import os
+import sys
+import re
+import threading
+
+from enum import Enum, unique
+
+import numpy as np
+
+
+# Pixel matrix size
+
+PIX_ROW_NB = 128
+PIX_COL_NB = 54
+
+# Default source files and cache file
+
+PIX_ADDR_TABLE_FILE  = "picmic_adress_table.csv"
+PIX_CONNECTED_FILE   = "ROnb_xyp1.txt"
+PIX_INDEX_CACHE_FILE = "picmic_pix_index.npz"
+
+
+@unique
+class TPixType (Enum) :
+
+    DUMMY      = 0 # Not connected
+    RISING     = 1
+    BENDING    = 2
+    HORYSONTAL = 3
+
+    NB         = 4 # Types nb
+
+
+# Type letter of the address table => TPixType value
+
+VGDPixTypeLetter = { "D" : TPixType.DUMMY.value, "R" : TPixType.RISING.value, "B" : TPixType.BENDING.value, "Y" : TPixType.HORYSONTAL.value }
+
+VGPixIndex     = None             # Index of FGetPixIndex
+VGPixIndexLock = threading.Lock ()
+
+
+
+class Picmic_PixIndex () :
+
+    '''
+    ...
+
+    Index of the pixels geometry
+
+    - AConnected = bool 128 x 54 array, True => connected pixel
+    - AType      = int8 128 x 54 array, TPixType value of each pixel
+    - AWayNo     = int16 128 x 54 array, way no of the pixel in its type, -1 for the dummy pixels
+
+    '''
+
+    def __init__ ( self, AConnected, AType, AWayNo ) :
+        self.AConnected = AConnected
+        self.AType      = AType
+        self.AWayNo     = AWayNo
+        self.ConnectedNb = int ( np.count_nonzero ( AConnected ) )
+
+
+    def FIsConnected ( self, Row, Col ) :
+        return ( bool ( self.AConnected[Row, Col] ) )
+
+
+    def FGetType ( self, Row, Col ) :
+        return ( int ( self.AType[Row, Col] ) )
+
+
+    def FGetWayNo ( self, Row, Col ) :
+        return ( int ( self.AWayNo[Row, Col] ) )
+
+
+    def FGetPixelsOfType ( self, Type ) :
+
+        '''
+        ...
+
+        Returns the (Row, Col) array of the pixels of one type ( TPixType value )
+
+        '''
+
+        return ( np.argwhere ( self.AType == Type ) )
+
+
+    def FMaskBitmap ( self, BitMap ) :
+
+        '''
+        ...
+
+        Removes the dummy pixels from a bitmap
+
+        Param
+        - BitMap  = 128 x 54 array, modified in place
+
+        Returns
+        - BitMap = the bitmap with the dummy pixels at 0
+        - ADummy = (Row, Col) array of the dummy pixels which were set in the bitmap
+
+        '''
+
+        VADummy = np.argwhere ( (BitMap != 0) & ~self.AConnected )
+
+        BitMap[~self.AConnected] = 0
+
+        return (BitMap, VADummy)
+
+
+
+def FBuildPixIndex ( AddrTableFile = PIX_ADDR_TABLE_FILE, ConnectedFile = PIX_CONNECTED_FILE ) :
+
+    '''
+    ...
+
+    Builds the index from the source files
+
+    The connected pixels are the ones of ConnectedFile, the types and ways no are the ones of AddrTableFile.
+    If AddrTableFile can't be read, the connected pixels get TPixType.NB ( unknown type ).
+
+    Param
+    - AddrTableFile  = Name of the address table csv file
+    - ConnectedFile  = Name of the connected pixels file ( .txt, or .csv with the address table format )
+
+    Returns
+    - An error code, 0 => OK, -1 => ConnectedFile I/O error
+    - The index ( Picmic_PixIndex ), None on error
+
+    '''
+
+    logger = logging.getLogger('pm0_emul')
+
+    VAConnected = np.zeros ( (PIX_ROW_NB, PIX_COL_NB), dtype = bool )
+    VAType      = np.full  ( (PIX_ROW_NB, PIX_COL_NB), TPixType.NB.value, dtype = np.int8 )
+    VAWayNo     = np.full  ( (PIX_ROW_NB, PIX_COL_NB), -1, dtype = np.int16 )
+
+    # Address table : X ; Y ; X*128+Y ; type<way no>
+
+    try :
+        with open ( AddrTableFile, "r" ) as VFile :
+            VAEntry = re.findall ( r'^\s*(\d+);(\d+);\d+;([DRBY])<(\d+)>', VFile.read (), re.M )
+
+        VACol   = np.array ( [int ( VEntry[0] ) for VEntry in VAEntry], dtype = int )
+        VARow   = np.array ( [int ( VEntry[1] ) for VEntry in VAEntry], dtype = int )
+        VATyp   = np.array ( [VGDPixTypeLetter[VEntry[2]] for VEntry in VAEntry], dtype = np.int8 )
+        VAWay   = np.array ( [int ( VEntry[3] ) for VEntry in VAEntry], dtype = np.int16 )
+        VAIn    = (VARow < PIX_ROW_NB) & (VACol < PIX_COL_NB)
+
+        VAType[VARow[VAIn], VACol[VAIn]]  = VATyp[VAIn]
+        VAWayNo[VARow[VAIn], VACol[VAIn]] = np.where ( VATyp[VAIn] == TPixType.DUMMY.value, -1, VAWay[VAIn] )
+
+    except IOError as e :
+        logger.warning ( "Address table {} not read, I/O error({}): {} => pixels types unknown".format (AddrTableFile, e.errno, e.strerror) )
+
+    # Connected pixels : first number = col, second = row
+
+    try :
+        with open ( ConnectedFile, "r" ) as VFile :
+            VText = VFile.read ()
+
+    except IOError as e :
+        logger.error ( "I/O error({0}): {1}".format (e.errno, e.strerror) )
+        return (-1, None)
+
+    if ( ConnectedFile.find ( '.csv' ) != -1 ):
+        VAEntry = [(VEntry[0], VEntry[1]) for VEntry in re.findall ( r'^\s*(\d+);(\d+);\d+;([RBY])<', VText, re.M )]
+    else :
+        VAEntry = re.findall ( r'^\D*(\d+)\D+(\d+)', VText, re.M )
+
+    VACol = np.array ( [int ( VEntry[0] ) for VEntry in VAEntry], dtype = int )
+    VARow = np.array ( [int ( VEntry[1] ) for VEntry in VAEntry], dtype = int )
+    VAIn  = (VARow < PIX_ROW_NB) & (VACol < PIX_COL_NB)
+
+    if ( not VAIn.all () ):
+        logger.warning ( "{:d} pixels out of the matrix ignored in {}".format (int ( np.count_nonzero ( ~VAIn ) ), ConnectedFile) )
+
+    VAConnected[VARow[VAIn], VACol[VAIn]] = True
+
+    # Both sources must agree, the connected pixels list is the reference
+
+    VAUnknown = (VAType == TPixType.NB.value)
+    VADiffNb  = int ( np.count_nonzero ( VAConnected != ((VAType != TPixType.DUMMY.value) & ~VAUnknown) ) )
+
+    if ( (VADiffNb > 0) and (not VAUnknown.all ()) ):
+        logger.warning ( "{:d} pixels connected in {} and dummy in {} or reverse".format (VADiffNb, ConnectedFile, AddrTableFile) )
+
+    VAType[~VAConnected]  = TPixType.DUMMY.value
+    VAWayNo[~VAConnected] = -1
+
+    return (0, Picmic_PixIndex ( VAConnected, VAType, VAWayNo ))
+
+
+
+def FGetSourcesKey ( AFileName ) :
+
+    '''
+    ...
+
+    Returns the key of the source files : "name:mtime_ns:size" of each file, "name:-1:-1" if it doesn't exist
+
+    '''
+
+    VAKey = []
+
+    for VFileName in AFileName :
+        try :
+            VStat = os.stat ( VFileName )
+            VAKey.append ( "{}:{:d}:{:d}".format (os.path.abspath ( VFileName ), VStat.st_mtime_ns, VStat.st_size) )
+        except OSError :
+            VAKey.append ( "{}:-1:-1".format (os.path.abspath ( VFileName )) )
+
+    return ( "|".join ( VAKey ) )
+
+
+
+def FGetPixIndex ( AddrTableFile = PIX_ADDR_TABLE_FILE, ConnectedFile = PIX_CONNECTED_FILE, CacheFile = PIX_INDEX_CACHE_FILE ) :
+
+    '''
+    ...
+
+    Returns the index of the pixels geometry : from memory, else from CacheFile, else built from the source files
+
+    The index is rebuilt if a source file has been modified since the cache was written.
+
+    Param
+    - AddrTableFile  = See FBuildPixIndex
+    - ConnectedFile  = See FBuildPixIndex
+    - CacheFile      = Name of the numpy cache file, None => no file cache
+
+    Returns
+    - The index ( Picmic_PixIndex ), None if it can't be built
+
+    '''
+
+    global VGPixIndex
+
+    logger = logging.getLogger('pm0_emul')
+
+    VKey = FGetSourcesKey ( [AddrTableFile, ConnectedFile] )
+
+    with VGPixIndexLock :
+
+        if ( (VGPixIndex != None) and (VGPixIndex[0] == VKey) ):
+            return (VGPixIndex[1])
+
+        VIndex = None
+
+        # Numpy cache file
+
+        if ( (CacheFile != None) and os.path.isfile ( CacheFile ) ):
+            try :
+                with np.load ( CacheFile ) as VDArray :
+                    if ( str ( VDArray["Key"] ) == VKey ):
+                        VIndex = Picmic_PixIndex ( VDArray["AConnected"], VDArray["AType"], VDArray["AWayNo"] )
+            except :
+                logger.warning ( "Pixel index cache {} not read:{}".format (CacheFile, sys.exc_info()[1]) )
+
+        # Source files
+
+        if ( VIndex == None ):
+            VRet, VIndex = FBuildPixIndex ( AddrTableFile, ConnectedFile )
+
+            if ( VRet < 0 ):
+                return (None)
+
+            logger.info ( "Pixel index built from {} and {} : {:d} connected pixels".format (AddrTableFile, ConnectedFile, VIndex.ConnectedNb) )
+
+            if ( CacheFile != None ):
+                try :
+                    with open ( CacheFile, "wb" ) as VFile :
+                        np.savez ( VFile, Key = np.array ( VKey ), AConnected = VIndex.AConnected, AType = VIndex.AType, AWayNo = VIndex.AWayNo )
+                except :
+                    logger.warning ( "Pixel index cache {} not written:{}".format (CacheFile, sys.exc_info()[1]) )
+
+        VGPixIndex = (VKey, VIndex)
+
+    return (VIndex)
@@ -28,6 +28,29 @@ It is mainly code conversion from C PICMIC 0 slow control library => X:\lib\com\
 16/05/2023 V25 MS
 - added the possibility to save the sent registers in a file
 
+18/10/2026 V25
+- added the FCmdSetWrRegBatch function : several registers writes packed in one WR_REG_BATCH frame
+- added the commands pipeline : up to VGCmdWindowSz commands in flight, FSubmitCmd / FWaitCmd, answers matched in sending order,
+  after a timeout the late answers are dropped until the link is silent ( PIPE_RESYNC_QUIET_S )
+- added the registers shadow ( Picmic_RegShadow ) : writes of values already in PICMIC are skipped if enabled by FEnableRegShadow
+- the registers saving file is written by a background thread ( Picmic_RegJournal ), optional binary format
+- answers are read by a reader thread, the callers wait on an event with a deadline
+- added commands metrics ( Picmic_CmdMetrics ) : latency percentiles per command, throughput, errors, see FPrintCmdMetrics
+- FConnect ( "EMUL" ) connects to a virtual DUE + PICMIC ( mod_pm0_due_emul_XX ) to run without hardware
+- added a raw serial transport ( Picmic_RawSerialBoard ) selected by FConnect RawSerial param or FEnableRawSerial
+- added sessions ( Picmic_ScSession ) : one connection per DUE board, bound to a thread, to configure several chips at the same time
+- added the deferred verification ( Picmic_RegVerifier ) : CHK writes sent as HW writes, verified once by FVerifyDeferred
+- added FReplayRegsSavingFile : registers journal file compiled once ( contiguous addresses merged, cached by file hash ) and sent in pipeline
+- added the writes coalescing ( Picmic_WrCoalescer ) : FCmdWrOneReg writes of adjacent addresses merged, sent by FFlushWrOneReg or before any other command
+- the connection and answers state belong to the default session VGDefSession ( VGAArdAns, VGArdAnsReady, VGTimeBeg removed ),
+  the FCmd... functions are serialized by the session lock ( FSessionLocked ) => they can be called from several threads
+- added the FConVectMidi7bTo8bV3 and FConVect8bToMidi7bV2 functions : 7 / 8 bits conversion by translation tables, used by FBuildCmdFrame and answers handling ( V1 kept for the short answers )
+- added the pixels shadow ( Picmic_RegShadow.APix ) and FWrPixelMatrix : only the pixels which differ from the shadow are written ( shadow enabled ), or full refresh if cheaper
+- added FPlanPixelMatrix : pixels writes planned with matrix / row / col broadcasts of the majority values, used by FWrPixelMatrix
+- added FWrPixels : list of pixels writes ordered by col / row, the selection registers are written only when they change
+- added FRdPixelMatrix : readback of the whole matrix or of a subset in pipeline, with the mismatch map against an expected configuration
+- added FComposePixCfg / FSetPixCfgLayer / FDecomposePixCfg : pixels configuration matrix built from 128 x 54 fields planes ( numpy bits operations )
+
 Can be loaded as a module under python interpreter and used in interactive mode
 python
 >>> import module
@@ -53,6 +76,16 @@ __date__ = "2023-05-17"
 
 
 import sys
+import collections
+import threading
+import queue
+import struct
+import atexit
+import math
+import hashlib
+import functools
+import importlib
+import configparser    # for the ini file configuration retrieving
 
 from enum import Enum, unique
 
@@ -61,6 +94,8 @@ import time
 
 #import ctypes as ct
 import pyfirmata 
+import serial
+import numpy as np
 
 import logging
 
@@ -150,8 +185,9 @@ class TCmd (Enum) :
     DEACTIVATE_OUTPUTS = 10 # 29/09/22 MS Deactivate all outputs' I2C and steering)
     WR_REG_LOW_LEVEL  = 11 # 17/05/2023 MS Writes one register value with its address Low level function
     RD_REG_LOW_LEVEL  = 12 # 17/05/2023 MS Reads one register value with its address Low level function */
+    WR_REG_BATCH      = 13 # Writes a list of registers packed in one frame, returns one status per register
 
-    CMD_NB      = 13 # Cmd number
+    CMD_NB      = 14 # Cmd number
 
 
 
@@ -226,6 +262,22 @@ class TDefOp (Enum) :
     NB  = 3   # Operations number   
 
 
+#----------------------------------------------
+# Pixel matrix write mode of FWrPixelMatrix
+#
+#----------------------------------------------
+
+
+@unique
+class TPixWrMode (Enum) :
+
+    DIFF = 0   # Only the pixels <> pixels shadow are written, full refresh if it needs less writes
+    FULL = 1   # Full refresh : broadcasts ( matrix / rows / cols ) of the majority values, then the other pixels
+    ALL  = 2   # All the pixels are written one by one
+    
+    NB  = 3   # Modes number   
+
+
 #----------------------------------------------
 # USB errors list
 #
@@ -257,6 +309,70 @@ MAX_FIRMATA_CMD_BUFF_SZ = 60
 
 MAX_CMD_BUFF_SZ = MAX_FIRMATA_CMD_BUFF_SZ # Firmata max cmd buff sz
 
+# Size of the header of a WR_REG_BATCH frame : RegOp, PrePostOp, PrePostParam, registers nb
+
+WR_REG_BATCH_HEADER_SZ = 4
+
+# Maximum number of W8 of a WR_REG_LOW_LEVEL command : RetSz W8 x 2, RegAddr, RegOp, PrePostOp, PrePostParam, DataSz
+
+WR_REG_LOW_LEVEL_MAX_W8_NB = MAX_CMD_BUFF_SZ - 7
+
+# Size of the DUE serial reception buffer ( SERIAL_BUFFER_SIZE of Arduino DUE core )
+# The pipeline never has more bytes in flight than this size => no overflow on DUE side
+
+DUE_RX_BUFF_SZ = 128
+
+# Firmata frame overhead in bytes : START_SYSEX, CmdId, END_SYSEX
+
+FIRMATA_FRAME_OVERHEAD_SZ = 3
+
+# Read timeout of the serial port used by the reader thread, only used to check if the thread must stop
+
+SERIAL_READER_POLL_S = 0.1
+
+# After a DUE timeout, the answers are thrown away until the link has been silent during this time,
+# the late answers of the failed commands can't be matched to the next commands ( answers have no sequence tag )
+
+PIPE_RESYNC_QUIET_S = 0.2
+
+# Raw serial transport ( see Picmic_RawSerialBoard ) : baud rate ( pyfirmata default ), DUE auto-reset wait,
+# firmware query timeout, buffers sizes ( a frame is at most START_SYSEX, Cmd, 2 * MAX_CMD_BUFF_SZ, END_SYSEX )
+
+RAW_SERIAL_BAUD_RATE       = 57600
+RAW_SERIAL_SETUP_WAIT_S    = 5
+RAW_SERIAL_QUERY_TIMEOUT_S = 1.0
+RAW_SERIAL_TX_BUFF_SZ      = 2 * MAX_CMD_BUFF_SZ + FIRMATA_FRAME_OVERHEAD_SZ
+RAW_SERIAL_RX_BUFF_SZ      = 4096
+
+# Number of bins of the commands latency histograms, bin k = [2^k, 2^(k+1)[ us, last bin = 2^24 us = 16.8 s and more
+
+METRICS_HISTO_BIN_NB = 25
+
+# First bytes of a registers journal file in binary format
+
+REG_JOURNAL_BIN_MAGIC = b"PM0RJ1"
+
+# Number of compiled registers journal files kept in VGDRegReplayCache
+
+REG_REPLAY_CACHE_NB = 16
+
+# Pixel matrix size and pixel config row / col registers special values
+
+PIX_ROW_NB   = 128
+PIX_COL_NB   = 54
+PIX_ROW_ALL  = 0x80 # All rows selected
+PIX_COL_ALL  = 0x40 # All cols selected
+PIX_COL_NONE = 0x80 # No col selected
+
+# Pixel config data fields, same layout as TRegCfgDataBits of mod_pm0_reg_typ_10 : name => (lsb, bits nb)
+
+VGDPixCfgField = collections.OrderedDict ( [ ("I_Adj",          (0, 3)), # Current adjust ( trim )
+                                             ("ENA_CM",         (3, 1)),
+                                             ("SW0",            (4, 1)),
+                                             ("SW1",            (5, 1)),
+                                             ("ENA_CC",         (6, 1)),
+                                             ("ActivateVpulse", (7, 1)) ] ) # Pulse enable
+
 
 
 
@@ -322,25 +438,8 @@ VGRegDef = [
 # ===========================================================================
 
 
-# Arduino DUE answer data to a request
-#
-# 27/12/2021 G.CLAUS CNRS/IN2P3/IPHC/C4PI
-
-VGAArdAns = []
-
-
-# Flag to indicates if Arduino DUE answer data to a request is ready or not
-#
-# 27/12/2021 G.CLAUS CNRS/IN2P3/IPHC/C4PI
-
-
-VGArdAnsReady = 0
-
-# Time of beginning of a request to I2C controller 
-#
-# XX/12/2021 G.CLAUS CNRS/IN2P3/IPHC/C4PI
-
-VGTimeBeg = 0
+# 18/10/2026 : The Arduino DUE answer data, answer ready flag and request beginning time ( VGAArdAns,
+# VGArdAnsReady, VGTimeBeg ) are now kept by the commands tickets and by the session ( Picmic_ScSession )
 
 
 # Memory image of registers to be written to PICMIC, initialized to 0
@@ -365,6 +464,30 @@ VGPrePostParam = TPrePostOp.NONE.value
 VGRegSaveToFile = 1
 VGFileToSaveRegs = "I2C_Regs_Picmic.txt"
 
+# Flag to enable the WR_REG_BATCH command, the DUE firmware must handle it
+# If 0, FCmdSetWrRegBatch sends one SET_WR_REG command per register
+
+VGWrRegBatchEnabled = 0
+
+# Commands pipeline ( see Picmic_CmdPipeline ) created by FConnect
+# VGCmdWindowSz = maximum number of commands sent to DUE and waiting for their answer, 1 => no pipelining
+# VGCmdTimeoutS = maximum time to wait for the answer of a command
+# VGCmdReaderThread = 1 => answers are read by a reader thread, 0 => by the caller waiting for its answer
+
+VGPipe        = None
+VGCmdWindowSz = 4
+VGCmdTimeoutS = 2.0
+VGCmdReaderThread = 1
+
+# Transport used by FConnect if its RawSerial param is None : 0 => pyfirmata, 1 => Picmic_RawSerialBoard, see FEnableRawSerial
+
+VGRawSerial = 0
+
+# Session ( see Picmic_ScSession ) bound to each thread, VGThreadSession.Session
+# No session bound => the FCmd... functions use the default session VGDefSession ( VGPipe / VGRegShadow / VGRegVerifier / VGWrCoalescer / VGCmdMetrics )
+
+VGThreadSession = threading.local ()
+
 
 # ===========================================================================
 # Functions  
@@ -549,302 +672,3485 @@ def FConVect8bToMidi7b ( Src, Print ):
     return VAW8
    
   
-             
-def FConvU8ToS8 ( SrcU8 ) :
+  
+# Translation tables of the V3 / V2 codecs, built once
+
+VGTabW8ToMidiLow  = bytes ( [VW8 & 0x7F for VW8 in range ( 256 )] )         # 8 bits => low 7 bits
+VGTabW8ToMidiHigh = bytes ( [(VW8 & 0x80) >> 7 for VW8 in range ( 256 )] )  # 8 bits => high bit in bit 0
+VGTabMidiHighToW8 = bytes ( [(VW8 & 0x01) << 7 for VW8 in range ( 256 )] )  # High bit in bit 0 => bit 7
+
+# Up to this W8 nb, the V1 loop decodes faster than the V3 translation tables ( see Picmic_SC_codec_bench.py )
+
+MIDI_DEC_V1_W8_NB_MAX = 12
+
+
+
+def FConVectMidi7bTo8bV3 ( Src, Print ):
 
     '''
     ...
     
-    Convert an unsigend byte to a signed byte
+    Convert a Firmata/midi 7 bits list in 8 bits list
+    
+    Version V3 works on bytes : the 7 bits pairs are split by slicing, converted by translation tables
+    and merged as big integers => no loop in python, short sources ( <= MIDI_DEC_V1_W8_NB_MAX W8 ) are converted by V1
     
     Param
-    - SrcU8          =  Source unsigned byte
+    - Src   =  Source to convert, list / tuple of int, bytes, bytearray or memoryview
+    - Print = 0 => No print / 1 => Prints conversion time
     
     Returns
-    - Signed byte corresponding to SrcU8
-
-    XX/12/2021 G.CLAUS CNRS/IN2P3/IPHC/C4PI    
+    - List of 8 bits words
 
     '''
 
-    if ( SrcU8 > 127 ):
-        return (255 - SrcU8 + 1) * -1
-        
-    return ( SrcU8 )    
+    VW8Nb = len ( Src ) // 2
     
+    # Short answers ( status + few W8 ) => the tables setup costs more than the V1 loop
+    
+    if ( VW8Nb <= MIDI_DEC_V1_W8_NB_MAX ):
+        return ( FConVectMidi7bTo8bV1 ( Src, Print ) )
+    
+    if ( Print ):    
+        v_time_beg = time.perf_counter ()    
+    
+    VSrc  = bytes ( Src )
+    VLow  = VSrc[0:2*VW8Nb:2].translate ( VGTabW8ToMidiLow )
+    VHigh = VSrc[1:2*VW8Nb:2].translate ( VGTabMidiHighToW8 )
+    VAW8  = list ( (int.from_bytes ( VLow, "little" ) | int.from_bytes ( VHigh, "little" )).to_bytes ( VW8Nb, "little" ) )
 
+    if ( Print ):
+        v_time_end = time.perf_counter ()
+        v_time_s   = v_time_end - v_time_beg
+        print ( "" )
+        print ( "exec time = {:.6f} s".format (v_time_s) )
+        print ( "" )
+       
+    return VAW8
+    
+    
 
-
-
-def FResetPixelMatrix(ResetValue, VRegOp, VPrePostOp, VPrePostParam):
+def FConVect8bToMidi7bV2 ( Src, Print ):
 
     '''
     ...
     
-    Reset all the pixel memories
+    Convert a 8 bits list in Firmata/midi 7 bits bytearray, ready to be sent by send_sysex
+    
+    Version V2 works on bytes with translation tables and slices assignment => no loop in python, no debug log
     
     Param
-    - ResetValue     =  Value to be set to all the pixel registers
-    - VRegOp         =  Register operation mode
-    - VPrePostOp     = Pre/post operatiion mode
-    - VPrePostParam  = Pre/post operation param
+    - Src   =  Source to convert, list / tuple of int < 256, bytes, bytearray or memoryview
+    - Print = 0 => No print / 1 => Prints conversion time
     
     Returns
-    - An error code, 0 => OK, < 0 => error
-
-    03/08/2022 M.SPECHT CNRS/IN2P3/IPHC/C4PI    
+    - Bytearray of 7 bits words, 2 per source W8 : bits 6-0, bit 7
 
     '''
-    logger = logging.getLogger('pm0_sc')
-    # reset the matrix
-    # write col value : select all columns
-    VErr = FCmdSetWrReg ( TRegId.CONF_COL.value, VRegOp, VPrePostOp, VPrePostParam, [64] )
-    VStatus = "Reset Matrix Select all col, Reg op = {:s} - Write error = {:d}".format (VGStrRegOp[VRegOp], VErr)
-    if VErr >= 0:
-        logger.debug(VStatus)
-    else:
-        logger.error(VStatus)
-    # write row value : select all rows
-    VErr = FCmdSetWrReg ( TRegId.PIX_CONF_ROW.value, VRegOp, VPrePostOp, VPrePostParam, [128] )
-    VStatus = "Reset Matrix select all Row, Reg op = {:s} - Write error = {:d}".format (VGStrRegOp[VRegOp], VErr)
-    if VErr >= 0:
-        logger.debug(VStatus)
-    else:
-        logger.error(VStatus)
-    # Set data to pixel : MSB at 1
-    VErr = FCmdSetWrReg ( TRegId.CONF_DATA.value, VRegOp, VPrePostOp, VPrePostParam, [ResetValue] )
-    VStatus = "Reset Matrix set pixel data to 0, Reg op = {:s} - Write error = {:d}".format (VGStrRegOp[VRegOp], VErr)
-    if VErr >= 0:
-        logger.debug(VStatus)
-    else:
-        logger.error(VStatus)
-    # write col value : unselect all columns
-    VErr = FCmdSetWrReg ( TRegId.CONF_COL.value, VRegOp, VPrePostOp, VPrePostParam, [128] )
-    VStatus = "after Reset Matrix unselect all col, Reg op = {:s} - Write error = {:d}".format (VGStrRegOp[VRegOp], VErr)
-    if VErr >= 0:
-        logger.debug(VStatus)
-    else:
-        logger.error(VStatus)
-
-    return VErr
-
 
+    if ( Print ):        
+        v_time_beg = time.perf_counter ()    
 
+    VSrc = bytes ( Src )
+    
+    VAW7 = bytearray ( 2 * len ( VSrc ) )
+    VAW7[0::2] = VSrc.translate ( VGTabW8ToMidiLow )
+    VAW7[1::2] = VSrc.translate ( VGTabW8ToMidiHigh )
 
+    if ( Print ):
+        v_time_end = time.perf_counter ()
+        v_time_s   = v_time_end - v_time_beg
+        print ( "" )
+        print ( "exec time = {:.6f} s".format (v_time_s) )
+        print ( "" )
+       
+    return VAW7
+   
   
-def FSendCmd ( CmdId, CmdADataW8, CmdRetADataW8Sz ) :
+  
+           
+def FConvU8ToS8 ( SrcU8 ) :
 
     '''
     ...
     
-    Sents a command to Arduino
+    Convert an unsigend byte to a signed byte
     
     Param
-    - CmdId           =  No of the command
-    - CmdADataW8      =  The command data as an array of W8
-    - CmdRetADataW8Sz =  Number of W8 returned by function in case it returns an array
+    - SrcU8          =  Source unsigned byte
     
     Returns
-    - An error code, 0 if ok
-    - An optionnal array of results
-    
-    26/12/2021 G.CLAUS CNRS/IN2P3/IPHC/C4PI  
-    
+    - Signed byte corresponding to SrcU8
+
+    XX/12/2021 G.CLAUS CNRS/IN2P3/IPHC/C4PI    
+
     '''
+
+    if ( SrcU8 > 127 ):
+        return (255 - SrcU8 + 1) * -1
+        
+    return ( SrcU8 )    
     
-    VRet = 0
-    logger = logging.getLogger('pm0_sc')
-    
-    global  VGBoard
-    global  VGBuffW8Sz
-    global  VGTimeBeg
-    global  VGArdAnsReady
-    global  VGAArdAns
-    
-    # Save i2c orders to to file
-    if (VGRegSaveToFile != 0):
-        try :
-            # Saving to file
-            with open(VGFileToSaveRegs, 'a') as Regsfile:
-                # Reg Id = first data [RegId, RegOp,PrePostOp,PrePostParam, VRegSz]
-                VRegAddress = VGARegAddr[CmdADataW8[0]]
-                VRegNb = len ( CmdADataW8 ) - 5
-                for VIndex in range (VRegNb):
-                    # write all registers values
-                    VStringToAppend = "{:d},{:d}\n".format(VRegAddress + VIndex,CmdADataW8[5+VIndex])
-                    Regsfile.write(VStringToAppend)
-        except IOError as e:
-            print ("I/O error({0}): {1}".format(e.errno, e.strerror))
-            logger.error("I/O error({0}): {1}".format(e.errno, e.strerror))
-        except: #handle other exceptions such as attribute errors
-            #print ("Unexpected error:", sys.exc_info()[0])
-            logger.error ("Unexpected error")
-            pass
-    
-    
-    VGTimeBeg = time.perf_counter ()
-    
-    
-    VCmdToArduinoSz = len ( CmdADataW8 ) + 2 # + 2 for W[0],W[1] = CmdRetADataW8Sz, now 27/12/2021, only W[0] is used
+
+
+
+
+def FSessionLocked ( Funct ) :
+
+    '''
+    ...
     
+    Decorator of the functions sending commands : the function is executed with the lock of the session
+    ( see FGetSession ) => the commands sequences of several threads using the same session are not mixed
+    The lock is reentrant, a locked function can call other locked functions
     
-       
-    # Check size of buffer the Arduino must send back
+    '''
     
-    if ( CmdRetADataW8Sz > MAX_CMD_BUFF_SZ ):
-        print ( "Abort : Arduino returned buff sz {:d} > Max = {:d}".format (CmdRetADataW8Sz, MAX_CMD_BUFF_SZ)  )
-        return (-1)
+    @functools.wraps ( Funct )
+    def FLocked ( *Args, **KwArgs ) :
+        with FGetSession ().Lock :
+            return ( Funct ( *Args, **KwArgs ) )
+            
+    return (FLocked)
 
-    
-    # Check size of buffer to send to Arduino
- 
-    if ( VCmdToArduinoSz > MAX_CMD_BUFF_SZ ):
-        print ( "Abort : Arduino received buff sz {:d} > Max = {:d}".format (VCmdToArduinoSz, MAX_CMD_BUFF_SZ)  )
-        return (-1)
- 
- 
-    # Calculates total size of buffers : sent + received
 
-    VGBuffW8Sz = VCmdToArduinoSz + CmdRetADataW8Sz + 1 # + 1 because RetAData contains also status code
- 
-    # Build buffer to Arduino
-   
-    # Format of W8 buffer sent to Arduino
-    # W[0],W[1] = CmdRetADataW8Sz, size of array the Arduino must return, it can be 0, now 27/12/2021, only W[0] is used
-    # W[2], W[3], ... = CmdADataW8
 
-   
-    VCmdADataW8 = []
+def FComposePixCfg ( Base = 0, **DPlane ) :
+
+    '''
+    ...
     
-    VCmdADataW8.append (CmdRetADataW8Sz) # W[0] = low 16 bits Expected returned / answser size
-    VCmdADataW8.append (0)               # W[1] = in FUTURE high 16 bits Expected returned / answser size, now 27/12/2021 => 0        
+    Composes the pixels configuration matrix from fields planes
     
-    # Since 10/02/2022 W16 are also handled, but not W32
+    Param
+    - Base    = Configuration W8 of all the pixels, or 128 x 54 array, the fields not given in DPlane are taken from it
+    - DPlane  = Field name ( see VGDPixCfgField ) => value, scalar or 128 x 54 array, the bits above the field size are ignored
     
+    ex : FComposePixCfg ( 0x40, I_Adj = VATrim, ActivateVpulse = VBitMap )
     
-    for VW8 in CmdADataW8:
+    Returns
+    - The configuration, numpy uint8 128 x 54 array
     
-        # W8 handling
+    '''
     
-#        if (type(VW8)==ct.c_ubyte):
-#            VCmdADataW8.append (VW8)
-            
-#        elif ( VW8 < 256 ) : 
-        if ( VW8 < 256 ) :   
-            VCmdADataW8.append (VW8)
-        
-        # W16 handling
-            
-        else : 
-            VCmdADataW8.append (VW8 & 0xFF) # First byte  = B7B0
-            VCmdADataW8.append (VW8 >> 8  ) # Second byte = B15B8
-
-    VCmdADataW7 = FConVect8bToMidi7b ( VCmdADataW8, 0 )
-        
-    VCmdADataBA = bytearray (VCmdADataW7)   
-    #VCmdADataBA = bytearray (VCmdADataW8)   
-    VGArdAnsReady = 0
+    VAPixCfg = np.empty ( (PIX_ROW_NB, PIX_COL_NB), dtype = np.uint8 )
+    VAPixCfg[:] = np.asarray ( Base ) & 0xFF
     
-    VGBoard.send_sysex (CmdId,VCmdADataBA) # 
-  
-    VGBoard.iterate()        
-
-    if ( VGArdAnsReady == 1 ):
-        VGArdAnsReady = 0
-
-        # print ( "Arduino cmd status = {:d}".format ( FConvU8ToS8 (VGAArdAns[0]) ) )
-        
-        VRet = FConvU8ToS8 ( VGAArdAns[0] ) # Get status / returned code from UC
+    for VName, VPlane in DPlane.items () :
+    
+        if ( VName not in VGDPixCfgField ):
+            raise ValueError ( "Unknown pixel config field {}, fields = {}".format (VName, list ( VGDPixCfgField )) )
+            
+        VLsb, VBitNb = VGDPixCfgField[VName]
+        VMask        = ((1 << VBitNb) - 1) << VLsb
         
-        del VGAArdAns[0]  # Delete status / returned code to get list of useful UC returend data only      
+        VAPixCfg = (VAPixCfg & (~VMask & 0xFF)) | ((np.asarray ( VPlane ).astype ( np.uint8 ) << VLsb) & VMask)
+        VAPixCfg = VAPixCfg.astype ( np.uint8 )
         
-        if ( CmdRetADataW8Sz == 0 ):
-            return ( VRet )
-            
-        else:
-            return (VRet, VGAArdAns) 
+    return (VAPixCfg)
 
-    else:
-        print ( "Error : No cmd answer from Arduino" )
-        # return (-2) # 18/02/2022 - GC : Bug fix : Code returned before 18/02/2022
-        return (-3)   # 18/02/2022 - GC : Bug fix : new code returned in order to distinguish DUE not responding error from I2C errors
 
 
+def FSetPixCfgLayer ( APixCfg, ASel, W8, Mask = 0xFF ) :
 
+    '''
+    ...
     
+    Sets a layer on the pixels configuration : the Mask bits of the selected pixels are taken from W8
     
-def FCmdSetLog ( LogRaw, LogCmd ) :
-
-    ''' 
-    ... 
-    
-    Sents a command set log (PM0SC__CMD_SET_LOG) to Arduino
+    ex : pulsing bitmap = FSetPixCfgLayer ( FComposePixCfg ( NotPulsingReg ), VBitMap == 1, PulsingReg )
     
     Param
-    - LogRaw      =  0 => No log, 1 => Log commands raw data request and answer buffer
-    - LogCmd      =  0 => No log, 1 => Log cmd name, 2= Log cmd name + data, results
+    - APixCfg  = The configuration, 128 x 54 array, not modified
+    - ASel     = 128 x 54 bool array, selected pixels
+    - W8       = Configuration W8, or 128 x 54 array
+    - Mask     = Bits of the configuration given by the layer, ex 0x07 => I_Adj only
     
     Returns
-    - An error code, 0 => OK, < 0 => error
-    - An optionnal array of results
-    
-    27/12/2021 G.CLAUS CNRS/IN2P3/IPHC/C4PI    
+    - The new configuration, numpy uint8 128 x 54 array
     
     '''
     
-    VRet = 0
-    
-    VCmdRq = [LogRaw,LogCmd ]
-     
-    # FSendCmd ( CmdId, CmdADataW8, CmdRetADataW8Sz )
-     
-    VRet = FSendCmd ( TCmd.SET_LOG.value, VCmdRq, 0 )
-    
-    if ( VRet < 0 ):
-        print ( "Cmd set log failed !" )
+    VAPixCfg = np.asarray ( APixCfg ).astype ( np.uint8 )
+    VALayer  = (VAPixCfg & (~Mask & 0xFF)) | (np.asarray ( W8 ) & Mask)
     
-    return (VRet)
+    return ( np.where ( ASel, VALayer, VAPixCfg ).astype ( np.uint8 ) )
 
- 
 
-    
-def FCmdGetStatus ( Reserved ) :
+
+def FDecomposePixCfg ( APixCfg ) :
 
     '''
     ...
     
-    Sents a command get status (PM0SC__CMD_GET_STATUS) to Arduino
+    Splits a pixels configuration ( ex readback of FRdPixelMatrix ) in fields planes
     
     Param
-    - Reserved    =  A W8 param reserved for future use
+    - APixCfg  = The configuration, 128 x 54 array, -1 => unknown pixel
     
     Returns
-    - An error code, 0 => OK, < 0 => error
-    - An array of [SW status, HW status]
-    
-    27/12/2021 G.CLAUS CNRS/IN2P3/IPHC/C4PI
+    - A dict : field name ( see VGDPixCfgField ) => int16 128 x 54 array, -1 for the unknown pixels
     
     '''
     
-
+    VAPixCfg  = np.asarray ( APixCfg ).astype ( np.int16 )
+    VAUnknown = (VAPixCfg < 0)
+    VDPlane   = collections.OrderedDict ()
     
-    VRet = 0
+    for VName, (VLsb, VBitNb) in VGDPixCfgField.items () :
+        VAPlane = (VAPixCfg >> VLsb) & ((1 << VBitNb) - 1)
+        VAPlane[VAUnknown] = -1
+        VDPlane[VName] = VAPlane
+        
+    return (VDPlane)
+
+
+
+@FSessionLocked
+def FResetPixelMatrix(ResetValue, VRegOp, VPrePostOp, VPrePostParam):
+
+    '''
+    ...
+    
+    Reset all the pixel memories
+    
+    Param
+    - ResetValue     =  Value to be set to all the pixel registers
+    - VRegOp         =  Register operation mode
+    - VPrePostOp     = Pre/post operatiion mode
+    - VPrePostParam  = Pre/post operation param
+    
+    Returns
+    - An error code, 0 => OK, < 0 => error
+
+    03/08/2022 M.SPECHT CNRS/IN2P3/IPHC/C4PI    
+
+    '''
+    logger = logging.getLogger('pm0_sc')
+    # reset the matrix : select all columns, select all rows, set data to pixels, unselect all columns
+    VARegWr = [ ( TRegId.CONF_COL.value,     [64]         ),
+                ( TRegId.PIX_CONF_ROW.value, [128]        ),
+                ( TRegId.CONF_DATA.value,    [ResetValue] ),
+                ( TRegId.CONF_COL.value,     [128]        ) ]
+    VAStepName = [ "Reset Matrix Select all col", "Reset Matrix select all Row", "Reset Matrix set pixel data to 0", "after Reset Matrix unselect all col" ]
+    
+    VErr, VAOpErr = FCmdSetWrRegBatch ( VRegOp, VPrePostOp, VPrePostParam, VARegWr )
+    
+    for VStepName, VOpErr in zip ( VAStepName, VAOpErr ) :
+        VStatus = "{:s}, Reg op = {:s} - Write error = {:d}".format (VStepName, VGStrRegOp[VRegOp], VOpErr)
+        if VOpErr >= 0:
+            logger.debug(VStatus)
+        else:
+            logger.error(VStatus)
+
+    return VErr
+
+
+
+@FSessionLocked
+def FWrPixelMatrix ( APixCfg, RegOp, PrePostOp, PrePostParam, Mode = TPixWrMode.DIFF.value ) :
+
+    '''
+    ...
+
+    Writes the configuration of all the pixels, the registers writes list is given by FPlanPixelMatrix
+    => broadcasts ( matrix / rows / cols ) of the majority values, then the other pixels one by one
+
+    In DIFF mode the plan starts from the pixels shadow ( see Picmic_RegShadow.FGetPixKnown ) => only the pixels
+    which differ are written, an unknown matrix ( after a reset etc ... ) or a disabled shadow gives a full refresh.
+
+    Param
+    - APixCfg       = Configuration W8 of each pixel, 128 x 54 array indexed by [row][col]
+    - RegOp         = Operation, see TRegOp
+    - PrePostOp     = Pre / post operation mode, see TPrePostOp
+    - PrePostParam  = Pre / post operation param
+    - Mode          = See TPixWrMode
+
+    Returns
+    - An error code, 0 => OK, -1 sw error, -2 I2C error, -3 DUE not responding, > 0 number of register R/W errors
+    - The number of registers writes
+
+    '''
+    logger = logging.getLogger('pm0_sc')
+
+    VAPixCfg = np.asarray ( APixCfg, dtype = np.int16 )
+
+    if ( VAPixCfg.shape != (PIX_ROW_NB, PIX_COL_NB) ):
+        FPrintErrMsg ( "Abort : Pixel matrix sz = {} != {}".format (VAPixCfg.shape, (PIX_ROW_NB, PIX_COL_NB)) )
+        return (-1, 0)
+
+    if ( (Mode < 0) or (Mode >= TPixWrMode.NB.value) ):
+        FPrintErrMsg ( "Abort : Unknown pixel write mode = {}".format (Mode) )
+        return (-1, 0)
+
+    # ALL mode rewrites everything from scratch => the selection is written too
+
+    VShadow = FGetRegShadow ()
+
+    if ( Mode == TPixWrMode.ALL.value ):
+        VRow, VCol = (None, None)
+    else :
+        VRow, VCol = VShadow.FGetPixSel ()
+
+    if ( Mode == TPixWrMode.ALL.value ):
+
+        VPixWrList = Picmic_PixWrList ( VRow, VCol )
+        VAPix      = np.argwhere ( VAPixCfg == VAPixCfg )
+
+        VPixWrList.FWrPixels ( VAPix, VAPixCfg.reshape ( -1 ) )
+
+        VARegWr = VPixWrList.FClose ()
+
+    # Software only operation => the shadow is not updated, so the matrix is unknown
+
+    elif ( (Mode == TPixWrMode.FULL.value) or (RegOp == TRegOp.SW.value) ):
+        VARegWr = FPlanPixelMatrix ( VAPixCfg, None, VRow, VCol )
+
+    else :
+        VARegWr = FPlanPixelMatrix ( VAPixCfg, VShadow.FGetPixKnown (), VRow, VCol )
+
+    if ( len ( VARegWr ) == 0 ):
+        logger.debug ( "Pixel matrix already in PICMIC, nothing written" )
+        return (0, 0)
+
+    logger.info ( "Pixel matrix write, mode = {:s} : {:d} registers writes planned".format (TPixWrMode(Mode).name, len ( VARegWr )) )
+
+    VErr, VAOpErr = FCmdSetWrRegBatch ( RegOp, PrePostOp, PrePostParam, VARegWr )
+
+    VStatus = "Pixel matrix write, mode = {:s}, registers writes = {:d} - Write error = {:d}".format (TPixWrMode(Mode).name, len ( VARegWr ), VErr)
+
+    if ( VErr >= 0 ):
+        logger.debug ( VStatus )
+    else :
+        logger.error ( VStatus )
+
+    return (VErr, len ( VARegWr ))
+
+
+
+
+@FSessionLocked
+def FWrPixels ( APixWr, RegOp, PrePostOp, PrePostParam ) :
+
+    '''
+    ...
+
+    Writes the configuration of a list of pixels, ordered to change the row / col selection as few times as possible
+
+    The selection registers are written only if they differ from the values known by the registers shadow,
+    when it is enabled ( see Picmic_RegShadow.FGetPixSel )
+    => the selection left by the previous call is reused. All the cols are unselected at the end.
+
+    Param
+    - APixWr        = List of (Row, Col, W8), if a pixel is written several times the last value is kept
+    - RegOp         = Operation, see TRegOp
+    - PrePostOp     = Pre / post operation mode, see TPrePostOp
+    - PrePostParam  = Pre / post operation param
+
+    Returns
+    - An error code, 0 => OK, -1 sw error, -2 I2C error, -3 DUE not responding, > 0 number of register R/W errors
+    - The number of registers writes
+
+    '''
+    logger = logging.getLogger('pm0_sc')
+
+    VDPixWr = collections.OrderedDict ()
+
+    for VRow, VCol, VW8 in APixWr :
+
+        if ( (VRow < 0) or (VRow >= PIX_ROW_NB) or (VCol < 0) or (VCol >= PIX_COL_NB) ):
+            FPrintErrMsg ( "Abort : Pixel row = {}, col = {} out of matrix".format (VRow, VCol) )
+            return (-1, 0)
+
+        VDPixWr[(VRow, VCol)] = VW8
+
+    if ( len ( VDPixWr ) == 0 ):
+        return (0, 0)
+
+    VPixWrList = Picmic_PixWrList ( *FGetRegShadow ().FGetPixSel () )
+
+    VPixWrList.FWrPixels ( list ( VDPixWr.keys () ), list ( VDPixWr.values () ) )
+
+    VARegWr = VPixWrList.FClose ()
+
+    VErr, VAOpErr = FCmdSetWrRegBatch ( RegOp, PrePostOp, PrePostParam, VARegWr )
+
+    VStatus = "Pixels write, pixels = {:d}, registers writes = {:d} - Write error = {:d}".format (len ( VDPixWr ), len ( VARegWr ), VErr)
+
+    if ( VErr >= 0 ):
+        logger.debug ( VStatus )
+    else :
+        logger.error ( VStatus )
+
+    return (VErr, len ( VARegWr ))
+
+
+
+
+@FSessionLocked
+def FRdPixelMatrix ( APixExp = None, AMask = None ) :
+
+    '''
+    ...
+
+    Reads back the configuration of the pixels ( HW reads ), the reads are sent in pipeline and ordered by col / row
+    => the col selection is kept across the rows, one row write + one CONF_DATA read per pixel.
+    The pixels shadow is updated with the values read. All the cols are unselected at the end.
+
+    Param
+    - APixExp  = Expected configuration W8 of each pixel, 128 x 54 array, None => no comparison
+    - AMask    = 128 x 54 array, pixels <> 0 are read, None => all the pixels ( 6912 reads )
+                 ex : AMask = BitMap => only the pulsed pixels are read for a quick check after upload
+
+    Returns
+    - An error code, 0 => OK, -3 DUE not responding, > 0 number of pixels which could not be read
+    - The 128 x 54 array of pixels read, -1 => not read
+    - The 128 x 54 mismatch map, True => pixel read <> expected or not read, None if APixExp = None
+
+    '''
+    logger = logging.getLogger('pm0_sc')
+
+    VAPixRd = np.full ( (PIX_ROW_NB, PIX_COL_NB), -1, dtype = np.int16 )
+
+    if ( AMask is None ):
+        VAMask = np.ones ( (PIX_ROW_NB, PIX_COL_NB), dtype = bool )
+    else :
+        VAMask = (np.asarray ( AMask ) != 0)
+
+    VShadow    = FGetRegShadow ()
+    VPixWrList = Picmic_PixWrList ( *VShadow.FGetPixSel () )
+    VAPix      = np.argwhere ( VAMask )
+    VAPix      = VAPix[VPixWrList.FGetPixOrder ( VAPix )]
+
+    # Each read depends on the last col and row writes : index in VAWrTicket, -1 => already selected
+
+    VAWrTicket = []
+    VARdTicket = []
+    VColWrIdx  = -1
+    VRowWrIdx  = -1
+
+    for VRow, VCol in VAPix :
+
+        if ( VCol != VPixWrList.Col ):
+            VColWrIdx = len ( VAWrTicket )
+            VAWrTicket.append ( FSubmitCmd ( TCmd.SET_WR_REG.value, [TRegId.CONF_COL.value, TRegOp.HW.value, TPrePostOp.NONE.value, TPrePostOp.NONE.value, 1, int ( VCol )], 0 ) )
+            VPixWrList.Col = VCol
+
+        if ( VRow != VPixWrList.Row ):
+            VRowWrIdx = len ( VAWrTicket )
+            VAWrTicket.append ( FSubmitCmd ( TCmd.SET_WR_REG.value, [TRegId.PIX_CONF_ROW.value, TRegOp.HW.value, TPrePostOp.NONE.value, TPrePostOp.NONE.value, 1, int ( VRow )], 0 ) )
+            VPixWrList.Row = VRow
+
+        VARdTicket.append ( (VRow, VCol, VColWrIdx, VRowWrIdx, FSubmitCmd ( TCmd.GET_RD_REG.value, [TRegId.CONF_DATA.value, TRegOp.HW.value, TPrePostOp.NONE.value, TPrePostOp.NONE.value, 1], 1 )) )
+
+    if ( (len ( VAPix ) > 0) and (VPixWrList.Col != PIX_COL_NONE) ):
+        VAWrTicket.append ( FSubmitCmd ( TCmd.SET_WR_REG.value, [TRegId.CONF_COL.value, TRegOp.HW.value, TPrePostOp.NONE.value, TPrePostOp.NONE.value, 1, PIX_COL_NONE], 0 ) )
+
+    VRet   = 0
+    VErrNb = 0
+    VAWrOk = []
+
+    for VErr, VTicket in VAWrTicket :
+
+        if ( VErr == 0 ):
+            VErr = FWaitCmd ( VTicket )
+
+        if ( VErr == -3 ):
+            VRet = -3
+
+        VAWrOk.append ( VErr == 0 )
+
+    # A read after a failed selection write gives another pixel => not read
+
+    for VRow, VCol, VColWrIdx, VRowWrIdx, (VErr, VTicket) in VARdTicket :
+
+        if ( VErr == 0 ):
+            VErr, VARead = FWaitCmd ( VTicket )
+
+        if ( VErr == -3 ):
+            VRet = -3
+
+        if ( (VErr == 0) and (len ( VARead ) == 1) and ((VColWrIdx < 0) or VAWrOk[VColWrIdx]) and ((VRowWrIdx < 0) or VAWrOk[VRowWrIdx]) ):
+            VAPixRd[VRow, VCol] = VARead[0]
+        else :
+            VErrNb = VErrNb + 1
+
+    # Values read are known to be in PICMIC
+
+    VShadow.APix[VAPixRd >= 0] = VAPixRd[VAPixRd >= 0]
+
+    if ( VRet == 0 ):
+        VRet = VErrNb
+
+    VAMismatch = None
+    VStatus    = "Pixels read = {:d}, not read = {:d}".format (len ( VAPix ), VErrNb)
+
+    if ( APixExp is not None ):
+        VAMismatch = VAMask & (VAPixRd != np.asarray ( APixExp, dtype = np.int16 ))
+        VStatus    = VStatus + ", mismatches = {:d}".format (int ( np.count_nonzero ( VAMismatch ) ))
+
+    if ( VRet >= 0 ):
+        logger.debug ( VStatus + " - Read error = {:d}".format (VRet) )
+    else :
+        logger.error ( VStatus + " - Read error = {:d}".format (VRet) )
+
+    return (VRet, VAPixRd, VAMismatch)
+
+
+
+
+def FGetPixSel ( Row, Col ) :
+
+    '''
+    ...
+    
+    Gets the pixels selected by the pixel config row / col registers values
+    
+    Param
+    - Row  = Pixel config row register value, 128 => all rows, None => unknown
+    - Col  = Pixel config col register value, 64 => all cols, 128 => no col, None => unknown
+    
+    Returns
+    - The list of selected rows, empty if unknown
+    - The list of selected cols, empty if unknown
+    
+    '''
+    
+    if ( (Row == None) or (Col == None) ):
+        return ([], [])
+        
+    if ( Row & PIX_ROW_ALL ):
+        VARow = list ( range ( PIX_ROW_NB ) )
+    else :
+        VARow = [Row]
+        
+    if ( Col & PIX_COL_NONE ):
+        VACol = []
+    elif ( Col & PIX_COL_ALL ):
+        VACol = list ( range ( PIX_COL_NB ) )
+    elif ( Col < PIX_COL_NB ):
+        VACol = [Col]
+    else :
+        VACol = []
+        
+    return (VARow, VACol)
+
+
+
+class Picmic_PixWrList () :
+
+    '''
+    ...
+    
+    List of pixels config writes as registers writes : (RegId, [W8])
+    
+    The current row / col selection is followed, a selection register is written only if its value changes,
+    FWrPixels orders a set of pixels writes to change the selection as few times as possible
+    
+    '''
+
+    def __init__ ( self, Row = None, Col = None ) :
+        self.Row     = Row  # Pixel config row register value, None => unknown
+        self.Col     = Col  # Pixel config col register value, None => unknown
+        self.ARegWr  = []   # List of (RegId, [W8])
+        
+        
+    def FWrData ( self, Row, Col, W8 ) :
+    
+        '''
+        ...
+        
+        Writes W8 in the pixels selected by Row / Col ( PIX_ROW_ALL => all rows, PIX_COL_ALL => all cols )
+    
+        '''
+        
+        if ( Col != self.Col ):
+            self.ARegWr.append ( (TRegId.CONF_COL.value, [Col]) )
+            self.Col = Col
+            
+        if ( Row != self.Row ):
+            self.ARegWr.append ( (TRegId.PIX_CONF_ROW.value, [Row]) )
+            self.Row = Row
+            
+        self.ARegWr.append ( (TRegId.CONF_DATA.value, [W8]) )
+        
+        
+    def FWrPixels ( self, AAPix, AW8 ) :
+    
+        '''
+        ...
+        
+        Writes a set of pixels, grouped by col if they use fewer cols than rows, by row otherwise
+        => one write of the group register per group, one write of the other selection register per pixel.
+        The group / pixel already selected is written first.
+        
+        Param
+        - AAPix  = Array of (Row, Col), N x 2
+        - AW8    = Array of config W8, one per pixel
+    
+        '''
+        
+        VAPix = np.asarray ( AAPix, dtype = np.int16 ).reshape ( -1, 2 )
+        VAW8  = np.asarray ( AW8, dtype = np.int16 ).reshape ( -1 )
+        
+        if ( len ( VAPix ) == 0 ):
+            return
+            
+        for VIndex in self.FGetPixOrder ( VAPix ) :
+            self.FWrData ( int ( VAPix[VIndex, 0] ), int ( VAPix[VIndex, 1] ), int ( VAW8[VIndex] ) )
+            
+            
+    def FGetPixOrder ( self, AAPix ) :
+    
+        '''
+        ...
+        
+        Gets the order of access to a set of pixels, see FWrPixels
+        
+        Param
+        - AAPix  = Array of (Row, Col), N x 2
+        
+        Returns
+        - The array of the pixels indexes in access order
+    
+        '''
+        
+        VARow = AAPix[:, 0]
+        VACol = AAPix[:, 1]
+        
+        # lexsort => last key is the primary one
+        
+        if ( len ( np.unique ( VACol ) ) <= len ( np.unique ( VARow ) ) ):
+            return ( np.lexsort ( (VARow, VARow != self.Row, VACol, VACol != self.Col) ) )
+        else :
+            return ( np.lexsort ( (VACol, VACol != self.Col, VARow, VARow != self.Row) ) )
+            
+            
+    def FClose ( self ) :
+    
+        '''
+        ...
+        
+        Unselects all the cols if pixels have been written
+        
+        Returns
+        - The registers writes list
+    
+        '''
+        
+        if ( (len ( self.ARegWr ) > 0) and (self.Col != PIX_COL_NONE) ):
+            self.ARegWr.append ( (TRegId.CONF_COL.value, [PIX_COL_NONE]) )
+            self.Col = PIX_COL_NONE
+            
+        return (self.ARegWr)
+
+
+
+def FPlanPixLines ( PixWrList, APixCfg, APixState, Axis ) :
+
+    '''
+    ...
+    
+    Broadcasts the majority value of each row ( Axis = 0 ) or col ( Axis = 1 ) if it saves pixels writes
+    
+    Param
+    - PixWrList  = The Picmic_PixWrList to fill
+    - APixCfg    = Configuration to reach
+    - APixState  = Configuration of PICMIC, updated, -1 => unknown
+    - Axis       = 0 => rows, 1 => cols
+    
+    '''
+    
+    for VLine in range ( APixCfg.shape[Axis] ) :
+    
+        VACfg   = APixCfg[VLine, :] if Axis == 0 else APixCfg[:, VLine]
+        VAState = APixState[VLine, :] if Axis == 0 else APixState[:, VLine]
+        
+        VAVal, VACnt = np.unique ( VACfg, return_counts = True )
+        VVal         = int ( VAVal[np.argmax ( VACnt )] )
+        
+        # A line write costs 2 registers writes ( row or col, data ), a pixel write about 2
+        
+        if ( np.count_nonzero ( VACfg != VAState ) - np.count_nonzero ( VACfg != VVal ) < 2 ):
+            continue
+            
+        if ( Axis == 0 ):
+            PixWrList.FWrData ( VLine, PIX_COL_ALL, VVal )
+        else :
+            PixWrList.FWrData ( PIX_ROW_ALL, VLine, VVal )
+            
+        VAState[:] = VVal
+        
+        
+        
+def FPlanPixelMatrix ( APixCfg, APixKnown = None, Row = None, Col = None ) :
+
+    '''
+    ...
+    
+    Plans the registers writes which set the pixels config with the fewest writes
+    
+    - broadcast of the most frequent value to the whole matrix
+    - broadcast of the majority value of each row / col ( all cols selected + one row, or one col + all rows )
+    - write of the remaining pixels one by one, grouped by col or by row
+    
+    The plans with / without matrix broadcast and with rows first / cols first are built, the shortest one is kept.
+    The number of writes is the length of the returned list => known before sending it.
+    
+    Param
+    - APixCfg    = Configuration W8 of each pixel, 128 x 54 array indexed by [row][col]
+    - APixKnown  = Configuration already in PICMIC, -1 => unknown pixel, None => all unknown
+    - Row / Col  = Pixel config row / col registers values, None => unknown
+    
+    Returns
+    - The list of registers writes (RegId, [W8]), to be sent by FCmdSetWrRegBatch, empty if nothing to write
+    
+    '''
+    
+    VAPixCfg = np.asarray ( APixCfg, dtype = np.int16 )
+    
+    if ( APixKnown is None ):
+        VAPixKnown = np.full ( VAPixCfg.shape, -1, dtype = np.int16 )
+    else :
+        VAPixKnown = np.asarray ( APixKnown, dtype = np.int16 )
+        
+    VAVal, VACnt = np.unique ( VAPixCfg, return_counts = True )
+    VBcVal       = int ( VAVal[np.argmax ( VACnt )] )
+    
+    VABestWr = None
+    
+    for VBroadcast in (0, 1) :
+        for VAAxis in ((0, 1), (1, 0)) :
+        
+            VPixWrList = Picmic_PixWrList ( Row, Col )
+            VAPixState = VAPixKnown.copy ()
+            
+            if ( VBroadcast == 1 ):
+                VPixWrList.FWrData ( PIX_ROW_ALL, PIX_COL_ALL, VBcVal )
+                VAPixState[:] = VBcVal
+                
+            for VAxis in VAAxis :
+                FPlanPixLines ( VPixWrList, VAPixCfg, VAPixState, VAxis )
+                
+            # Remaining pixels one by one
+            
+            VAPix = np.argwhere ( VAPixCfg != VAPixState )
+            
+            VPixWrList.FWrPixels ( VAPix, VAPixCfg[VAPix[:, 0], VAPix[:, 1]] )
+                
+            VARegWr = VPixWrList.FClose ()
+            
+            if ( (VABestWr == None) or (len ( VARegWr ) < len ( VABestWr )) ):
+                VABestWr = VARegWr
+                
+    return (VABestWr)
+
+
+
+def FGetRegWrFromCmd ( CmdId, CmdADataW8 ) :
+
+    '''
+    ...
+    
+    Extracts the registers writes contained in a command sent to Arduino
+    
+    Param
+    - CmdId       =  No of the command
+    - CmdADataW8  =  The command data as an array of W8
+    
+    Returns
+    - A list of (register address, register value), empty if the command doesn't write registers
+    
+    '''
+    
+    VARegWr = []
+    
+    # SET_WR_REG => [RegId, RegOp,PrePostOp,PrePostParam, VRegSz, W8 ...]
+    
+    if ( CmdId == TCmd.SET_WR_REG.value ) :
+        VRegAddress = VGARegAddr[CmdADataW8[0]]
+        for VIndex in range ( len ( CmdADataW8 ) - 5 ):
+            VARegWr.append ( (VRegAddress + VIndex, CmdADataW8[5+VIndex]) )
+    
+    # WR_REG_LOW_LEVEL => [RegAddr, RegOp,PrePostOp,PrePostParam, VDataSz, W8 ...]
+    
+    elif ( CmdId == TCmd.WR_REG_LOW_LEVEL.value ) :
+        VRegAddress = CmdADataW8[0]
+        for VIndex in range ( len ( CmdADataW8 ) - 5 ):
+            VARegWr.append ( (VRegAddress + VIndex, CmdADataW8[5+VIndex]) )
+    
+    # WR_REG_BATCH => [RegOp,PrePostOp,PrePostParam, RegNb, RegId, W8 ..., RegId, W8 ..., ...]
+    
+    elif ( CmdId == TCmd.WR_REG_BATCH.value ) :
+        Vi = WR_REG_BATCH_HEADER_SZ
+        for _ in range ( CmdADataW8[3] ):
+            VRegId = CmdADataW8[Vi]
+            VRegAddress = VGARegAddr[VRegId]
+            for VIndex in range ( VGARegW8ESz[VRegId] ):
+                VARegWr.append ( (VRegAddress + VIndex, CmdADataW8[Vi+1+VIndex]) )
+            Vi = Vi + 1 + VGARegW8ESz[VRegId]
+    
+    return VARegWr
+
+
+
+class Picmic_CmdMetrics () :
+
+    '''
+    ...
+    
+    Round-trip latency and throughput metrics of the commands sent to the DUE
+    
+    For each command id
+    - session counters : commands nb, errors ( < 0 ), R/W errors ( > 0 ), timeouts ( -3 ), bytes sent / received
+    - latency histogram, bin k = [2^k, 2^(k+1)[ us => p50 / p95 / p99 of the session ( bin upper edge )
+    The last commands ( WindowS seconds, WindowMaxNb commands max ) are also kept => exact p50 / p95 / p99 and rates
+    on a rolling window
+    
+    '''
+
+    def __init__ ( self, WindowS = 60.0, WindowMaxNb = 10000 ) :
+        self.WindowS     = WindowS
+        self.WindowMaxNb = WindowMaxNb
+        self.Lock        = threading.Lock ()
+        self.FReset ()
+        
+        
+    def FReset ( self ) :
+        with self.Lock :
+            self.TimeBeg = time.perf_counter ()
+            self.DCmd    = {}                    # CmdId => session counters
+            self.AWindow = collections.deque ()  # (TimeEnd, CmdId, LatencyS, TxW8Nb, RxW8Nb, Ret) of the last commands
+            
+            
+    def FRecord ( self, Ticket ) :
+    
+        '''
+        ...
+        
+        Records a completed command
+        
+        Param
+        - Ticket  = Ticket of the command, see Picmic_CmdTicket
+    
+        '''
+        
+        VLatS = Ticket.TimeEnd - Ticket.TimeBeg
+        VBin  = min ( METRICS_HISTO_BIN_NB - 1, max ( 0, int ( math.log2 ( max ( VLatS * 1e6, 1.0 ) ) ) ) )
+        
+        with self.Lock :
+        
+            VCmd = self.DCmd.get ( Ticket.CmdId )
+            
+            if ( VCmd == None ):
+                VCmd = { "Nb" : 0, "ErrNb" : 0, "RwErrNb" : 0, "TimeoutNb" : 0, "LatSumS" : 0.0, "LatMaxS" : 0.0,
+                         "TxW8Nb" : 0, "RxW8Nb" : 0, "AHisto" : [0] * METRICS_HISTO_BIN_NB }
+                self.DCmd[Ticket.CmdId] = VCmd
+                
+            VCmd["Nb"]      = VCmd["Nb"] + 1
+            VCmd["LatSumS"] = VCmd["LatSumS"] + VLatS
+            VCmd["LatMaxS"] = max ( VCmd["LatMaxS"], VLatS )
+            VCmd["TxW8Nb"]  = VCmd["TxW8Nb"] + Ticket.TxW8Nb
+            VCmd["RxW8Nb"]  = VCmd["RxW8Nb"] + Ticket.RxW8Nb
+            VCmd["AHisto"][VBin] = VCmd["AHisto"][VBin] + 1
+            
+            if ( Ticket.Ret == -3 ):
+                VCmd["TimeoutNb"] = VCmd["TimeoutNb"] + 1
+            elif ( Ticket.Ret < 0 ):
+                VCmd["ErrNb"] = VCmd["ErrNb"] + 1
+            elif ( Ticket.Ret > 0 ):
+                VCmd["RwErrNb"] = VCmd["RwErrNb"] + 1
+                
+            self.AWindow.append ( (Ticket.TimeEnd, Ticket.CmdId, VLatS, Ticket.TxW8Nb, Ticket.RxW8Nb, Ticket.Ret) )
+            
+            while ( (len ( self.AWindow ) > self.WindowMaxNb) or (self.AWindow[0][0] < Ticket.TimeEnd - self.WindowS) ):
+                self.AWindow.popleft ()
+                
+                
+    def FGetReport ( self, Rolling = 0 ) :
+    
+        '''
+        ...
+        
+        Gets the metrics
+        
+        Param
+        - Rolling  = 0 => Whole session since last FReset, 1 => Rolling window
+        
+        Returns
+        - A dict : DurationS, CmdNb, TxW8Nb, RxW8Nb, W8PerS, CmdPerS, ErrNb, RwErrNb, TimeoutNb and
+          Cmd = dict command name => Nb, ErrNb, RwErrNb, TimeoutNb, TxW8Nb, RxW8Nb, MeanMs, P50Ms, P95Ms, P99Ms, MaxMs
+    
+        '''
+        
+        VNow = time.perf_counter ()
+        VDCmd = {}
+        
+        with self.Lock :
+        
+            if ( Rolling == 1 ):
+            
+                VDurationS = min ( self.WindowS, VNow - self.TimeBeg )
+                VDLat = {}
+                
+                for VTimeEnd, VCmdId, VLatS, VTxW8Nb, VRxW8Nb, VRet in self.AWindow :
+                
+                    if ( VTimeEnd < VNow - self.WindowS ):
+                        continue
+                        
+                    if ( VCmdId not in VDCmd ):
+                        VDCmd[VCmdId] = { "Nb" : 0, "ErrNb" : 0, "RwErrNb" : 0, "TimeoutNb" : 0, "TxW8Nb" : 0, "RxW8Nb" : 0 }
+                        VDLat[VCmdId] = []
+                        
+                    VCmd = VDCmd[VCmdId]
+                    VCmd["Nb"]        = VCmd["Nb"] + 1
+                    VCmd["TxW8Nb"]    = VCmd["TxW8Nb"] + VTxW8Nb
+                    VCmd["RxW8Nb"]    = VCmd["RxW8Nb"] + VRxW8Nb
+                    VCmd["TimeoutNb"] = VCmd["TimeoutNb"] + (VRet == -3)
+                    VCmd["ErrNb"]     = VCmd["ErrNb"] + ((VRet < 0) and (VRet != -3))
+                    VCmd["RwErrNb"]   = VCmd["RwErrNb"] + (VRet > 0)
+                    VDLat[VCmdId].append ( VLatS )
+                    
+                for VCmdId, VALat in VDLat.items () :
+                    VALat.sort ()
+                    VCmd = VDCmd[VCmdId]
+                    VCmd["MeanMs"] = 1000 * sum ( VALat ) / len ( VALat )
+                    VCmd["P50Ms"]  = 1000 * VALat[max ( 0, math.ceil ( 0.50 * len ( VALat ) ) - 1 )]
+                    VCmd["P95Ms"]  = 1000 * VALat[max ( 0, math.ceil ( 0.95 * len ( VALat ) ) - 1 )]
+                    VCmd["P99Ms"]  = 1000 * VALat[max ( 0, math.ceil ( 0.99 * len ( VALat ) ) - 1 )]
+                    VCmd["MaxMs"]  = 1000 * VALat[-1]
+                    
+            else :
+            
+                VDurationS = VNow - self.TimeBeg
+                
+                for VCmdId, VCmdSrc in self.DCmd.items () :
+                
+                    VCmd = dict ( [(VKey, VVal) for VKey, VVal in VCmdSrc.items () if VKey not in ("AHisto", "LatSumS", "LatMaxS")] )
+                    VCmd["MeanMs"] = 1000 * VCmdSrc["LatSumS"] / VCmdSrc["Nb"]
+                    VCmd["P50Ms"]  = min ( FGetHistoPercentileMs ( VCmdSrc["AHisto"], 0.50 ), 1000 * VCmdSrc["LatMaxS"] )
+                    VCmd["P95Ms"]  = min ( FGetHistoPercentileMs ( VCmdSrc["AHisto"], 0.95 ), 1000 * VCmdSrc["LatMaxS"] )
+                    VCmd["P99Ms"]  = min ( FGetHistoPercentileMs ( VCmdSrc["AHisto"], 0.99 ), 1000 * VCmdSrc["LatMaxS"] )
+                    VCmd["MaxMs"]  = 1000 * VCmdSrc["LatMaxS"]
+                    VDCmd[VCmdId]  = VCmd
+                    
+        VDReport = { "DurationS" : VDurationS, "Cmd" : {} }
+        
+        for VKey in ("TxW8Nb", "RxW8Nb", "ErrNb", "RwErrNb", "TimeoutNb") :
+            VDReport[VKey] = sum ( [VCmd[VKey] for VCmd in VDCmd.values ()] )
+            
+        VDReport["CmdNb"]   = sum ( [VCmd["Nb"] for VCmd in VDCmd.values ()] )
+
+        VDReport["W8PerS"]  = (VDReport["TxW8Nb"] + VDReport["RxW8Nb"]) / max ( VDurationS, 1e-9 )
+        VDReport["CmdPerS"] = VDReport["CmdNb"] / max ( VDurationS, 1e-9 )
+        
+        for VCmdId, VCmd in VDCmd.items () :
+            try :
+                VDReport["Cmd"][TCmd(VCmdId).name] = VCmd
+            except ValueError :
+                VDReport["Cmd"]["CMD_{:d}".format (VCmdId)] = VCmd
+                
+        return (VDReport)
+        
+        
+    def FFormatReport ( self, Rolling = 0 ) :
+    
+        '''
+        ...
+        
+        Formats the metrics as a table
+        
+        Param
+        - Rolling  = 0 => Whole session since last FReset, 1 => Rolling window
+        
+        Returns
+        - A list of text lines
+    
+        '''
+        
+        VDReport = self.FGetReport ( Rolling )
+        
+        VALine = []
+        
+        if ( Rolling == 1 ):
+            VALine.append ( "Slow control commands metrics - rolling window of {:.1f} s".format (VDReport["DurationS"]) )
+        else :
+            VALine.append ( "Slow control commands metrics - session of {:.1f} s ( percentiles = histogram bin upper edge )".format (VDReport["DurationS"]) )
+            
+        VALine.append ( "Commands = {:d} - {:.1f} cmd/s - {:.1f} W8/s - errors = {:d} - R/W errors = {:d} - timeouts = {:d}".format (VDReport["CmdNb"], VDReport["CmdPerS"], VDReport["W8PerS"], VDReport["ErrNb"], VDReport["RwErrNb"], VDReport["TimeoutNb"]) )
+        VALine.append ( "{:<20s} {:>8s} {:>6s} {:>6s} {:>6s} {:>9s} {:>9s} {:>9s} {:>9s} {:>9s} {:>9s} {:>9s}".format ("Command", "Nb", "Err", "RwErr", "TmOut", "Tx W8", "Rx W8", "Mean ms", "P50 ms", "P95 ms", "P99 ms", "Max ms") )
+        
+        for VName, VCmd in sorted ( VDReport["Cmd"].items () ) :
+            VALine.append ( "{:<20s} {:8d} {:6d} {:6d} {:6d} {:9d} {:9d} {:9.3f} {:9.3f} {:9.3f} {:9.3f} {:9.3f}".format (VName, VCmd["Nb"], VCmd["ErrNb"], VCmd["RwErrNb"], VCmd["TimeoutNb"], VCmd["TxW8Nb"], VCmd["RxW8Nb"], VCmd["MeanMs"], VCmd["P50Ms"], VCmd["P95Ms"], VCmd["P99Ms"], VCmd["MaxMs"]) )
+            
+        return (VALine)
+
+
+
+def FGetHistoPercentileMs ( AHisto, Fraction ) :
+
+    '''
+    ...
+    
+    Gets a percentile from a latency histogram of Picmic_CmdMetrics, bin k = [2^k, 2^(k+1)[ us
+    
+    Param
+    - AHisto    = Histogram
+    - Fraction  = 0.5 => p50, 0.95 => p95 etc ...
+    
+    Returns
+    - Upper edge in ms of the bin which contains the percentile
+    
+    '''
+    
+    VNb  = sum ( AHisto )
+    VSum = 0
+    
+    for VBin, VBinNb in enumerate ( AHisto ) :
+        VSum = VSum + VBinNb
+        if ( VSum >= Fraction * VNb ):
+            return ( (2 ** (VBin + 1)) / 1000.0 )
+            
+    return (0.0)
+
+
+
+# Commands metrics filled by the pipeline
+
+VGCmdMetrics = Picmic_CmdMetrics ()
+
+
+
+class Picmic_CmdTicket () :
+
+    '''
+    ...
+    
+    One command sent to the DUE and waiting for its answer
+    
+    Seq is a host side sequence number, the DUE handles the commands in the order it receives them
+    so the answers come back in the same order and are matched to the tickets in FIFO order
+    
+    '''
+
+    def __init__ ( self, Seq, CmdId, RetW8Sz, TxW8Nb, BuffW8Sz ) :
+        self.Seq      = Seq       # Host side sequence number
+        self.CmdId    = CmdId     # No of the command
+        self.RetW8Sz  = RetW8Sz   # Number of W8 the DUE must return ( status excluded )
+        self.TxW8Nb   = TxW8Nb    # Number of bytes sent on the link for this command
+        self.BuffW8Sz = BuffW8Sz  # Sent + received W8, used to calculate data rate
+        self.RxW8Nb   = 0         # Number of bytes of the answer received on the link
+        self.TimeBeg  = 0
+        self.TimeEnd  = 0
+        self.Ready    = 0         # 1 => answer received or command failed
+        self.Event    = threading.Event () # Set when Ready = 1
+        self.Ret      = -3        # Status / returned code from UC, -3 until the answer is received
+        self.AAns     = []        # Data returned by UC, status excluded
+        self.CmdADataW8 = []      # The command data as an array of W8, used by the registers shadow
+        
+        
+    def FSetDone ( self, Ret, AAns ) :
+        self.Ret     = Ret
+        self.AAns    = AAns
+        self.TimeEnd = time.perf_counter ()
+        self.Ready   = 1
+        self.Event.set ()
+
+
+
+class Picmic_CmdPipeline () :
+
+    '''
+    ...
+    
+    Pipelined commands transport to the Arduino DUE
+    
+    Up to WindowSz commands can be sent without waiting for their answer.
+    Flow control : the bytes of the commands in flight never exceed RxBuffSz ( DUE reception buffer size )
+    A command is in flight from its sending until its answer is received.
+    
+    Answers are read by a reader thread ( FStartReader ) which drains the serial port continuously and completes
+    the tickets, a caller waits on the event of its ticket. Without reader thread, the caller reads the port in FWait.
+    
+    If the DUE stays silent during TimeoutS while a command is in flight, all commands in flight are failed
+    with -3 ( DUE not responding ). The answers are then thrown away until the link has been silent during ResyncQuietS,
+    no command is sent before => a late answer of a failed command is never matched to the next commands.
+    
+    '''
+
+    def __init__ ( self, Board, WindowSz = 4, RxBuffSz = DUE_RX_BUFF_SZ, TimeoutS = 2.0, ResyncQuietS = PIPE_RESYNC_QUIET_S ) :
+        self.Board       = Board
+        self.WindowSz    = WindowSz
+        self.RxBuffSz    = RxBuffSz
+        self.TimeoutS    = TimeoutS
+        self.ResyncQuietS = ResyncQuietS
+        self.Resync      = 0                     # 1 => after a timeout, answers thrown away until the link is silent
+        self.ResyncTime  = 0                     # Time of the last timeout
+        self.LateAnsNb   = 0                     # Number of answers thrown away during resync
+        self.NextSeq     = 0
+        self.APending    = collections.deque ()  # Tickets in flight, oldest first
+        self.InFlightW8Nb = 0
+        self.Lock        = threading.Lock ()     # Protects APending, InFlightW8Nb and the sending order
+        self.LastRxTime  = 0                     # Time of the last answer
+        self.Reader      = None                  # Reader thread
+        self.ReaderRun   = 0
+        self.ReaderFlush = 0                     # 1 => reader thread throws away its partial message
+        self.Metrics     = None                  # Picmic_CmdMetrics which records the completed commands
+        self.VPrint      = 0   # 0 = No print, 1 = Prints execution time, 2 = Prints execution time + data
+        self.VPrintW8Nb  = 255 # Maximum number of W8 to print
+        
+        
+    def FHandleSysEx ( self, *byteArray ) :
+    
+        '''
+        ...
+        
+        Handles Firmata SysEx answers from UC given as int parameters by pyfirmata, see FHandleFrame
+    
+        '''
+        
+        self.FHandleFrame ( byteArray )
+        
+        
+    def FHandleFrame ( self, byteArray ) :
+    
+        '''
+        ...
+        
+        Handles Firmata SysEx answers from UC => completes the oldest ticket in flight
+        
+        Param
+        - byteArray          =  Answer data, bytes or tuple of int 
+        
+        Returns
+        - Nothing
+    
+        '''
+        logger = logging.getLogger('pm0_sc')
+        
+        # Usual short answers are decoded by V1 directly, see MIDI_DEC_V1_W8_NB_MAX
+        
+        if ( len ( byteArray ) <= 2 * MIDI_DEC_V1_W8_NB_MAX ):
+            VAAns = FConVectMidi7bTo8bV1 ( byteArray, 0 )
+        else :
+            VAAns = FConVectMidi7bTo8bV3 ( byteArray, 0 )
+        
+        with self.Lock :
+        
+            self.LastRxTime = time.perf_counter ()
+            
+            if ( self.Resync == 1 ):
+                self.LateAnsNb = self.LateAnsNb + 1
+                logger.warning ( "Late answer from Arduino after a timeout => dropped : {}".format (VAAns) )
+                return
+            
+            if ( len ( self.APending ) == 0 ):
+                logger.warning ( "Answer from Arduino without command in flight => dropped : {}".format (VAAns) )
+                return
+            
+            VTicket = self.APending.popleft ()
+            self.InFlightW8Nb = self.InFlightW8Nb - VTicket.TxW8Nb
+        
+        VTicket.RxW8Nb = len ( byteArray ) + FIRMATA_FRAME_OVERHEAD_SZ
+        
+        if ( len ( VAAns ) > 0 ):
+            VTicket.FSetDone ( FConvU8ToS8 ( VAAns[0] ), VAAns[1:] ) # Status / returned code from UC, list of useful UC returned data only
+        else :
+            VTicket.FSetDone ( -1, [] )
+        
+        if ( self.Metrics != None ):
+            self.Metrics.FRecord ( VTicket )
+        
+        if ( self.VPrint >= 1 ) :
+            v_time_s  = VTicket.TimeEnd - VTicket.TimeBeg
+            VDataRate = VTicket.BuffW8Sz / v_time_s
+            print ( "" )
+            print ( "Request {:d} loop back time = {:.6f} s = {:.1f} ms".format (VTicket.Seq, v_time_s, v_time_s * 1000) )
+            print ( "Data rate = {:.1f} W8/S = {:.1f} bauds".format (VDataRate, VDataRate * 10) )  
+    
+        if ( self.VPrint >= 2 ) :
+            print ( "Data from Arduino : {:d} W8".format ( len (VAAns) )  )
+            print ( "Prints the first {:d} W8".format (self.VPrintW8Nb) )
+            print ( VAAns[:self.VPrintW8Nb] )
+    
+    
+    def FStartReader ( self ) :
+    
+        '''
+        ...
+        
+        Starts the reader thread, the serial port read timeout is set to SERIAL_READER_POLL_S
+        so that the thread can check if it must stop
+    
+        '''
+        
+        if ( self.Reader != None ):
+            return
+            
+        self.Board.sp.timeout = SERIAL_READER_POLL_S
+        
+        self.ReaderFlush = 0
+        self.ReaderRun = 1
+        self.Reader = threading.Thread ( target = self.FReaderRun, name = "pm0_sc_reader" )
+        self.Reader.daemon = True
+        self.Reader.start ()
+        
+        
+    def FStopReader ( self ) :
+    
+        '''
+        ...
+        
+        Stops the reader thread
+    
+        '''
+        
+        if ( self.Reader == None ):
+            return
+            
+        self.ReaderRun = 0
+        self.Reader.join ( 10 * SERIAL_READER_POLL_S )
+        self.Reader = None
+        
+        
+    def FReaderRun ( self ) :
+    
+        '''
+        ...
+        
+        Reader thread : reads all available bytes, extracts the SysEx messages START_SYSEX, Cmd, data ..., END_SYSEX
+        and gives them to the board command handler of Cmd ( handleIncomingSysEx for DUE answers )
+        Other Firmata messages are ignored, the DUE sends only SysEx messages once connected
+    
+        '''
+        logger = logging.getLogger('pm0_sc')
+        
+        # Raw serial transport => reads and parses the frames itself
+        
+        if ( isinstance ( self.Board, Picmic_RawSerialBoard ) ):
+        
+            while ( self.ReaderRun == 1 ):
+            
+                try :
+                    self.Board.FPoll ()
+                except :
+                    logger.error ( "Reader thread stopped, serial port error:{}".format(sys.exc_info()[1]) )
+                    break
+                    
+            return
+        
+        VSp   = self.Board.sp
+        VBuff = bytearray ()
+        
+        while ( self.ReaderRun == 1 ):
+        
+            try :
+                VData = VSp.read ( max ( 1, VSp.in_waiting ) )
+            except :
+                logger.error ( "Reader thread stopped, serial port error:{}".format(sys.exc_info()[1]) )
+                break
+            
+            # Resync => partial message received before is thrown away, VData is read after the flush
+            
+            if ( self.ReaderFlush == 1 ):
+                self.ReaderFlush = 0
+                VBuff = bytearray ()
+                
+            if ( len ( VData ) == 0 ):
+                continue
+                
+            VBuff.extend ( VData )
+            
+            while ( True ):
+            
+                VBeg = VBuff.find ( pyfirmata.START_SYSEX )
+                
+                if ( VBeg < 0 ):
+                    VBuff = bytearray ()
+                    break
+                    
+                VEnd = VBuff.find ( pyfirmata.END_SYSEX, VBeg + 1 )
+                
+                if ( VEnd < 0 ):
+                    del VBuff[:VBeg]
+                    break
+                
+                VMsg = VBuff[VBeg+1:VEnd]
+                del VBuff[:VEnd+1]
+                
+                VHandler = self.Board._command_handlers.get ( VMsg[0] ) if ( len ( VMsg ) > 0 ) else None
+                
+                if ( VHandler == None ):
+                    continue
+                    
+                try :
+                    VHandler ( *VMsg[1:] )
+                except :
+                    logger.error ( "Error in Firmata message handler:{}".format(sys.exc_info()[1]) )
+    
+    
+    def FPump ( self ) :
+    
+        '''
+        ...
+        
+        Reads one message from the link if bytes are available, used when there is no reader thread
+        
+        Returns
+        - 1 if a message has been read, 0 otherwise
+    
+        '''
+        
+        if ( self.Board.bytes_available () ):
+            self.Board.iterate ()
+            return (1)
+        
+        time.sleep ( 0.0001 )
+        return (0)
+        
+        
+    def FResync ( self ) :
+    
+        '''
+        ...
+        
+        Fails all the tickets in flight with -3 ( DUE not responding ), flushes the reception buffer
+        and starts the resync : the next commands wait in FWaitQuiet until the link is silent
+    
+        '''
+        logger = logging.getLogger('pm0_sc')
+        
+        with self.Lock :
+        
+            logger.error ( "No answer from Arduino => {:d} commands in flight failed".format (len ( self.APending )) )
+            
+            VAFailed = list ( self.APending )
+            self.APending.clear ()
+            self.InFlightW8Nb = 0
+            
+            # Late answers are thrown away by FHandleFrame until FWaitQuiet ends the resync
+            
+            self.Resync     = 1
+            self.ResyncTime = time.perf_counter ()
+            
+            self.FFlushRx ()
+        
+        for VTicket in VAFailed :
+            VTicket.FSetDone ( -3, [] )
+            
+            if ( self.Metrics != None ):
+                self.Metrics.FRecord ( VTicket )
+    
+    
+    def FFlushRx ( self ) :
+    
+        '''
+        ...
+        
+        Throws away the bytes received and not yet handled, the caller owns self.Lock
+    
+        '''
+        logger = logging.getLogger('pm0_sc')
+        
+        try :
+            self.ReaderFlush = 1
+            
+            if ( isinstance ( self.Board, Picmic_RawSerialBoard ) ):
+                self.Board.FFlushRx ()
+            else :
+                self.Board.sp.reset_input_buffer ()
+        except :
+            logger.error ( "Could not flush Arduino reception buffer" )
+        
+        
+    def FWaitQuiet ( self ) :
+    
+        '''
+        ...
+        
+        Resync after a timeout : waits until no answer has been received during ResyncQuietS,
+        the late answers received meanwhile are thrown away by FHandleFrame
+    
+        '''
+        logger = logging.getLogger('pm0_sc')
+        
+        while ( self.Resync == 1 ):
+        
+            VQuietEnd = max ( self.ResyncTime, self.LastRxTime ) + self.ResyncQuietS
+            
+            if ( time.perf_counter () >= VQuietEnd ):
+            
+                with self.Lock :
+                
+                    if ( max ( self.ResyncTime, self.LastRxTime ) + self.ResyncQuietS > time.perf_counter () ):
+                        continue
+                    
+                    self.FFlushRx ()
+                    self.Resync = 0
+                    
+                logger.info ( "Link to Arduino resynchronized, {:d} late answers dropped".format (self.LateAnsNb) )
+                break
+            
+            # Reader thread => it drains the link, else the link is read here
+            
+            if ( self.Reader != None ):
+                time.sleep ( min ( SERIAL_READER_POLL_S, VQuietEnd - time.perf_counter () ) )
+            elif ( self.FPump () == 1 ):
+                self.LastRxTime = time.perf_counter ()
+        
+        
+    def FWaitSlot ( self, TxW8Nb ) :
+    
+        '''
+        ...
+        
+        Waits until a command of TxW8Nb bytes can be sent without exceeding the window or DUE buffer size,
+        and until the end of the resync after a timeout
+    
+        '''
+        
+        while ( True ):
+        
+            self.FWaitQuiet ()
+            
+            with self.Lock :
+            
+                if ( self.Resync == 1 ):
+                    continue
+                    
+                if ( (len ( self.APending ) == 0) or ((len ( self.APending ) < self.WindowSz) and (self.InFlightW8Nb + TxW8Nb <= self.RxBuffSz)) ):
+                    return
+                    
+                VOldest = self.APending[0]
+                
+            self.FWait ( VOldest )
+        
+        
+    def FSubmit ( self, CmdId, CmdADataBA, RetW8Sz, BuffW8Sz ) :
+    
+        '''
+        ...
+        
+        Sends a command to Arduino without waiting for its answer
+        
+        Param
+        - CmdId       =  No of the command
+        - CmdADataBA  =  The command data already converted in 7 bits bytearray
+        - RetW8Sz     =  Number of W8 returned by UC ( status excluded )
+        - BuffW8Sz    =  Sent + received W8, used to calculate data rate
+        
+        Returns
+        - The ticket of the command
+    
+        '''
+        
+        VTxW8Nb = len ( CmdADataBA ) + FIRMATA_FRAME_OVERHEAD_SZ
+        
+        self.FWaitSlot ( VTxW8Nb )
+        
+        with self.Lock :
+        
+            VTicket = Picmic_CmdTicket ( self.NextSeq, CmdId, RetW8Sz, VTxW8Nb, BuffW8Sz )
+            self.NextSeq = self.NextSeq + 1
+            
+            self.APending.append ( VTicket )
+            self.InFlightW8Nb = self.InFlightW8Nb + VTxW8Nb
+            
+            VTicket.TimeBeg = time.perf_counter ()
+            
+            self.Board.send_sysex ( CmdId, CmdADataBA )
+        
+        return (VTicket)
+        
+        
+    def FWait ( self, Ticket, TimeoutS = None ) :
+    
+        '''
+        ...
+        
+        Waits for the answer of a command
+        
+        The deadline is TimeoutS after the sending of the command or after the last answer received
+        if later => commands queued behind slow ones are not failed as long as the DUE answers
+        
+        Param
+        - Ticket      =  The ticket returned by FSubmit
+        - TimeoutS    =  Maximum DUE silence time, None => self.TimeoutS
+        
+        Returns
+        - The ticket, Ticket.Ret = -3 if DUE has not answered before the deadline
+    
+        '''
+        
+        if ( TimeoutS == None ):
+            TimeoutS = self.TimeoutS
+        
+        while ( Ticket.Ready == 0 ):
+        
+            VDeadLine = max ( Ticket.TimeBeg, self.LastRxTime ) + TimeoutS
+            
+            if ( time.perf_counter () > VDeadLine ):
+                print ( "Error : No cmd answer from Arduino" )
+                self.FResync ()
+                break
+            
+            # Reader thread => wait on the ticket event, lowest latency, no CPU used
+            
+            if ( self.Reader != None ):
+                Ticket.Event.wait ( VDeadLine - time.perf_counter () )
+            
+            # No reader thread => reads the port
+            
+            elif ( self.FPump () == 1 ):
+                self.LastRxTime = time.perf_counter ()
+        
+        return (Ticket)
+        
+        
+    def FDrain ( self ) :
+    
+        '''
+        ...
+        
+        Waits for the answers of all the commands in flight
+    
+        '''
+        
+        with self.Lock :
+            VLast = self.APending[-1] if ( len ( self.APending ) > 0 ) else None
+            
+        if ( VLast != None ):
+            self.FWait ( VLast )
+    
+    
+class Picmic_RawSerialBoard () :
+
+    '''
+    ...
+    
+    Lean transport to the DUE : Firmata SysEx framing directly over pyserial, used in place of pyfirmata.Arduino
+    
+    - no pins layout setup, only the firmware name / version are asked at connection
+    - commands are built in a preallocated buffer and written in one go
+    - answers are read in bulk ( all the bytes available ) in a preallocated buffer, the frames are found
+      by searching END_SYSEX and given as bytes to FrameHandler ( Picmic_CmdPipeline.FHandleFrame ) or to the
+      handler registered by add_cmd_handler
+    
+    Param
+    - Port    = The USB port string
+    - dsrdtr  = True => no automatic reset of the DUE at connection => no setup wait
+    
+    '''
+
+    def __init__ ( self, Port, dsrdtr = False ) :
+    
+        self.name              = Port
+        self.firmware          = None
+        self.firmware_version  = None
+        self.firmata_version   = None
+        self._command_handlers = {}
+        self.callback_holder   = dict ()
+        self.FrameHandler      = None  # Called with the payload of the SysEx answers F0 F0 ... F7
+        
+        self.TxBuff = bytearray ( RAW_SERIAL_TX_BUFF_SZ )
+        self.TxView = memoryview ( self.TxBuff )
+        self.TxBuff[0] = pyfirmata.START_SYSEX
+        
+        self.RxBuff  = bytearray ( RAW_SERIAL_RX_BUFF_SZ )
+        self.RxW8Nb  = 0   # Number of bytes in RxBuff
+        self.RxFlush = 0   # 1 => bytes in RxBuff are thrown away at next read
+        
+        self.sp = serial.Serial ( Port, RAW_SERIAL_BAUD_RATE, timeout = SERIAL_READER_POLL_S, dsrdtr = dsrdtr )
+        
+        # Allows DUE auto-reset to happen, as pyfirmata does
+        
+        if ( dsrdtr == False ):
+            time.sleep ( RAW_SERIAL_SETUP_WAIT_S )
+        
+        self.FQueryFirmware ()
+        
+        
+    def FQueryFirmware ( self ) :
+    
+        '''
+        ...
+        
+        Asks the Firmata version and the firmware name / version, waits for the answers during RAW_SERIAL_QUERY_TIMEOUT_S max
+    
+        '''
+        
+        self.sp.write ( bytearray ( [pyfirmata.REPORT_VERSION, pyfirmata.START_SYSEX, pyfirmata.REPORT_FIRMWARE, pyfirmata.END_SYSEX] ) )
+        
+        VDeadLine = time.perf_counter () + RAW_SERIAL_QUERY_TIMEOUT_S
+        
+        while ( (self.firmware == None) and (time.perf_counter () < VDeadLine) ):
+            self.FPoll ()
+        
+        
+    def add_cmd_handler ( self, cmd, func ) :
+        self._command_handlers[cmd] = func
+        
+        
+    def send_sysex ( self, sysex_cmd, data ) :
+    
+        '''
+        ...
+        
+        Sends a SysEx message START_SYSEX, sysex_cmd, data ..., END_SYSEX
+        
+        Param
+        - sysex_cmd  = Command byte
+        - data       = bytearray of 7 bits bytes
+    
+        '''
+        
+        VNb = len ( data )
+        
+        if ( VNb + FIRMATA_FRAME_OVERHEAD_SZ > RAW_SERIAL_TX_BUFF_SZ ):
+            self.sp.write ( bytearray ( [pyfirmata.START_SYSEX, sysex_cmd] ) + data + bytearray ( [pyfirmata.END_SYSEX] ) )
+            return
+        
+        self.TxBuff[1] = sysex_cmd
+        self.TxBuff[2:2+VNb] = data
+        self.TxBuff[2+VNb] = pyfirmata.END_SYSEX
+        
+        self.sp.write ( self.TxView[:VNb+FIRMATA_FRAME_OVERHEAD_SZ] )
+        
+        
+    def bytes_available ( self ) :
+        return ( self.sp.in_waiting )
+        
+        
+    def iterate ( self ) :
+        self.FPoll ()
+        
+        
+    def FFlushRx ( self ) :
+    
+        '''
+        ...
+        
+        Throws away the bytes received, the partial frame in RxBuff is dropped by the next FPoll
+    
+        '''
+        
+        self.RxFlush = 1
+        self.sp.reset_input_buffer ()
+        
+        
+    def FPoll ( self ) :
+    
+        '''
+        ...
+        
+        Reads all the available bytes ( waits SERIAL_READER_POLL_S max for the first one ) and handles the complete frames
+        
+        Returns
+        - Number of frames handled
+    
+        '''
+        logger = logging.getLogger('pm0_sc')
+        
+        VData = self.sp.read ( max ( 1, self.sp.in_waiting ) )
+        
+        # Flush => partial frame received before is thrown away, VData is read after the flush
+        
+        if ( self.RxFlush == 1 ):
+            self.RxFlush = 0
+            self.RxW8Nb  = 0
+        
+        VNb = len ( VData )
+        
+        if ( VNb == 0 ):
+            return (0)
+        
+        if ( self.RxW8Nb + VNb > RAW_SERIAL_RX_BUFF_SZ ):
+            logger.error ( "Raw serial reception buffer overflow, {:d} bytes thrown away".format (self.RxW8Nb) )
+            self.RxW8Nb = 0
+            VData = VData[-RAW_SERIAL_RX_BUFF_SZ:]
+            VNb   = len ( VData )
+        
+        self.RxBuff[self.RxW8Nb:self.RxW8Nb+VNb] = VData
+        self.RxW8Nb = self.RxW8Nb + VNb
+        
+        return ( self.FParse () )
+        
+        
+    def FParse ( self ) :
+    
+        '''
+        ...
+        
+        Handles the complete frames of RxBuff, keeps the partial one at the beginning of RxBuff
+        - START_SYSEX, Cmd, data ..., END_SYSEX => FrameHandler ( data ) if Cmd = START_SYSEX ( DUE answer ), else handler of Cmd
+        - REPORT_VERSION, major, minor          => firmata_version
+        - other bytes are ignored, the DUE sends only SysEx messages once connected
+        
+        Returns
+        - Number of frames handled
+    
+        '''
+        logger = logging.getLogger('pm0_sc')
+        
+        VBuff    = self.RxBuff
+        VEnd     = self.RxW8Nb
+        VBeg     = 0
+        VFrameNb = 0
+        
+        while ( VBeg < VEnd ):
+        
+            VW8 = VBuff[VBeg]
+            
+            if ( VW8 == pyfirmata.START_SYSEX ):
+            
+                VStop = VBuff.find ( pyfirmata.END_SYSEX, VBeg + 1, VEnd )
+                
+                if ( VStop < 0 ):
+                    break
+                
+                if ( VStop > VBeg + 1 ):
+                
+                    VCmd     = VBuff[VBeg+1]
+                    VPayload = bytes ( VBuff[VBeg+2:VStop] )
+                    
+                    try :
+                        self.FHandleFrame ( VCmd, VPayload )
+                    except :
+                        logger.error ( "Error in Firmata message handler:{}".format(sys.exc_info()[1]) )
+                    
+                    VFrameNb = VFrameNb + 1
+                    
+                VBeg = VStop + 1
+                
+            elif ( VW8 == pyfirmata.REPORT_VERSION ):
+            
+                if ( VBeg + 3 > VEnd ):
+                    break
+                
+                self.firmata_version = (VBuff[VBeg+1], VBuff[VBeg+2])
+                VBeg = VBeg + 3
+                
+            else :
+                VBeg = VBeg + 1
+        
+        # Partial frame moved at the beginning of the buffer, same size slices => no reallocation
+        
+        if ( VBeg > 0 ):
+            VBuff[0:VEnd-VBeg] = VBuff[VBeg:VEnd]
+            self.RxW8Nb = VEnd - VBeg
+        
+        return (VFrameNb)
+        
+        
+    def FHandleFrame ( self, Cmd, Payload ) :
+    
+        '''
+        ...
+        
+        Gives a SysEx frame to its handler
+        
+        Param
+        - Cmd      = SysEx command byte
+        - Payload  = bytes between Cmd and END_SYSEX
+    
+        '''
+        
+        if ( (Cmd == pyfirmata.START_SYSEX) and (self.FrameHandler != None) ):
+            self.FrameHandler ( Payload )
+            return
+        
+        # Firmware name in 14 bits characters
+        
+        if ( Cmd == pyfirmata.REPORT_FIRMWARE ):
+            if ( len ( Payload ) >= 2 ):
+                self.firmware_version = (Payload[0], Payload[1])
+                self.firmware = "".join ( [chr ( Payload[Vi] + (Payload[Vi+1] << 7) ) for Vi in range ( 2, len ( Payload ) - 1, 2 )] )
+            return
+        
+        VHandler = self._command_handlers.get ( Cmd )
+        
+        if ( VHandler != None ):
+            VHandler ( *Payload )
+            
+            
+    def exit ( self ) :
+        self.sp.close ()
+    
+    
+class Picmic_RegShadow () :
+
+    '''
+    ...
+    
+    Shadow of the PICMIC registers : value of each register address known to be in the chip
+    
+    It is updated when a write command is sent ( HW / CHK operations ) and when a register is read,
+    a register address is forgotten ( invalidated ) when a command fails, on a reset and on explicit resync.
+    If enabled, the register writes whose value already matches the shadow are not sent.
+    
+    GLB_CMD and CONF_DATA are never skipped : writing them triggers an action in the chip.
+    
+    The pixel memory is shadowed too ( APix ) : a write in CONF_DATA sets the pixels selected by the known values
+    of the pixel config row / col registers, it is used by FWrPixelMatrix to write only the modified pixels.
+    
+    '''
+
+    def __init__ ( self ) :
+        self.Enabled     = 0   # 1 => redundant writes are skipped
+        self.PartialWr   = 0   # 1 => FCmdSetWrReg writes only the modified W8 span of a register
+        self.DKnown      = {}  # Register address => value known to be in PICMIC
+        self.AExclAddr   = [VGARegAddr[TRegId.GLB_CMD.value], VGARegAddr[TRegId.CONF_DATA.value]]
+        self.APixAddr    = [VGARegAddr[TRegId.PIX_CONF_ROW.value], VGARegAddr[TRegId.CONF_COL.value], VGARegAddr[TRegId.CONF_DATA.value]]
+        self.APix        = np.full ( (PIX_ROW_NB, PIX_COL_NB), -1, dtype = np.int16 ) # Pixel config known to be in PICMIC, -1 => unknown
+        self.FResetCounters ()
+        
+        
+    def FResetCounters ( self ) :
+        self.WrRegNb       = 0 # Register writes requested
+        self.WrRegSavedNb  = 0 # Register writes skipped
+        self.WrW8SavedNb   = 0 # W8 not written
+        self.InvalidateNb  = 0 # Number of invalidations
+        
+        
+    def FInvalidate ( self, AAddr = None ) :
+    
+        '''
+        ...
+        
+        Forgets the value of registers
+        
+        Param
+        - AAddr  = List of register addresses, None => all registers
+    
+        '''
+        
+        if ( AAddr == None ):
+            self.DKnown.clear ()
+        else :
+            for VAddr in AAddr :
+                self.DKnown.pop ( VAddr, None )
+                
+        # Pixel selection / data write failed => pixels written at unknown places
+        
+        if ( (AAddr == None) or any ( [VAddr in self.APixAddr for VAddr in AAddr] ) ):
+            self.APix.fill ( -1 )
+            
+        self.InvalidateNb = self.InvalidateNb + 1
+        
+        
+    def FUpdate ( self, ARegWr ) :
+    
+        '''
+        ...
+        
+        Sets the value of registers, ARegWr = list of (register address, value)
+    
+        '''
+        
+        for VAddr, VVal in ARegWr :
+            if ( VAddr == self.APixAddr[2] ):
+                self.FUpdatePix ( VVal )
+            elif ( VAddr not in self.AExclAddr ):
+                self.DKnown[VAddr] = VVal
+                
+                
+    def FGetPixSel ( self ) :
+    
+        '''
+        ...
+        
+        Returns the pixel config row / col values to start a pixels writes list from ( see Picmic_PixWrList )
+        
+        The values are used only if the shadow is enabled, else (None, None) => the row and col are always written,
+        a selection changed outside the host ( PICMIC reset, power cycle ... ) can't send the pixel data to another pixel.
+    
+        '''
+        
+        if ( not self.Enabled ):
+            return (None, None)
+            
+        return (self.DKnown.get ( self.APixAddr[0] ), self.DKnown.get ( self.APixAddr[1] ))
+        
+        
+    def FGetPixKnown ( self ) :
+    
+        '''
+        ...
+        
+        Returns the pixels config to plan the pixels writes from ( see FPlanPixelMatrix ), same rule as FGetPixSel
+        
+        APix is used only if the shadow is enabled, else None => the whole matrix is refreshed,
+        a matrix changed outside the host can't be left wrong by a DIFF write.
+    
+        '''
+        
+        if ( not self.Enabled ):
+            return (None)
+            
+        return (self.APix)
+        
+        
+    def FUpdatePix ( self, W8 ) :
+    
+        '''
+        ...
+        
+        Sets the pixels selected by the pixel config row / col registers to W8, all pixels are unknown if the selection is unknown
+    
+        '''
+        
+        VRow = self.DKnown.get ( self.APixAddr[0] )
+        VCol = self.DKnown.get ( self.APixAddr[1] )
+        
+        if ( (VRow == None) or (VCol == None) ):
+            self.APix.fill ( -1 )
+            return
+            
+        VARow, VACol = FGetPixSel ( VRow, VCol )
+        
+        if ( (len ( VARow ) > 0) and (len ( VACol ) > 0) ):
+            self.APix[np.ix_ ( VARow, VACol )] = W8
+        
+        
+    def FIsRedundant ( self, RegOp, ARegWr, DKnown ) :
+    
+        '''
+        ...
+        
+        Checks if a register write can be skipped
+        
+        Param
+        - RegOp   = Operation, only HW and CHK writes can be skipped
+        - ARegWr  = List of (register address, value) to write
+        - DKnown  = Registers values to compare to
+        
+        Returns
+        - True if all the values are already in PICMIC
+    
+        '''
+        
+        if ( (self.Enabled == 0) or (RegOp == TRegOp.SW.value) or (len ( ARegWr ) == 0) ):
+            return (False)
+            
+        for VAddr, VVal in ARegWr :
+            if ( (VAddr in self.AExclAddr) or (DKnown.get ( VAddr ) != VVal) ):
+                return (False)
+                
+        return (True)
+        
+        
+    def FFilterWrList ( self, RegOp, RegIdAW8List ) :
+    
+        '''
+        ...
+        
+        Finds the redundant writes of a list of registers writes, the list is taken in order
+        so a register written twice is compared to its previous value in the list
+        
+        Param
+        - RegOp        = Operation
+        - RegIdAW8List = List of (RegId, RegAW8)
+        
+        Returns
+        - A list of flags, one per register, 1 => to be written, 0 => skipped
+    
+        '''
+        
+        VAKeep = []
+        VDPred = dict ( self.DKnown )
+        
+        for VRegId, VRegAW8 in RegIdAW8List :
+        
+            VARegWr = [(VGARegAddr[VRegId] + VIndex, VW8) for VIndex, VW8 in enumerate ( VRegAW8 )]
+            
+            if ( self.FIsRedundant ( RegOp, VARegWr, VDPred ) ):
+                VAKeep.append ( 0 )
+                self.WrRegNb      = self.WrRegNb + 1
+                self.WrRegSavedNb = self.WrRegSavedNb + 1
+                self.WrW8SavedNb  = self.WrW8SavedNb + len ( VARegWr )
+            else :
+                VAKeep.append ( 1 )
+                VDPred.update ( VARegWr )
+        
+        return (VAKeep)
+        
+        
+    def FGetDirtySpan ( self, RegId, RegOp, RegAW8 ) :
+    
+        '''
+        ...
+        
+        Gets the W8 span of a register which differs from the shadow, used if PartialWr = 1
+        
+        Returns
+        - (First W8 index, Last W8 index) or None if the whole register must be written
+    
+        '''
+        
+        if ( (self.Enabled == 0) or (self.PartialWr == 0) or (RegOp == TRegOp.SW.value) or (len ( RegAW8 ) < 2) ):
+            return (None)
+        
+        VRegAddress = VGARegAddr[RegId]
+        
+        if ( VRegAddress in self.AExclAddr ):
+            return (None)
+            
+        VADirty = [VIndex for VIndex, VW8 in enumerate ( RegAW8 ) if self.DKnown.get ( VRegAddress + VIndex ) != VW8]
+        
+        # Nothing to write is handled by FSubmitCmd
+        
+        if ( (len ( VADirty ) == 0) or (VADirty[-1] - VADirty[0] + 1 == len ( RegAW8 )) ):
+            return (None)
+            
+        return ((VADirty[0], VADirty[-1]))
+        
+        
+    def FOnSubmit ( self, CmdId, CmdADataW8 ) :
+    
+        '''
+        ...
+        
+        Updates the shadow with a command to be sent
+        
+        Param
+        - CmdId       =  No of the command
+        - CmdADataW8  =  The command data as an array of W8
+        
+        Returns
+        - 1 if the command is redundant and must not be sent, 0 otherwise
+    
+        '''
+        
+        if ( CmdId in (TCmd.SET_WR_REG.value, TCmd.WR_REG_LOW_LEVEL.value, TCmd.WR_REG_BATCH.value) ):
+        
+            if ( CmdId == TCmd.WR_REG_BATCH.value ):
+                VRegOp = CmdADataW8[0]
+                VRegNb = CmdADataW8[3]
+            else :
+                VRegOp = CmdADataW8[1]
+                VRegNb = 1
+                
+            VARegWr = FGetRegWrFromCmd ( CmdId, CmdADataW8 )
+            
+            self.WrRegNb = self.WrRegNb + VRegNb
+            
+            if ( self.FIsRedundant ( VRegOp, VARegWr, self.DKnown ) ):
+                self.WrRegSavedNb = self.WrRegSavedNb + VRegNb
+                self.WrW8SavedNb  = self.WrW8SavedNb + len ( VARegWr )
+                return (1)
+            
+            # The values are supposed written, FOnAnswer forgets them if the command fails
+            
+            if ( VRegOp != TRegOp.SW.value ):
+                self.FUpdate ( VARegWr )
+        
+        # DUE RAM image or default values written to PICMIC => unknown values
+        
+        elif ( CmdId in (TCmd.SET_WR_DEF.value, TCmd.WR_ALL_REG.value) ):
+            self.FInvalidate ()
+        
+        # Registers overwritten by test patterns, outputs ( I2C and steering ) state changed => unknown values
+        
+        elif ( CmdId in (TCmd.TEST_I2C_REGS.value, TCmd.ACTIVATE_OUTPUTS.value, TCmd.DEACTIVATE_OUTPUTS.value) ):
+            self.FInvalidate ()
+        
+        # Reset of PICMIC
+            
+        elif ( CmdId == TCmd.CTRL_HW_SIG.value ):
+            if ( CmdADataW8[0] in (TCmdHwSig.SET_ST_ALL.value, TCmdHwSig.SET_ST_RST.value, TCmdHwSig.SET_ST_RST_I2C.value, TCmdHwSig.PULSE_RST.value, TCmdHwSig.PULSE_RST_I2C.value) ):
+                self.FInvalidate ()
+                
+        return (0)
+        
+        
+    def FOnAnswer ( self, CmdId, CmdADataW8, Ret, AAns ) :
+    
+        '''
+        ...
+        
+        Updates the shadow with the answer of a command
+        
+        Param
+        - CmdId       =  No of the command
+        - CmdADataW8  =  The command data as an array of W8
+        - Ret         =  Status / returned code from UC
+        - AAns        =  Data returned by UC
+    
+        '''
+        
+        # DUE not responding => nothing is known about the commands in flight
+        
+        if ( Ret == -3 ):
+            self.FInvalidate ()
+            return
+            
+        if ( CmdId in (TCmd.SET_WR_REG.value, TCmd.WR_REG_LOW_LEVEL.value, TCmd.WR_REG_BATCH.value) ):
+        
+            VErr = Ret
+            
+            if ( CmdId == TCmd.WR_REG_BATCH.value ):
+                VErr = VErr + sum ( [abs ( FConvU8ToS8 ( _ ) ) for _ in AAns] )
+            
+            if ( VErr != 0 ):
+                self.FInvalidate ( [VAddr for VAddr, VVal in FGetRegWrFromCmd ( CmdId, CmdADataW8 )] )
+                
+        # CONF_DATA read => config of a pixel, the selection may have changed since the command was sent
+        
+        elif ( (CmdId == TCmd.GET_RD_REG.value) and (CmdADataW8[1] != TRegOp.SW.value) and (CmdADataW8[0] != TRegId.CONF_DATA.value) ):
+        
+            VRegAddress = VGARegAddr[CmdADataW8[0]]
+            VARegRd     = [(VRegAddress + VIndex, VW8) for VIndex, VW8 in enumerate ( AAns )]
+            
+            if ( (Ret == 0) and (len ( AAns ) == VGARegW8ESz[CmdADataW8[0]]) ):
+                self.FUpdate ( VARegRd )
+            else :
+                self.FInvalidate ( [VAddr for VAddr, VVal in VARegRd] )
+                
+                
+    def FGetCounters ( self ) :
+    
+        '''
+        ...
+        
+        Returns
+        - A dict of counters : requested / skipped register writes, W8 not written, invalidations, known registers nb
+    
+        '''
+        
+        return ( { "WrRegNb"      : self.WrRegNb,
+                   "WrRegSavedNb" : self.WrRegSavedNb,
+                   "WrW8SavedNb"  : self.WrW8SavedNb,
+                   "InvalidateNb" : self.InvalidateNb,
+                   "KnownW8Nb"    : len ( self.DKnown ),
+                   "KnownPixNb"   : int ( np.count_nonzero ( self.APix >= 0 ) ) } )
+
+
+
+# Shadow of PICMIC registers used by FSubmitCmd / FWaitCmd
+
+VGRegShadow = Picmic_RegShadow ()
+
+
+
+class Picmic_RegVerifier () :
+
+    '''
+    ...
+    
+    Deferred verification of the registers writes : "write fast, verify once"
+    
+    If enabled, the writes requested with the CHK operation are sent with the HW operation ( no read back
+    by the DUE after each write ) and the written values are kept as expected values. FVerify reads back
+    the registers and the written pixels, compares them to the expected values and rewrites only the wrong ones.
+    
+    A write in CONF_DATA writes the pixels selected by the pixel config row / col registers, the selection is
+    followed to know the expected value of each pixel ( row 128 => all rows, col 64 => all cols, col 128 => no col ).
+    
+    '''
+
+    def __init__ ( self ) :
+        self.Enabled   = 0     # 1 => CHK writes are sent as HW writes and verified later
+        self.EveryNb   = 0     # > 0 => FVerify is called by FSubmitCmd every EveryNb deferred writes commands
+        self.PixSweep  = 1     # PixSweep param of the automatic verification, see FVerify
+        self.Running   = 0     # 1 => verification in progress, writes are not deferred
+        self.DExpReg   = {}    # Register address => value expected in PICMIC
+        self.DExpPix   = {}    # (Row, Col) => pixel config expected in PICMIC, pixel written alone
+        self.DExpPixBc = {}    # (Row, Col) => pixel config expected in PICMIC, pixel written by a broadcast ( several pixels selected )
+        self.SelRow    = None  # Value of pixel config row register, None => unknown
+        self.SelCol    = None  # Value of pixel config col register, None => unknown
+        self.PendingNb = 0     # Deferred writes commands since last verification
+        self.AExclAddr = [VGARegAddr[TRegId.GLB_CMD.value], VGARegAddr[TRegId.CONF_DATA.value]]
+        self.FResetCounters ()
+        
+        
+    def FResetCounters ( self ) :
+        self.DeferredNb    = 0 # Writes commands sent as HW instead of CHK
+        self.VerifyNb      = 0 # Verifications done
+        self.RdW8Nb        = 0 # W8 read back by the verifications
+        self.RegMismatchNb = 0 # Registers read <> expected
+        self.PixMismatchNb = 0 # Pixels read <> expected
+        self.RetryErrNb    = 0 # Registers / pixels still wrong after the retry
+        
+        
+    def FClear ( self, Selection = 0 ) :
+    
+        '''
+        ...
+        
+        Forgets the expected values
+        
+        Param
+        - Selection  = 1 => The pixel config row / col registers values are forgotten too ( PICMIC reset )
+        
+        '''
+        self.DExpReg.clear ()
+        self.DExpPix.clear ()
+        self.DExpPixBc.clear ()
+        self.PendingNb = 0
+        
+        if ( Selection == 1 ):
+            self.SelRow = None
+            self.SelCol = None
+            
+            
+    def FIsDue ( self ) :
+        return ( (self.Enabled == 1) and (self.Running == 0) and (self.EveryNb > 0) and (self.PendingNb >= self.EveryNb) )
+        
+        
+    def FUpdate ( self, ARegWr, Defer ) :
+    
+        '''
+        ...
+        
+        Updates the expected values with registers writes, ARegWr = list of (register address, value)
+        
+        Param
+        - Defer  = 1 => Deferred write, its values must be verified
+                   0 => HW write, only the values already waiting for verification are updated
+        
+        '''
+        
+        for VAddr, VVal in ARegWr :
+        
+            if ( VAddr == VGARegAddr[TRegId.PIX_CONF_ROW.value] ):
+                self.SelRow = VVal
+                
+            elif ( VAddr == VGARegAddr[TRegId.CONF_COL.value] ):
+                self.SelCol = VVal
+            
+            if ( VAddr == VGARegAddr[TRegId.CONF_DATA.value] ):
+                VARow, VACol = FGetPixSel ( self.SelRow, self.SelCol )
+                if ( len ( VARow ) * len ( VACol ) == 1 ):
+                    VDExp = self.DExpPix
+                else :
+                    VDExp = self.DExpPixBc
+                for VCol in VACol :
+                    for VRow in VARow :
+                        VPix = (VRow, VCol)
+                        if ( (Defer == 1) or (VPix in self.DExpPix) or (VPix in self.DExpPixBc) ):
+                            self.DExpPix.pop ( VPix, None )
+                            self.DExpPixBc.pop ( VPix, None )
+                            VDExp[VPix] = VVal
+                            
+            elif ( VAddr not in self.AExclAddr ):
+                if ( (Defer == 1) or (VAddr in self.DExpReg) ):
+                    self.DExpReg[VAddr] = VVal
+                    
+                    
+    def FOnSubmit ( self, CmdId, CmdADataW8 ) :
+    
+        '''
+        ...
+        
+        Updates the expected values with a command to be sent, changes the CHK operation of a write in HW
+        
+        Param
+        - CmdId       =  No of the command
+        - CmdADataW8  =  The command data as an array of W8
+        
+        Returns
+        - The command data to send, a modified copy of CmdADataW8 if the write is deferred
+        
+        '''
+        
+        if ( self.Enabled == 0 ):
+            return (CmdADataW8)
+        
+        if ( CmdId in (TCmd.SET_WR_REG.value, TCmd.WR_REG_LOW_LEVEL.value, TCmd.WR_REG_BATCH.value) ):
+        
+            if ( CmdId == TCmd.WR_REG_BATCH.value ):
+                VRegOpIndex = 0
+            else :
+                VRegOpIndex = 1
+                
+            if ( CmdADataW8[VRegOpIndex] == TRegOp.SW.value ):
+                return (CmdADataW8)
+                
+            VDefer = int ( (self.Running == 0) and (CmdADataW8[VRegOpIndex] == TRegOp.CHK.value) )
+            
+            self.FUpdate ( FGetRegWrFromCmd ( CmdId, CmdADataW8 ), VDefer )
+            
+            if ( VDefer == 1 ):
+                CmdADataW8 = list ( CmdADataW8 )
+                CmdADataW8[VRegOpIndex] = TRegOp.HW.value
+                self.PendingNb  = self.PendingNb + 1
+                self.DeferredNb = self.DeferredNb + 1
+                
+        # DUE RAM image or default values written to PICMIC => expected values unknown
+        elif ( CmdId in (TCmd.SET_WR_DEF.value, TCmd.WR_ALL_REG.value) ):
+            self.FClear ( 1 )
+            
+        # Reset of PICMIC
+        elif ( CmdId == TCmd.CTRL_HW_SIG.value ):
+            if ( CmdADataW8[0] in (TCmdHwSig.SET_ST_ALL.value, TCmdHwSig.SET_ST_RST.value, TCmdHwSig.SET_ST_RST_I2C.value, TCmdHwSig.PULSE_RST.value, TCmdHwSig.PULSE_RST_I2C.value) ):
+                self.FClear ( 1 )
+                
+        return (CmdADataW8)
+        
+        
+    def FSubmitWrReg ( self, RegId, RegOp, RegAW8 ) :
+        return ( FSubmitCmd ( TCmd.SET_WR_REG.value, [RegId, RegOp, TPrePostOp.NONE.value, TPrePostOp.NONE.value, len ( RegAW8 )] + list ( RegAW8 ), 0 ) )
+        
+        
+    def FSubmitRdReg ( self, RegId ) :
+        return ( FSubmitCmd ( TCmd.GET_RD_REG.value, [RegId, TRegOp.HW.value, TPrePostOp.NONE.value, TPrePostOp.NONE.value, VGARegW8ESz[RegId]], VGARegW8ESz[RegId] ) )
+        
+        
+    def FVerifyRegs ( self ) :
+    
+        '''
+        ...
+        
+        Reads back the registers having expected values ( HW reads sent in pipeline ), the wrong registers
+        are rewritten with the CHK operation
+        
+        Returns
+        - An error code, 0 => OK, -3 DUE not responding, > 0 number of registers still wrong after retry
+        - Number of registers read <> expected
+        
+        '''
+        
+        VARegId = [VRegId for VRegId in range ( TRegId.REG_NB.value )
+                   if any ( [(VGARegAddr[VRegId] + VIndex) in self.DExpReg for VIndex in range ( VGARegW8ESz[VRegId] )] )]
+        
+        VATicket = []
+        
+        for VRegId in VARegId :
+            VErr, VTicket = self.FSubmitRdReg ( VRegId )
+            if ( VErr == 0 ):
+                VATicket.append ( (VRegId, VTicket) )
+                
+        VRet        = 0
+        VErrNb      = 0
+        VMismatchNb = 0
+        VARetry     = []
+        
+        for VRegId, VTicket in VATicket :
+        
+            VErr, VARead = FWaitCmd ( VTicket )
+            
+            if ( VErr == -3 ):
+                VRet = -3
+                
+            self.RdW8Nb = self.RdW8Nb + len ( VARead )
+            VRegAddress = VGARegAddr[VRegId]
+            
+            # Read failed => the register is rewritten, the CHK write will check it
+            
+            if ( (VErr != 0) or (len ( VARead ) != VGARegW8ESz[VRegId]) ):
+                VARead = [None] * VGARegW8ESz[VRegId]
+            
+            VAExp = [self.DExpReg.get ( VRegAddress + VIndex, VW8 ) for VIndex, VW8 in enumerate ( VARead )]
+            
+            if ( VAExp != VARead ):
+            
+                # Register partly expected and not read => cannot be rewritten
+                
+                if ( None in VAExp ):
+                    VErrNb = VErrNb + 1
+                    continue
+                    
+                VARetry.append ( (VRegId, VAExp) )
+                
+                if ( VErr == 0 ):
+                    VMismatchNb = VMismatchNb + 1
+                    
+        if ( VRet == -3 ):
+            return (VRet, VMismatchNb)
+                    
+        VATicket = []
+        
+        for VRegId, VAExp in VARetry :
+            VErr, VTicket = self.FSubmitWrReg ( VRegId, TRegOp.CHK.value, VAExp )
+            VATicket.append ( VTicket )
+            
+        for VTicket in VATicket :
+            if ( FWaitCmd ( VTicket ) != 0 ):
+                VErrNb = VErrNb + 1
+                
+        self.RegMismatchNb = self.RegMismatchNb + VMismatchNb
+        self.RetryErrNb    = self.RetryErrNb + VErrNb
+        
+        return (VErrNb, VMismatchNb)
+        
+        
+    def FSweepPix ( self, DExpPix ) :
+    
+        '''
+        ...
+        
+        Reads back pixels, one col selection per col, one row selection + one CONF_DATA read per pixel, in pipeline
+        
+        Param
+        - DExpPix  = Dict (Row, Col) => expected value of the pixels to read
+        
+        Returns
+        - An error code, 0 => OK, -3 DUE not responding
+        - The list of (Row, Col) of the pixels read <> expected or not read
+        
+        '''
+        
+        VDColRow = {}
+        
+        for VRow, VCol in sorted ( DExpPix ) :
+            VDColRow.setdefault ( VCol, [] ).append ( VRow )
+            
+        VAWrTicket = []
+        VARdTicket = []
+        
+        for VCol, VARow in VDColRow.items () :
+        
+            VErr, VTicket = self.FSubmitWrReg ( TRegId.CONF_COL.value, TRegOp.HW.value, [VCol] )
+            VAWrTicket.append ( VTicket )
+            
+            for VRow in VARow :
+                VErr, VTicket = self.FSubmitWrReg ( TRegId.PIX_CONF_ROW.value, TRegOp.HW.value, [VRow] )
+                VAWrTicket.append ( VTicket )
+                VErr, VTicket = self.FSubmitRdReg ( TRegId.CONF_DATA.value )
+                VARdTicket.append ( ((VRow, VCol), VTicket) )
+                
+        VRet      = 0
+        VAWrong   = []
+        
+        for VTicket in VAWrTicket :
+            if ( FWaitCmd ( VTicket ) == -3 ):
+                VRet = -3
+                
+        for VPix, VTicket in VARdTicket :
+        
+            VErr, VARead = FWaitCmd ( VTicket )
+            self.RdW8Nb = self.RdW8Nb + len ( VARead )
+            
+            if ( VErr == -3 ):
+                VRet = -3
+            
+            if ( (VErr != 0) or (VARead != [DExpPix[VPix]]) ):
+                VAWrong.append ( VPix )
+                
+        return (VRet, VAWrong)
+        
+        
+    def FVerifyPix ( self, PixSweep = 1 ) :
+    
+        '''
+        ...
+        
+        Reads back the pixels having expected values, the wrong pixels are rewritten ( HW ) and read back again,
+        the pixel config row / col registers are restored at the end
+        
+        Param
+        - PixSweep  = 1 => Pixels written alone only, 2 => Pixels written by broadcasts too ( whole matrix = 6912 reads )
+        
+        Returns
+        - An error code, 0 => OK, -3 DUE not responding, > 0 number of pixels still wrong after retry
+        - Number of pixels read <> expected
+        
+        '''
+        
+        VDExpPix = dict ( self.DExpPix )
+        
+        if ( PixSweep == 2 ):
+            VDExpPix.update ( self.DExpPixBc )
+        
+        if ( len ( VDExpPix ) == 0 ):
+            return (0, 0)
+            
+        VSelRow = self.SelRow
+        VSelCol = self.SelCol
+        
+        VRet, VAWrong = self.FSweepPix ( VDExpPix )
+        VMismatchNb   = len ( VAWrong )
+        
+        if ( (VRet == 0) and (VMismatchNb > 0) ):
+        
+            VATicket = []
+            
+            for VRow, VCol in VAWrong :
+                for VRegId, VW8 in ((TRegId.CONF_COL.value, VCol), (TRegId.PIX_CONF_ROW.value, VRow), (TRegId.CONF_DATA.value, VDExpPix[(VRow, VCol)])) :
+                    VErr, VTicket = self.FSubmitWrReg ( VRegId, TRegOp.HW.value, [VW8] )
+                    VATicket.append ( VTicket )
+                    
+            for VTicket in VATicket :
+                FWaitCmd ( VTicket )
+                
+            VRet, VAWrong = self.FSweepPix ( { VPix : VDExpPix[VPix] for VPix in VAWrong } )
+            
+            if ( VRet == 0 ):
+                VRet = len ( VAWrong )
+                self.RetryErrNb = self.RetryErrNb + VRet
+                
+        # Selection as before the verification, no col selected if unknown
+        
+        VATicket = [self.FSubmitWrReg ( TRegId.CONF_COL.value, TRegOp.HW.value, [PIX_COL_NONE if VSelCol == None else VSelCol] )[1]]
+        
+        if ( VSelRow != None ):
+            VATicket.append ( self.FSubmitWrReg ( TRegId.PIX_CONF_ROW.value, TRegOp.HW.value, [VSelRow] )[1] )
+            
+        for VTicket in VATicket :
+            FWaitCmd ( VTicket )
+            
+        self.SelRow = VSelRow
+        
+        self.PixMismatchNb = self.PixMismatchNb + VMismatchNb
+        
+        return (VRet, VMismatchNb)
+        
+        
+    def FVerify ( self, PixSweep = 1 ) :
+    
+        '''
+        ...
+        
+        Verifies the deferred writes : registers then pixels, the expected values are forgotten at the end
+        
+        Param
+        - PixSweep  = 0 => Registers only, 1 => Pixels written alone read back too, 2 => All written pixels read back
+        
+        Returns
+        - An error code, 0 => OK, -3 DUE not responding, > 0 number of registers / pixels still wrong after retry
+        - Number of registers / pixels read <> expected before retry
+        
+        '''
+        
+        if ( self.Running == 1 ):
+            return (0, 0)
+            
+        self.Running = 1
+        
+        try :
+            VRet, VMismatchNb = self.FVerifyRegs ()
+            
+            if ( (VRet >= 0) and (PixSweep > 0) ):
+                VRetPix, VPixMismatchNb = self.FVerifyPix ( PixSweep )
+                VMismatchNb = VMismatchNb + VPixMismatchNb
+                VRet        = VRetPix if VRetPix < 0 else VRet + VRetPix
+                
+        finally :
+            self.Running = 0
+            
+        self.VerifyNb = self.VerifyNb + 1
+        self.FClear ()
+        
+        return (VRet, VMismatchNb)
+        
+        
+    def FGetCounters ( self ) :
+    
+        '''
+        ...
+        
+        Returns
+        - A dict of counters : deferred writes, verifications, W8 read back, mismatches, errors after retry, values waiting for verification
+        
+        '''
+        return ( { "DeferredNb"    : self.DeferredNb,
+                   "VerifyNb"      : self.VerifyNb,
+                   "RdW8Nb"        : self.RdW8Nb,
+                   "RegMismatchNb" : self.RegMismatchNb,
+                   "PixMismatchNb" : self.PixMismatchNb,
+                   "RetryErrNb"    : self.RetryErrNb,
+                   "PendingRegNb"  : len ( self.DExpReg ),
+                   "PendingPixNb"  : len ( self.DExpPix ) + len ( self.DExpPixBc ) } )
+
+
+
+# Deferred verification of the default connection, used by FSubmitCmd
+
+VGRegVerifier = Picmic_RegVerifier ()
+
+
+
+class Picmic_WrCoalescer () :
+
+    '''
+    ...
+    
+    Coalescing of the single registers writes done by FCmdWrOneReg
+    
+    If enabled, FCmdWrOneReg only collects the writes, they are sent by FFlush : the writes of adjacent
+    addresses are merged in one WR_REG_LOW_LEVEL command ( see FCompileRegWrList ), the order of the writes is kept.
+    The pending writes are flushed automatically before any other command ( read, write, signals ... ) and when
+    the operation ( RegOp, PrePostOp, PrePostParam ) changes. The error of an automatic flush is returned
+    by the command which triggered it, this command is not sent ( see FSubmitCmd ).
+    
+    '''
+
+    def __init__ ( self ) :
+        self.Enabled  = 0     # 1 => FCmdWrOneReg writes are collected
+        self.Flushing = 0     # 1 => flush in progress
+        self.ARegWr   = []    # Pending writes, list of (register address, value)
+        self.Op       = None  # (RegOp, PrePostOp, PrePostParam) of the pending writes
+        self.LastErr  = 0     # Error code of the last flush
+        self.FResetCounters ()
+        
+        
+    def FResetCounters ( self ) :
+        self.WrNb     = 0 # FCmdWrOneReg calls collected
+        self.W8Nb     = 0 # W8 collected
+        self.CmdNb    = 0 # WR_REG_LOW_LEVEL commands sent
+        self.FlushNb  = 0 # Flushes with pending writes
+        self.ErrNb    = 0 # Flushes which failed
+        
+        
+    def FHasPending ( self ) :
+        return ( (len ( self.ARegWr ) > 0) and (self.Flushing == 0) )
+        
+        
+    def FPut ( self, RegAddr, RegOp,PrePostOp,PrePostParam, RegAW8 ) :
+    
+        '''
+        ...
+        
+        Collects a write, the pending writes are flushed before if the operation is not the same
+        
+        Returns
+        - The error code of the flush done before, 0 if no flush
+        
+        '''
+        
+        VRet = 0
+        VOp  = (RegOp, PrePostOp, PrePostParam)
+        
+        if ( (len ( self.ARegWr ) > 0) and (VOp != self.Op) ):
+            VRet = self.FFlush ()
+            
+        self.Op = VOp
+        self.ARegWr.extend ( [(RegAddr + VIndex, VW8) for VIndex, VW8 in enumerate ( RegAW8 )] )
+        self.WrNb = self.WrNb + 1
+        self.W8Nb = self.W8Nb + len ( RegAW8 )
+        
+        return (VRet)
+        
+        
+    def FFlush ( self ) :
+    
+        '''
+        ...
+        
+        Sends the pending writes, see FSendRegWrRuns
+        
+        Returns
+        - An error code, 0 => OK, < 0 => error of the first failed command, > 0 number of register R/W errors
+        
+        '''
+        
+        if ( (len ( self.ARegWr ) == 0) or (self.Flushing == 1) ):
+            return (0)
+            
+        VARun       = FCompileRegWrList ( self.ARegWr )
+        self.ARegWr = []
+        
+        self.Flushing = 1
+        
+        try :
+            VRet = FSendRegWrRuns ( VARun, *self.Op )
+        finally :
+            self.Flushing = 0
+            
+        self.CmdNb   = self.CmdNb + len ( VARun )
+        self.FlushNb = self.FlushNb + 1
+        self.LastErr = VRet
+        
+        if ( VRet != 0 ):
+            self.ErrNb = self.ErrNb + 1
+            
+        return (VRet)
+        
+        
+    def FGetCounters ( self ) :
+    
+        '''
+        ...
+        
+        Returns
+        - A dict of counters : writes / W8 collected, commands sent, flushes, failed flushes, pending W8
+        
+        '''
+        return ( { "WrNb"      : self.WrNb,
+                   "W8Nb"      : self.W8Nb,
+                   "CmdNb"     : self.CmdNb,
+                   "FlushNb"   : self.FlushNb,
+                   "ErrNb"     : self.ErrNb,
+                   "PendingNb" : len ( self.ARegWr ) } )
+
+
+
+# Coalescing of FCmdWrOneReg writes of the default connection
+
+VGWrCoalescer = Picmic_WrCoalescer ()
+
+
+
+class Picmic_RegJournal () :
+
+    '''
+    ...
+    
+    Journal of the registers writes sent to PICMIC ( file VGFileToSaveRegs )
+    
+    The commands are put in a queue and a background thread decodes and writes them in the file,
+    the file stays open, writes are buffered and flushed every FlushPeriodS, on FFlush and on FClose.
+    
+    File formats
+    - Text   : first line ":" + comment, then one "address,value" line per register W8
+    - Binary : REG_JOURNAL_BIN_MAGIC, comment size W16 little endian, comment utf-8, then 2 W8 per register W8 = address, value
+    
+    '''
+
+    def __init__ ( self, FlushPeriodS = 1.0 ) :
+        self.FlushPeriodS = FlushPeriodS
+        self.Queue        = queue.Queue ()
+        self.Thread       = None
+        self.File         = None
+        self.FileName     = None
+        self.Binary       = 0
+        self.Dirty        = 0
+        self.WrW8Nb       = 0  # Register W8 written in journal
+        
+        
+    def FStart ( self ) :
+    
+        '''
+        ...
+        
+        Starts the writer thread if not already running
+    
+        '''
+        
+        if ( (self.Thread == None) or (not self.Thread.is_alive ()) ):
+            self.Thread = threading.Thread ( target = self.FRun, name = "pm0_sc_journal" )
+            self.Thread.daemon = True
+            self.Thread.start ()
+            
+            
+    def FOpen ( self, FileName, Comment, Binary = 0 ) :
+    
+        '''
+        ...
+        
+        Creates a new journal file ( previous content erased ) which starts with the comment
+        
+        Param
+        - FileName  = Journal file name
+        - Comment   = Comment written at the beginning of the file
+        - Binary    = 0 => Text format, 1 => Binary format
+    
+        '''
+        
+        self.FStart ()
+        self.Queue.put ( ("open", FileName, Comment, Binary) )
+        
+        
+    def FPutCmd ( self, FileName, CmdId, CmdADataW8 ) :
+    
+        '''
+        ...
+        
+        Queues a command, its registers writes are appended to FileName by the writer thread
+        This is the only journal function called for each command => no file access, no formatting
+    
+        '''
+        
+        self.FStart ()
+        self.Queue.put ( ("cmd", FileName, CmdId, tuple ( CmdADataW8 )) )
+        
+        
+    def FFlush ( self, Close = 0, TimeoutS = 5.0 ) :
+    
+        '''
+        ...
+        
+        Writes all the queued commands to the file and waits until it is done
+        
+        Param
+        - Close     = 1 => The file is closed, it will be reopened in append mode by next command
+        - TimeoutS  = Maximum time to wait
+    
+        '''
+        
+        if ( (self.Thread == None) or (not self.Thread.is_alive ()) ):
+            return
+            
+        VDone = threading.Event ()
+        self.Queue.put ( ("flush", Close, VDone) )
+        VDone.wait ( TimeoutS )
+        
+        
+    def FClose ( self ) :
+        self.FFlush ( Close = 1 )
+        
+        
+    def FOpenFile ( self, FileName, Mode, Binary ) :
+    
+        # Writer thread only
+    
+        self.FCloseFile ()
+        
+        if ( Binary == 1 ):
+            self.File = open ( FileName, Mode + "b" )
+        else :
+            self.File = open ( FileName, Mode )
+            
+        self.FileName = FileName
+        self.Binary   = Binary
+        
+        
+    def FCloseFile ( self ) :
+    
+        # Writer thread only
+        
+        if ( self.File != None ):
+            self.File.close ()
+            self.File  = None
+            self.Dirty = 0
+            
+            
+    def FRun ( self ) :
+    
+        '''
+        ...
+        
+        Writer thread
+    
+        '''
+        logger = logging.getLogger('pm0_sc')
+        
+        VLastFlush = time.perf_counter ()
+        
+        while ( True ):
+        
+            try :
+                VItem = self.Queue.get ( timeout = self.FlushPeriodS )
+            except queue.Empty :
+                VItem = None
+                
+            try :
+            
+                if ( VItem == None ):
+                    pass
+                    
+                elif ( VItem[0] == "cmd" ):
+                
+                    VFileName, VCmdId, VCmdADataW8 = VItem[1:]
+                    
+                    VARegWr = FGetRegWrFromCmd ( VCmdId, VCmdADataW8 )
+                    
+                    if ( len ( VARegWr ) > 0 ):
+                    
+                        # Binary format can't be appended to a text file => text if the file is not the one opened by FOpen
+                    
+                        if ( (self.File == None) or (self.FileName != VFileName) ):
+                            self.FOpenFile ( VFileName, "a", 0 )
+                    
+                        if ( self.Binary == 1 ):
+                            self.File.write ( bytes ( [VW8 & 0xFF for VRegWr in VARegWr for VW8 in VRegWr] ) )
+                        else :
+                            self.File.write ( "".join ( ["{:d},{:d}\n".format (VRegAddress, VRegValue) for VRegAddress, VRegValue in VARegWr] ) )
+                            
+                        self.Dirty  = 1
+                        self.WrW8Nb = self.WrW8Nb + len ( VARegWr )
+                        
+                elif ( VItem[0] == "open" ):
+                
+                    VFileName, VComment, VBinary = VItem[1:]
+                    
+                    self.FOpenFile ( VFileName, "w", VBinary )
+                    
+                    if ( VBinary == 1 ):
+                        VComment = VComment.encode ( "utf-8" )
+                        self.File.write ( REG_JOURNAL_BIN_MAGIC + struct.pack ( "<H", len ( VComment ) ) + VComment )
+                    else :
+                        self.File.write ( ":" + VComment + "\n" )
+                        
+                    self.Dirty = 1
+                    
+                elif ( VItem[0] == "flush" ):
+                
+                    VClose, VDone = VItem[1:]
+                    
+                    if ( VClose == 1 ):
+                        self.FCloseFile ()
+                    elif ( self.File != None ):
+                        self.File.flush ()
+                        self.Dirty = 0
+                        
+                    VLastFlush = time.perf_counter ()
+                    VDone.set ()
+                    
+                    
+                # Periodic flush
+                
+                if ( (self.Dirty == 1) and (time.perf_counter () - VLastFlush >= self.FlushPeriodS) ):
+                    self.File.flush ()
+                    self.Dirty = 0
+                    VLastFlush = time.perf_counter ()
+                    
+            except IOError as e:
+                print ("I/O error({0}): {1}".format(e.errno, e.strerror))
+                logger.error("I/O error({0}): {1}".format(e.errno, e.strerror))
+                self.File = None
+                self.Dirty = 0
+                
+            except: #handle other exceptions such as attribute errors
+                logger.error ("Registers journal unexpected error:{}".format(sys.exc_info()[1]))
+                
+                
+
+# Registers journal used by FSubmitCmd
+
+VGRegJournal = Picmic_RegJournal ()
+
+atexit.register ( VGRegJournal.FClose )
+
+# Compiled registers journal files, SHA-1 of file content => (comments, writes list, W8 nb), see FCompileRegsSavingFile
+
+VGDRegReplayCache = collections.OrderedDict ()
+VGRegReplayLock   = threading.Lock ()
+
+
+
+def FReadRegsSavingFile ( FileName ) :
+
+    '''
+    ...
+    
+    Reads a registers journal file, text or binary format, see Picmic_RegJournal
+    
+    Param
+    - FileName  = Journal file name
+    
+    Returns
+    - The list of comments
+    - The list of (register address, value)
+    
+    '''
+    
+    with open ( FileName, "rb" ) as VFile:
+        VData = VFile.read ()
+        
+    return ( FParseRegsSavingData ( VData ) )
+
+
+
+def FParseRegsSavingData ( Data ) :
+
+    '''
+    ...
+    
+    Parses the content of a registers journal file, text or binary format, see FReadRegsSavingFile
+    
+    Param
+    - Data  = File content as bytes
+    
+    Returns
+    - The list of comments
+    - The list of (register address, value)
+    
+    '''
+    
+    VAComment = []
+    VARegWr   = []
+    
+    if ( Data[:len ( REG_JOURNAL_BIN_MAGIC )] == REG_JOURNAL_BIN_MAGIC ):
+    
+        Vi = len ( REG_JOURNAL_BIN_MAGIC )
+        VCommentSz = struct.unpack ( "<H", Data[Vi:Vi+2] )[0]
+        Vi = Vi + 2
+        VAComment.append ( Data[Vi:Vi+VCommentSz].decode ( "utf-8" ) )
+        Vi = Vi + VCommentSz
+        VARegWr = list ( zip ( Data[Vi::2], Data[Vi+1::2] ) )
+        
+    else :
+    
+        for VLine in Data.decode ( "utf-8" ).splitlines () :
+            if ( len ( VLine ) == 0 ):
+                continue
+            if ( VLine[0] == ':' ):
+                VAComment.append ( VLine[1:] )
+            else :
+                VAddrStr, VValueStr = VLine.split ( "," )
+                VARegWr.append ( (int ( VAddrStr ), int ( VValueStr )) )
+                
+    return (VAComment, VARegWr)
+
+
+
+def FCompileRegWrList ( ARegWr, MaxW8Nb = WR_REG_LOW_LEVEL_MAX_W8_NB ) :
+
+    '''
+    ...
+    
+    Merges the writes of contiguous addresses into multi W8 writes, the order of the writes is kept :
+    a write is merged with the previous one only if its address follows the last address of the previous one
+    
+    Param
+    - ARegWr   = List of (register address, value)
+    - MaxW8Nb  = Maximum number of W8 of a merged write
+    
+    Returns
+    - The list of (first register address, bytes of values), one item per WR_REG_LOW_LEVEL command
+    
+    '''
+    
+    VARun   = []
+    VAddr0  = -1
+    VRunW8  = bytearray ()
+    
+    for VAddr, VVal in ARegWr :
+    
+        if ( (VAddr != VAddr0 + len ( VRunW8 )) or (len ( VRunW8 ) >= MaxW8Nb) ):
+            if ( len ( VRunW8 ) > 0 ):
+                VARun.append ( (VAddr0, bytes ( VRunW8 )) )
+            VAddr0 = VAddr
+            VRunW8 = bytearray ()
+            
+        VRunW8.append ( VVal )
+        
+    if ( len ( VRunW8 ) > 0 ):
+        VARun.append ( (VAddr0, bytes ( VRunW8 )) )
+        
+    return (VARun)
+
+
+
+def FCompileRegsSavingFile ( FileName ) :
+
+    '''
+    ...
+    
+    Reads and compiles a registers journal file ( see FCompileRegWrList ), the compiled files are kept
+    in VGDRegReplayCache with the SHA-1 of their content as key => a known file is not parsed again
+    
+    Param
+    - FileName  = Journal file name
+    
+    Returns
+    - The list of comments
+    - The list of (first register address, bytes of values)
+    - The number of W8 written by the file
+    
+    '''
+    
+    with open ( FileName, "rb" ) as VFile:
+        VData = VFile.read ()
+        
+    VKey = hashlib.sha1 ( VData ).hexdigest ()
+    
+    with VGRegReplayLock :
+    
+        if ( VKey in VGDRegReplayCache ):
+            VGDRegReplayCache.move_to_end ( VKey )
+            return ( VGDRegReplayCache[VKey] )
+            
+    VAComment, VARegWr = FParseRegsSavingData ( VData )
+    VCompiled = (VAComment, FCompileRegWrList ( VARegWr ), len ( VARegWr ))
+    
+    with VGRegReplayLock :
+    
+        VGDRegReplayCache[VKey] = VCompiled
+        
+        while ( len ( VGDRegReplayCache ) > REG_REPLAY_CACHE_NB ):
+            VGDRegReplayCache.popitem ( last = False )
+            
+    return (VCompiled)
+
+
+
+  
+def FBuildCmdFrame ( CmdId, CmdADataW8, CmdRetADataW8Sz ) :
+
+    '''
+    ...
+    
+    Builds the bytearray of a command to Arduino
+    
+    Param
+    - CmdId           =  No of the command
+    - CmdADataW8      =  The command data as an array of W8
+    - CmdRetADataW8Sz =  Number of W8 returned by function in case it returns an array
+    
+    Returns
+    - An error code, 0 if ok, -1 buffer too big
+    - The command data converted in 7 bits bytearray
+    - Sent + received W8 number
+    
+    18/10/2026 ( moved from FSendCmd )
+    
+    '''
+    
+    VCmdToArduinoSz = len ( CmdADataW8 ) + 2 # + 2 for W[0],W[1] = CmdRetADataW8Sz, now 27/12/2021, only W[0] is used
+    
+    
+       
+    # Check size of buffer the Arduino must send back
+    
+    if ( CmdRetADataW8Sz > MAX_CMD_BUFF_SZ ):
+        print ( "Abort : Arduino returned buff sz {:d} > Max = {:d}".format (CmdRetADataW8Sz, MAX_CMD_BUFF_SZ)  )
+        return (-1, None, 0)
+
+    
+    # Check size of buffer to send to Arduino
+ 
+    if ( VCmdToArduinoSz > MAX_CMD_BUFF_SZ ):
+        print ( "Abort : Arduino received buff sz {:d} > Max = {:d}".format (VCmdToArduinoSz, MAX_CMD_BUFF_SZ)  )
+        return (-1, None, 0)
+ 
+ 
+    # Calculates total size of buffers : sent + received
+
+    VBuffW8Sz = VCmdToArduinoSz + CmdRetADataW8Sz + 1 # + 1 because RetAData contains also status code
+ 
+    # Build buffer to Arduino
+   
+    # Format of W8 buffer sent to Arduino
+    # W[0],W[1] = CmdRetADataW8Sz, size of array the Arduino must return, it can be 0, now 27/12/2021, only W[0] is used
+    # W[2], W[3], ... = CmdADataW8
+
+   
+    VCmdADataW8 = bytearray ()
+    
+    VCmdADataW8.append (CmdRetADataW8Sz) # W[0] = low 16 bits Expected returned / answser size
+    VCmdADataW8.append (0)               # W[1] = in FUTURE high 16 bits Expected returned / answser size, now 27/12/2021 => 0        
+    
+    # Since 10/02/2022 W16 are also handled, but not W32
+    
+    # 18/10/2026 : Only W8 => copied in one go
+    
+    if ( max ( CmdADataW8, default = 0 ) < 256 ):
+        VCmdADataW8.extend ( CmdADataW8 )
+        CmdADataW8 = []
+    
+    for VW8 in CmdADataW8:
+    
+        # W8 handling
+    
+#        if (type(VW8)==ct.c_ubyte):
+#            VCmdADataW8.append (VW8)
+            
+#        elif ( VW8 < 256 ) : 
+        if ( VW8 < 256 ) :   
+            VCmdADataW8.append (VW8)
+        
+        # W16 handling
+            
+        else : 
+            VCmdADataW8.append (VW8 & 0xFF) # First byte  = B7B0
+            VCmdADataW8.append (VW8 >> 8  ) # Second byte = B15B8
+
+    # 18/10/2026 : V2 codec returns directly the bytearray to send
+        
+    VCmdADataBA = FConVect8bToMidi7bV2 ( VCmdADataW8, 0 )
+    
+    return (0, VCmdADataBA, VBuffW8Sz)
+
+
+
+def FGetThreadSession ( ) :
+
+    '''
+    ...
+    
+    Returns the session bound to the calling thread, None => default session ( VGDefSession )
+    
+    '''
+    return ( getattr ( VGThreadSession, "Session", None ) )
+
+
+
+def FGetSession ( ) :
+
+    '''
+    ...
+    
+    Returns the session bound to the calling thread, VGDefSession if no session
+    
+    '''
+    VSession = getattr ( VGThreadSession, "Session", None )
+    
+    if ( VSession == None ):
+        return (VGDefSession)
+        
+    return (VSession)
+
+
+
+def FGetPipe ( ) :
+
+    '''
+    ...
+    
+    Returns the commands pipeline of the session bound to the calling thread, of VGDefSession if no session
+    
+    '''
+    return ( FGetSession ().Pipe )
+
+
+
+def FGetRegShadow ( ) :
+
+    '''
+    ...
+    
+    Returns the registers shadow of the session bound to the calling thread, of VGDefSession if no session
+    
+    '''
+    return ( FGetSession ().RegShadow )
+
+
+
+def FGetRegVerifier ( ) :
+
+    '''
+    ...
+    
+    Returns the deferred verification of the session bound to the calling thread, of VGDefSession if no session
+    
+    '''
+    return ( FGetSession ().RegVerifier )
+
+
+
+def FGetWrCoalescer ( ) :
+
+    '''
+    ...
+    
+    Returns the writes coalescing of the session bound to the calling thread, of VGDefSession if no session
+    
+    '''
+    return ( FGetSession ().WrCoalescer )
+
+
+
+def FGetMetrics ( ) :
+
+    '''
+    ...
+    
+    Returns the commands metrics of the session bound to the calling thread, of VGDefSession if no session
+    
+    '''
+    return ( FGetSession ().Metrics )
+
+
+
+@FSessionLocked
+def FSubmitCmd ( CmdId, CmdADataW8, CmdRetADataW8Sz ) :
+
+    '''
+    ...
+    
+    Sends a command to Arduino without waiting for its answer, the answer is got with FWaitCmd
+    Several commands can be submitted before waiting for the first answer, up to VGCmdWindowSz are in flight
+    
+    Param
+    - CmdId           =  No of the command
+    - CmdADataW8      =  The command data as an array of W8
+    - CmdRetADataW8Sz =  Number of W8 returned by function in case it returns an array
+    
+    Returns
+    - An error code, 0 if ok, -1 sw error, or the error of the pending FCmdWrOneReg writes flushed before the command
+      ( < 0, -2 if registers R/W errors ) => the command is not sent
+    - The ticket of the command, None in case of error
+    
+    '''
+    logger = logging.getLogger('pm0_sc')
     
+    # Pending FCmdWrOneReg writes sent before any other command, their error is given to the caller of this command
     
-    VCmdRq = [Reserved]
+    VWrCoalescer = FGetWrCoalescer ()
+    
+    if ( VWrCoalescer.FHasPending () ):
+    
+        VErr = VWrCoalescer.FFlush ()
+        
+        if ( VErr != 0 ):
+            logger.error ( "Pending FCmdWrOneReg writes failed before command {:d} - Error = {:d} => command not sent".format (CmdId, VErr) )
+            return ( (VErr if ( VErr < 0 ) else -2), None )
+    
+    # Deferred verification : CHK writes sent as HW writes, verified every EveryNb writes or by FVerifyDeferred
+    
+    VRegVerifier = FGetRegVerifier ()
+    
+    if ( VRegVerifier.FIsDue () ):
+        VRegVerifier.FVerify ( VRegVerifier.PixSweep )
+    
+    CmdADataW8 = VRegVerifier.FOnSubmit ( CmdId, CmdADataW8 )
+    
+    # Save i2c orders to file, done by the journal thread, only for the default connection
+    if ( (VGRegSaveToFile != 0) and (FGetSession () == VGDefSession) ):
+        VGRegJournal.FPutCmd ( VGFileToSaveRegs, CmdId, CmdADataW8 )
+    
+    VErr, VCmdADataBA, VBuffW8Sz = FBuildCmdFrame ( CmdId, CmdADataW8, CmdRetADataW8Sz )
+    
+    if ( VErr < 0 ):
+        return (VErr, None)
+    
+    # Registers already in PICMIC => the command is not sent, it is answered OK at once ( one OK status per register for a batch )
+    
+    if ( FGetRegShadow ().FOnSubmit ( CmdId, CmdADataW8 ) == 1 ):
+        VTicket = Picmic_CmdTicket ( -1, CmdId, CmdRetADataW8Sz, 0, 0 )
+        VTicket.Ready = 1
+        VTicket.Ret   = 0
+        VTicket.AAns  = [0] * CmdRetADataW8Sz
+        return (0, VTicket)
+    
+    VTicket = FGetPipe ().FSubmit ( CmdId, VCmdADataBA, CmdRetADataW8Sz, VBuffW8Sz )
+    VTicket.CmdADataW8 = CmdADataW8
+    
+    return (0, VTicket)
+
+
+
+@FSessionLocked
+def FWaitCmd ( Ticket, TimeoutS = None ) :
+
+    '''
+    ...
+    
+    Waits for the answer of a command sent by FSubmitCmd
+    
+    Param
+    - Ticket          =  The ticket returned by FSubmitCmd
+    - TimeoutS        =  Maximum DUE silence time before failing the command, None => VGCmdTimeoutS
+    
+    Returns
+    - An error code, 0 if ok, -3 DUE not responding
+    - An array of results if the command returns an array
+    
+    '''
+    
+    VSession = FGetSession ()
+    
+    # Ticket.Seq < 0 => command skipped by the registers shadow
+    
+    if ( Ticket.Seq >= 0 ):
+        VSession.Pipe.FWait ( Ticket, TimeoutS )
+        VSession.RegShadow.FOnAnswer ( Ticket.CmdId, Ticket.CmdADataW8, Ticket.Ret, Ticket.AAns )
+    
+    # Kept for FPrintArdAns
+    
+    VSession.AAns    = Ticket.AAns
+    VSession.TimeBeg = Ticket.TimeBeg
+    
+    if ( Ticket.RetW8Sz == 0 ):
+        return ( Ticket.Ret )
+        
+    else:
+        return (Ticket.Ret, Ticket.AAns) 
+
+
+
+@FSessionLocked
+def FSendCmd ( CmdId, CmdADataW8, CmdRetADataW8Sz ) :
+
+    '''
+    ...
+    
+    Sents a command to Arduino and waits for its answer
+    
+    Param
+    - CmdId           =  No of the command
+    - CmdADataW8      =  The command data as an array of W8
+    - CmdRetADataW8Sz =  Number of W8 returned by function in case it returns an array
+    
+    Returns
+    - An error code, 0 if ok
+    - An optionnal array of results, returned also in case of error ( empty array ) if CmdRetADataW8Sz > 0
+    
+    26/12/2021 G.CLAUS CNRS/IN2P3/IPHC/C4PI  
+    18/10/2026 : uses the commands pipeline => FSubmitCmd + FWaitCmd
+    
+    '''
+    
+    VErr, VTicket = FSubmitCmd ( CmdId, CmdADataW8, CmdRetADataW8Sz )
+    
+    if ( VErr < 0 ):
+    
+        if ( CmdRetADataW8Sz == 0 ):
+            return ( VErr )
+        else:
+            return (VErr, [])
+    
+    return ( FWaitCmd ( VTicket ) )
+
+
+
+    
+    
+@FSessionLocked
+def FCmdSetLog ( LogRaw, LogCmd ) :
+
+    ''' 
+    ... 
+    
+    Sents a command set log (PM0SC__CMD_SET_LOG) to Arduino
+    
+    Param
+    - LogRaw      =  0 => No log, 1 => Log commands raw data request and answer buffer
+    - LogCmd      =  0 => No log, 1 => Log cmd name, 2= Log cmd name + data, results
+    
+    Returns
+    - An error code, 0 => OK, < 0 => error
+    - An optionnal array of results
+    
+    27/12/2021 G.CLAUS CNRS/IN2P3/IPHC/C4PI    
+    
+    '''
+    
+    VRet = 0
+    
+    VCmdRq = [LogRaw,LogCmd ]
      
     # FSendCmd ( CmdId, CmdADataW8, CmdRetADataW8Sz )
      
-    VRet,VAStatus = FSendCmd ( TCmd.GET_STATUS.value, VCmdRq, 2 )
+    VRet = FSendCmd ( TCmd.SET_LOG.value, VCmdRq, 0 )
+    
+    if ( VRet < 0 ):
+        print ( "Cmd set log failed !" )
+    
+    return (VRet)
+
+ 
+
+    
+@FSessionLocked
+def FCmdGetStatus ( Reserved ) :
+
+    '''
+    ...
+    
+    Sents a command get status (PM0SC__CMD_GET_STATUS) to Arduino
+    
+    Param
+    - Reserved    =  A W8 param reserved for future use
+    
+    Returns
+    - An error code, 0 => OK, < 0 => error
+    - An array of [SW status, HW status]
+    
+    27/12/2021 G.CLAUS CNRS/IN2P3/IPHC/C4PI
+    
+    '''
+    
+
     
-    VAStatus[0] = FConvU8ToS8 ( VAStatus[0] )
-    VAStatus[1] = FConvU8ToS8 ( VAStatus[1] )
+    VRet = 0
     
     
+    VCmdRq = [Reserved]
+     
+    # FSendCmd ( CmdId, CmdADataW8, CmdRetADataW8Sz )
+     
+    VRet,VAStatus = FSendCmd ( TCmd.GET_STATUS.value, VCmdRq, 2 )
+
     if ( VRet < 0 ):
-        VAStatus[0] = -128
-        VAStatus[1]= -128
+        VAStatus = [-128, -128]
         print ( "Cmd get status failed !" )
+
+    else :
+        VAStatus[0] = FConvU8ToS8 ( VAStatus[0] )
+        VAStatus[1] = FConvU8ToS8 ( VAStatus[1] )
     
     return (VRet,VAStatus)
 
@@ -852,6 +4158,7 @@ def FCmdGetStatus ( Reserved ) :
  
  
     
+@FSessionLocked
 def FCmdSetWrReg ( RegId, RegOp,PrePostOp,PrePostParam, RegAW8 ) :
 
     '''
@@ -886,6 +4193,14 @@ def FCmdSetWrReg ( RegId, RegOp,PrePostOp,PrePostParam, RegAW8 ) :
         FPrintErrMsg ( "Abort : Data sz = {:d} != Register sz = {:d}".format (VDataSz, VRegSz) )
         return (-1)
     
+    # 18/10/2026 : Registers shadow with partial writes enabled => only the modified W8 are written
+    
+    VSpan = FGetRegShadow ().FGetDirtySpan ( RegId, RegOp, RegAW8 )
+    
+    if ( VSpan != None ):
+        logger.debug ( "Register {:d} W8 {:d} to {:d} written".format (RegId, VSpan[0], VSpan[1]) )
+        return ( FCmdWrOneReg ( VGARegAddr[RegId] + VSpan[0], RegOp,PrePostOp,PrePostParam, RegAW8[VSpan[0]:VSpan[1]+1] ) )
+    
     # Build request buffer
     
     VCmdRq = [RegId, RegOp,PrePostOp,PrePostParam, VRegSz]
@@ -952,6 +4267,7 @@ def FCmdSetWrReg ( RegId, RegOp,PrePostOp,PrePostParam, RegAW8 ) :
     return (VRet)
 
  
+@FSessionLocked
 def FCmdWrOneReg ( RegAddr, RegOp,PrePostOp,PrePostParam, RegAW8 ) :
 
     '''
@@ -966,12 +4282,20 @@ def FCmdWrOneReg ( RegAddr, RegOp,PrePostOp,PrePostParam, RegAW8 ) :
     
     Returns
     - An error code, 0 => OK, -1 sw error, -2 readback value <> write one 
+      If the writes coalescing is enabled ( FEnableWrCoalescing ) the write is only collected, 0 is returned
+      or the error of the pending writes flushed before, the errors of this write are returned by FFlushWrOneReg
     
     17/05/2023 M.SPECHT CNRS/IN2P3/IPHC/C4PI
+    18/10/2026 : writes coalescing
     
     '''
     logger = logging.getLogger('pm0_sc')
     
+    VWrCoalescer = FGetWrCoalescer ()
+    
+    if ( VWrCoalescer.Enabled == 1 ):
+        return ( VWrCoalescer.FPut ( RegAddr, RegOp,PrePostOp,PrePostParam, RegAW8 ) )
+    
 
     
     VRet = 0
@@ -1049,7 +4373,302 @@ def FCmdWrOneReg ( RegAddr, RegOp,PrePostOp,PrePostParam, RegAW8 ) :
  
  
  
+
+def FBuildWrRegBatchFrames ( RegOp,PrePostOp,PrePostParam, RegIdAW8List ) :
+
+    '''
+    ...
+    
+    Packs a list of registers writes in WR_REG_BATCH command frames
+    
+    Each frame is [RegOp,PrePostOp,PrePostParam, RegNb, RegId, W8 ..., RegId, W8 ..., ...]
+    and contains as many registers as possible without exceeding MAX_CMD_BUFF_SZ
+    
+    Param
+    - RegOp        = Operation, see TRegOp => SW (sets ram image), HW (sets RAM image + write to PICMIC), CHK => HW + read back and compare
+    - PrePostOp    = Pre / post operation mode, see TPrePostOp
+    - PrePostParam = Pre / post operation param
+    - RegIdAW8List = List of (RegId, RegAW8), RegAW8 = array of data to be written in register RegId
+    
+    Returns
+    - An error code, 0 => OK, -1 sw error ( bad register size )
+    - A list of frames, each frame is an array of W8
+    
+    '''
+    
+    VAFrames = []
+    VFrame   = []
+    
+    # FSendCmd adds 2 W8 to the frame ( answer size )
+    
+    VFrameMaxSz = MAX_CMD_BUFF_SZ - 2
+    
+    for VRegId, VRegAW8 in RegIdAW8List :
+    
+        VRegSz = VGARegW8ESz[VRegId]
+        
+        if ( len ( VRegAW8 ) != VRegSz ):
+            FPrintErrMsg ( "Abort : Data sz = {:d} != Register sz = {:d}".format (len ( VRegAW8 ), VRegSz) )
+            return (-1, [])
+        
+        # Current frame full => close it and start a new one
+        
+        if ( (len ( VFrame ) > 0) and (len ( VFrame ) + 1 + VRegSz > VFrameMaxSz) ):
+            VAFrames.append ( VFrame )
+            VFrame = []
+        
+        if ( len ( VFrame ) == 0 ):
+            VFrame = [RegOp, PrePostOp, PrePostParam, 0]
+        
+        VFrame.append ( VRegId )
+        VFrame.extend ( VRegAW8 )
+        VFrame[3] = VFrame[3] + 1
+        
+    if ( len ( VFrame ) > 0 ):
+        VAFrames.append ( VFrame )
+    
+    return (0, VAFrames)
+
+
+
+@FSessionLocked
+def FCmdSetWrRegBatch ( RegOp,PrePostOp,PrePostParam, RegIdAW8List ) :
+
+    '''
+    ...
+    
+    Set / write a list of registers to PICMIC
+    
+    If VGWrRegBatchEnabled = 1, the writes are packed in WR_REG_BATCH frames => one round-trip
+    for several registers, otherwise one SET_WR_REG command is sent per register
+    In both cases the commands are pipelined, see FSubmitCmd
+    
+    Param
+    - RegOp        = Operation, see TRegOp => SW (sets ram image), HW (sets RAM image + write to PICMIC), CHK => HW + read back and compare
+    - PrePostOp    = Pre / post operation mode, see TPrePostOp
+    - PrePostParam = Pre / post operation param
+    - RegIdAW8List = List of (RegId, RegAW8), written in the list order
+    
+    Returns
+    - An error code, 0 => OK, -1 sw error, -2 I2C error, -3 DUE not responding, > 0 number of register R/W errors
+    - A list of error codes, one per register of RegIdAW8List, same meaning as FCmdSetWrReg result
+    
+    '''
+    logger = logging.getLogger('pm0_sc')
+    
+    VRet = 0
+    
+    
+    # Check registers size
+    
+    for VRegId, VRegAW8 in RegIdAW8List :
+    
+        VRegSz = VGARegW8ESz[VRegId]
+        
+        if ( len ( VRegAW8 ) != VRegSz ):
+            FPrintErrMsg ( "Abort : Data sz = {:d} != Register sz = {:d}".format (len ( VRegAW8 ), VRegSz) )
+            return (-1, [-1] * len ( RegIdAW8List ))
+    
+    
+    # Registers already in PICMIC are skipped, their error code is 0
+    
+    VAKeep = FGetRegShadow ().FFilterWrList ( RegOp, RegIdAW8List )
+    
+    VAOpErr  = [0] * len ( RegIdAW8List )
+    VAOpIdx  = [VIndex for VIndex, VKeep in enumerate ( VAKeep ) if VKeep == 1]
+    VARegWr  = [RegIdAW8List[VIndex] for VIndex in VAOpIdx]
+    VASentErr = []
+    
+    
+    # Builds the list of commands to send : (CmdId, CmdADataW8, CmdRetADataW8Sz, registers nb)
+    
+    VACmd = []
+    
+    # No batch command in DUE firmware => one SET_WR_REG command per register
+    
+    if ( VGWrRegBatchEnabled == 0 ):
+    
+        for VRegId, VRegAW8 in VARegWr :
+            VACmd.append ( (TCmd.SET_WR_REG.value, [VRegId, RegOp,PrePostOp,PrePostParam, VGARegW8ESz[VRegId]] + list ( VRegAW8 ), 0, 1) )
+            
+    else :
+    
+        VErr, VAFrames = FBuildWrRegBatchFrames ( RegOp,PrePostOp,PrePostParam, VARegWr )
+        
+        if ( VErr < 0 ):
+            return (VErr, [VErr] * len ( RegIdAW8List ))
+        
+        # One status W8 per register is returned
+        
+        for VFrame in VAFrames :
+            VACmd.append ( (TCmd.WR_REG_BATCH.value, VFrame, VFrame[3], VFrame[3]) )
+    
+    
+    # All commands are submitted before waiting for the answers => up to VGCmdWindowSz commands in flight
+    
+    VATicket = []
+    
+    for VCmdId, VCmdRq, VRetSz, VRegNb in VACmd :
+        logger.debug ( "Data sent : {}".format(VCmdRq) )
+        VATicket.append ( FSubmitCmd ( VCmdId, VCmdRq, VRetSz ) )
+    
+    for (VCmdId, VCmdRq, VRetSz, VRegNb), (VErr, VTicket) in zip ( VACmd, VATicket ) :
+    
+        if ( VErr < 0 ):
+            VASentErr.extend ( [VErr] * VRegNb )
+            continue
+        
+        VAns = FWaitCmd ( VTicket )
+        
+        if ( VRetSz == 0 ):
+            VASentErr.append ( VAns )
+            continue
+        
+        VFrameErr, VAStatus = VAns
+        
+        if ( (VFrameErr < 0) or (len ( VAStatus ) != VRegNb) ):
+            if ( VFrameErr >= 0 ):
+                VFrameErr = -1
+                FPrintErrMsg ( "Abort => Batch status sz from uC = {:d} <> expected sz = {:d}".format (len ( VAStatus ), VRegNb) )
+            VASentErr.extend ( [VFrameErr] * VRegNb )
+        else :
+            VASentErr.extend ( [FConvU8ToS8 ( _ ) for _ in VAStatus] )
+    
+    for VIndex, VErr in zip ( VAOpIdx, VASentErr ) :
+        VAOpErr[VIndex] = VErr
+    
+    
+    # Global error code : first error < 0, else total number of register R/W errors
+    
+    for VOpErr in VAOpErr :
+    
+        if ( VOpErr < 0 ):
+            VRet = VOpErr
+            break
+        
+        VRet = VRet + VOpErr
+    
+    if ( VRet > 0 ) :
+        FPrintErrMsg ( "Abort => {:d} register R/W errors".format (VRet) )
+    
+    if ( VRet == -1 ):
+        FPrintErrMsg ( "Abort => SW error" )
+    
+    if ( VRet == -2 ):
+        FPrintErrMsg ( "Abort => I2C error" )
+    
+    if ( VRet == -3 ):
+        FPrintErrMsg ( "Abort => DUE not responding" )
+    
+    return (VRet, VAOpErr)
+ 
+ 
+ 
+     
+@FSessionLocked
+def FSendRegWrRuns ( ARun, RegOp,PrePostOp,PrePostParam ) :
+
+    '''
+    ...
+    
+    Sends runs of contiguous registers writes built by FCompileRegWrList, one WR_REG_LOW_LEVEL command
+    per run, the commands are pipelined, see FSubmitCmd
+    
+    Param
+    - ARun         = List of (first register address, values)
+    - RegOp        = Operation, see TRegOp
+    - PrePostOp    = Pre / post operation mode, see TPrePostOp
+    - PrePostParam = Pre / post operation param
+    
+    Returns
+    - An error code, 0 => OK, -1 sw error, -2 I2C error, -3 DUE not responding, > 0 number of register R/W errors
+    
+    '''
+    
+    VRet = 0
+    
+    
+    # All commands are submitted before waiting for the answers => up to VGCmdWindowSz commands in flight
+    
+    VATicket = []
+    
+    for VAddr, VRunW8 in ARun :
+        VATicket.append ( FSubmitCmd ( TCmd.WR_REG_LOW_LEVEL.value, [VAddr, RegOp,PrePostOp,PrePostParam, len ( VRunW8 )] + list ( VRunW8 ), 0 ) )
+        
+    VAOpErr = []
+    
+    for VErr, VTicket in VATicket :
+    
+        if ( VErr < 0 ):
+            VAOpErr.append ( VErr )
+        else :
+            VAOpErr.append ( FWaitCmd ( VTicket ) )
+    
+    
+    # Global error code : first error < 0, else total number of register R/W errors
+    
+    for VOpErr in VAOpErr :
+    
+        if ( VOpErr < 0 ):
+            VRet = VOpErr
+            break
+        
+        VRet = VRet + VOpErr
+    
+    if ( VRet > 0 ) :
+        FPrintErrMsg ( "Abort => {:d} register R/W errors".format (VRet) )
+    
+    if ( VRet == -1 ):
+        FPrintErrMsg ( "Abort => SW error" )
+    
+    if ( VRet == -2 ):
+        FPrintErrMsg ( "Abort => I2C error" )
+    
+    if ( VRet == -3 ):
+        FPrintErrMsg ( "Abort => DUE not responding" )
+    
+    return (VRet)
+ 
+ 
+ 
+     
+@FSessionLocked
+def FReplayRegsSavingFile ( FileName, RegOp,PrePostOp,PrePostParam ) :
+
+    '''
+    ...
+    
+    Writes to PICMIC the registers of a registers journal file ( I2C requests file )
+    
+    The file is compiled by FCompileRegsSavingFile : one WR_REG_LOW_LEVEL command per run of contiguous
+    addresses instead of one command per W8, the commands are pipelined, see FSubmitCmd
+    
+    Param
+    - FileName     = Journal file name, text or binary format
+    - RegOp        = Operation, see TRegOp => SW (sets ram image), HW (sets RAM image + write to PICMIC), CHK => HW + read back and compare
+    - PrePostOp    = Pre / post operation mode, see TPrePostOp
+    - PrePostParam = Pre / post operation param
+    
+    Returns
+    - An error code, 0 => OK, -1 sw error, -2 I2C error, -3 DUE not responding, > 0 number of register R/W errors
+    - The number of W8 written
+    - The number of commands sent
+    
+    '''
+    logger = logging.getLogger('pm0_sc')
+    
+    VAComment, VARun, VW8Nb = FCompileRegsSavingFile ( FileName )
+    
+    logger.debug ( "Replay of {:s} : {:d} W8 in {:d} commands".format (FileName, VW8Nb, len ( VARun )) )
+    
+    VRet = FSendRegWrRuns ( VARun, RegOp,PrePostOp,PrePostParam )
+    
+    return (VRet, VW8Nb, len ( VARun ))
+ 
+ 
+ 
      
+@FSessionLocked
 def FCmdGetRdReg ( RegId, RegOp,PrePostOp,PrePostParam ) :
 
     '''
@@ -1093,7 +4712,7 @@ def FCmdGetRdReg ( RegId, RegOp,PrePostOp,PrePostParam ) :
     VRegSzFromUc = len ( VARead )
     logger.info ( "Data read : {}".format(VARead) )
     
-    if ( VRegSzFromUc != VRegSz ):
+    if ( (VRet >= 0) and (VRegSzFromUc != VRegSz) ):
         VRet = -1
         FPrintErrMsg ( "Abort => Register sz from uC = {:d} <> expected register sz = {:d}".format (VRegSzFromUc, VRegSz) )
     
@@ -1104,10 +4723,14 @@ def FCmdGetRdReg ( RegId, RegOp,PrePostOp,PrePostParam ) :
     if ( VRet == -2 ):
         FPrintErrMsg ( "Abort => I2C error : Readback register <> write one" )
    
+    if ( VRet == -3 ):
+        FPrintErrMsg ( "Abort => DUE not responding" )
+   
     return (VRet,VARead)
 
  
      
+@FSessionLocked
 def FCmdSetWrDef ( RegOp, DefOp, DefVal ) :
 
     '''
@@ -1154,6 +4777,7 @@ def FCmdSetWrDef ( RegOp, DefOp, DefVal ) :
 
  
      
+@FSessionLocked
 def FCmdWrAllReg ( RegOp ) :
 
     '''
@@ -1197,6 +4821,7 @@ def FCmdWrAllReg ( RegOp ) :
  
  
      
+@FSessionLocked
 def FCmdRdAllReg ( RegOp ) :
 
     '''
@@ -1242,6 +4867,7 @@ def FCmdRdAllReg ( RegOp ) :
 
   
  
+@FSessionLocked
 def FCmdTestI2CRegs ( RegId, ItNb ) :
 
     '''
@@ -1287,6 +4913,7 @@ def FCmdTestI2CRegs ( RegId, ItNb ) :
 
  
      
+@FSessionLocked
 def FCmdCtrlHwSig ( Cmd, RstSt, RstI2CSt, StartSt, TestmodeSt, PulseWidthUs ) :
 
     ''' 
@@ -1330,6 +4957,7 @@ def FCmdCtrlHwSig ( Cmd, RstSt, RstI2CSt, StartSt, TestmodeSt, PulseWidthUs ) :
 
 
 
+@FSessionLocked
 def FCmdActivateOutputs (RegOp  ) :
 
     ''' 
@@ -1345,111 +4973,476 @@ def FCmdActivateOutputs (RegOp  ) :
     
     29/09/2022 M.SPECHT CNRS/IN2P3/IPHC/C4PI    
     
-    '''       
+    '''       
+    
+    VRet = 0
+    
+    # Build request buffer
+    
+    VCmdRq = [RegOp]
+    
+     
+    # FSendCmd ( CmdId, CmdADataW8, CmdRetADataW8Sz )
+     
+       
+     
+    VRet = FSendCmd ( TCmd.ACTIVATE_OUTPUTS.value, VCmdRq, 0 )
+    
+    
+    if ( VRet < 0 ):
+        print ( "Cmd set ctrl HW signals failed !" )
+    
+    
+    return (VRet)
+
+ 
+@FSessionLocked
+def FCmdDeactivateOutputs (RegOp  ) :
+
+    ''' 
+    ... 
+    
+    Sents a command activate outputs ( PM0SC__CMD_ACTIVATE_OUTPUTS) to Arduino
+    
+    Param
+    - RegOp  = Operation, see TRegOp => SW or HW => Writes register to PICMIC, CHK => Write registers + read back and compare
+    
+    Returns
+    - An error code, 0 => OK, < 0 => error
+    
+    29/09/2022 M.SPECHT CNRS/IN2P3/IPHC/C4PI    
+    
+    '''       
+    
+    VRet = 0
+    
+    # Build request buffer
+    
+    VCmdRq = [RegOp]
+    
+     
+    # FSendCmd ( CmdId, CmdADataW8, CmdRetADataW8Sz )
+     
+       
+     
+    VRet = FSendCmd ( TCmd.DEACTIVATE_OUTPUTS.value, VCmdRq, 0 )
+    
+    
+    if ( VRet < 0 ):
+        print ( "Cmd set ctrl HW signals failed !" )
+    
+    
+    return (VRet)
+ 
+ 
+def FPrintArdAns () :
+
+    # 18/10/2026 : Answer of the last command of the session
+    
+    print ( "" )
+    print ( "VGAArdAns = {}".format (FGetSession ().AAns) )
+    print ( "" )
+
+
+def FSetRegsSavingFileName(FileName,Comment,Binary = 0):
+    '''
+    ...
+    
+    Sets the file name 
+    
+    
+    It stores data in global variable VGAArdAns
+    It sets the flag VGArdAnsReady after data reception
+    It VPrint is set to 1, it prints
+    - the request "loop back time" = time elapsed since request sending to UC until getting data back
+    - the data, up to 255 W8
+    
+    Param
+    - FileName          =  Name of the file to store the I2C registers values to be sent to picmic 
+    - Comment           =  Comment written at the beginning of the file
+    - Binary            =  0 => Text file, 1 => Binary file, see Picmic_RegJournal
+    
+    Returns
+    - Nothing
+    
+    16/05/2023 M.SPECHT CNRS/IN2P3/IPHC/C4PI    
+    
+    '''
+    global VGFileToSaveRegs
+
+
+
+    VGFileToSaveRegs = FileName
+    
+    # 18/10/2026 : the file is written by the journal thread, wait for it to be created to check errors
+    
+    VGRegJournal.FOpen ( VGFileToSaveRegs, Comment, Binary )
+    VGRegJournal.FFlush ()
+    
+    if ( VGRegJournal.File == None ):
+        print('Could not write the saving file')
+        
+
+
+def FEnableWrRegBatch ( Enable ) :
+
+    '''
+    ...
+    
+    Enables / disables the WR_REG_BATCH command used by FCmdSetWrRegBatch
+    To be enabled only with a DUE firmware which handles the WR_REG_BATCH command
+    
+    Param
+    - Enable  = 0 => One SET_WR_REG command per register, 1 => WR_REG_BATCH command
+    
+    Returns
+    - Nothing
+    
+    '''
+    global VGWrRegBatchEnabled
+    VGWrRegBatchEnabled = Enable
+
+
+
+def FEnableRawSerial ( Enable ) :
+
+    '''
+    ...
+    
+    Selects the transport used by the next FConnect without RawSerial param
+    
+    Param
+    - Enable  = 0 => pyfirmata.Arduino, 1 => Picmic_RawSerialBoard ( SysEx over pyserial, bulk reads )
+    
+    Returns
+    - Nothing
+    
+    '''
+    global VGRawSerial
+    VGRawSerial = Enable
+
+
+
+def FEnableRegShadow ( Enable, PartialWr = 0 ) :
+
+    '''
+    ...
+    
+    Enables / disables the skipping of registers writes whose value is already in PICMIC
+    
+    The values known by the shadow are forgotten on PICMIC reset, on errors, on WR_ALL_REG / SET_WR_DEF /
+    TEST_I2C_REGS / ACTIVATE_OUTPUTS / DEACTIVATE_OUTPUTS commands and by FRegShadowResync. A power cycle of PICMIC is not seen => call FRegShadowResync after it.
+    
+    Param
+    - Enable     = 0 => All writes are sent, 1 => Redundant writes are skipped
+    - PartialWr  = 1 => FCmdSetWrReg writes only the modified W8 span of a register ( WR_REG_LOW_LEVEL command )
+                   Warning : the DUE RAM image used by WR_ALL_REG may not be updated by WR_REG_LOW_LEVEL
+    
+    Returns
+    - Nothing
+    
+    '''
+    VRegShadow = FGetRegShadow ()
+    VRegShadow.Enabled   = Enable
+    VRegShadow.PartialWr = PartialWr
+
+
+
+def FGetRegShadowCounters ( Reset = 0 ) :
+
+    '''
+    ...
+    
+    Gets the registers shadow counters
+    
+    Param
+    - Reset  = 1 => Counters are reset after reading
+    
+    Returns
+    - A dict : WrRegNb = register writes requested, WrRegSavedNb = register writes skipped,
+      WrW8SavedNb = W8 not written, InvalidateNb = invalidations nb, KnownW8Nb = W8 known in shadow
+    
+    '''
+    VDCounters = FGetRegShadow ().FGetCounters ()
+    
+    if ( Reset == 1 ):
+        FGetRegShadow ().FResetCounters ()
+        
+    return (VDCounters)
+
+
+
+@FSessionLocked
+def FRegShadowResync ( ReadBack = 0 ) :
+
+    '''
+    ...
+    
+    Forgets all values of the registers shadow and optionally reads back the registers from PICMIC
+    
+    Param
+    - ReadBack  = 1 => Registers are read from PICMIC ( HW read ), except GLB_CMD and CONF_DATA
+    
+    Returns
+    - An error code, 0 => OK, < 0 => error of the first failed read
+    
+    '''
+    VRet = 0
+    
+    FGetRegShadow ().FInvalidate ()
+    
+    if ( ReadBack == 1 ):
+    
+        for VRegId in range ( TRegId.REG_NB.value ):
+        
+            if ( VGARegAddr[VRegId] in FGetRegShadow ().AExclAddr ):
+                continue
+                
+            VErr, VARead = FCmdGetRdReg ( VRegId, TRegOp.HW.value, TPrePostOp.NONE.value, TPrePostOp.NONE.value )
+            
+            if ( (VErr < 0) and (VRet == 0) ):
+                VRet = VErr
+                
+    return (VRet)
+
+
+
+@FSessionLocked
+def FEnableDeferredVerify ( Enable, EveryNb = 0, PixSweep = 1 ) :
+
+    '''
+    ...
+    
+    Enables / disables the deferred verification : "write fast, verify once"
+    
+    If enabled, the writes requested with the CHK operation are sent with the HW operation and verified
+    later by FVerifyDeferred ( read back of the written registers and pixels, retry of the wrong ones only )
+    => CHK safety at HW speed. Call FVerifyDeferred at the end of a configuration.
+    
+    Param
+    - Enable    = 0 => CHK writes are checked by the DUE, 1 => CHK writes are deferred
+    - EveryNb   = > 0 => Verification done automatically every EveryNb deferred writes commands, 0 => by FVerifyDeferred only
+    - PixSweep  = PixSweep param of the automatic verification, see FVerifyDeferred
+    
+    Returns
+    - Nothing
+    
+    '''
+    VRegVerifier = FGetRegVerifier ()
+    VRegVerifier.FClear ( 1 )
+    VRegVerifier.Enabled  = Enable
+    VRegVerifier.EveryNb  = EveryNb
+    VRegVerifier.PixSweep = PixSweep
+
+
+
+@FSessionLocked
+def FVerifyDeferred ( PixSweep = 1 ) :
+
+    '''
+    ...
+    
+    Verifies the writes deferred since the last verification, see FEnableDeferredVerify
+    
+    The registers are read back ( HW ), the written pixels are read back one by one if PixSweep > 0,
+    the values are compared to the written ones and only the wrong registers / pixels are rewritten
+    
+    Param
+    - PixSweep  = 0 => Registers only
+                  1 => Pixels written alone read back too ( one row selection + one read per pixel )
+                  2 => Pixels written by broadcasts read back too ( FResetPixelMatrix => 6912 pixels read )
+    
+    Returns
+    - An error code, 0 => OK, -3 DUE not responding, > 0 number of registers / pixels still wrong after retry
+    - Number of registers / pixels found wrong before retry
+    
+    '''
+    logger = logging.getLogger('pm0_sc')
+    
+    VRet, VMismatchNb = FGetRegVerifier ().FVerify ( PixSweep )
+    
+    VStatus = "Deferred verification : {:d} registers / pixels wrong, {:d} still wrong after retry".format (VMismatchNb, max ( 0, VRet ))
+    
+    if ( VRet == 0 ):
+        logger.info ( VStatus )
+    else :
+        logger.error ( "{:s} - error = {:d}".format (VStatus, VRet) )
+        
+    return (VRet, VMismatchNb)
+
+
+
+def FGetDeferredVerifyCounters ( Reset = 0 ) :
+
+    '''
+    ...
+    
+    Gets the deferred verification counters
+    
+    Param
+    - Reset  = 1 => Counters are reset after reading
+    
+    Returns
+    - A dict : DeferredNb = writes sent as HW, VerifyNb = verifications, RdW8Nb = W8 read back,
+      RegMismatchNb / PixMismatchNb = registers / pixels found wrong, RetryErrNb = still wrong after retry,
+      PendingRegNb / PendingPixNb = W8 / pixels waiting for verification
+    
+    '''
+    VDCounters = FGetRegVerifier ().FGetCounters ()
+    
+    if ( Reset == 1 ):
+        FGetRegVerifier ().FResetCounters ()
+        
+    return (VDCounters)
+
+
+
+@FSessionLocked
+def FEnableWrCoalescing ( Enable ) :
+
+    '''
+    ...
+    
+    Enables / disables the coalescing of the FCmdWrOneReg writes, see Picmic_WrCoalescer
     
-    VRet = 0
+    If enabled, the writes of FCmdWrOneReg are collected and sent by FFlushWrOneReg or automatically before
+    any other command, the writes of adjacent addresses are merged ( ex : pixel sequencer 0x02 .. 0x19 => one command )
     
-    # Build request buffer
+    Param
+    - Enable  = 0 => One command per FCmdWrOneReg call ( the pending writes are flushed ), 1 => Writes collected
     
-    VCmdRq = [RegOp]
+    Returns
+    - The error code of the pending writes flushed, 0 if none
     
-     
-    # FSendCmd ( CmdId, CmdADataW8, CmdRetADataW8Sz )
-     
-       
-     
-    VRet = FSendCmd ( TCmd.ACTIVATE_OUTPUTS.value, VCmdRq, 0 )
+    '''
+    VWrCoalescer = FGetWrCoalescer ()
+    VWrCoalescer.Enabled = Enable
     
+    return ( VWrCoalescer.FFlush () )
+
+
+
+@FSessionLocked
+def FFlushWrOneReg ( ) :
+
+    '''
+    ...
     
-    if ( VRet < 0 ):
-        print ( "Cmd set ctrl HW signals failed !" )
+    Sends the FCmdWrOneReg writes collected by the writes coalescing
     
+    Returns
+    - An error code, 0 => OK, < 0 => error of the first failed command, > 0 number of register R/W errors
     
-    return (VRet)
+    '''
+    return ( FGetWrCoalescer ().FFlush () )
 
- 
-def FCmdDeactivateOutputs (RegOp  ) :
 
-    ''' 
-    ... 
+
+def FGetWrCoalescingCounters ( Reset = 0 ) :
+
+    '''
+    ...
     
-    Sents a command activate outputs ( PM0SC__CMD_ACTIVATE_OUTPUTS) to Arduino
+    Gets the writes coalescing counters
     
     Param
-    - RegOp  = Operation, see TRegOp => SW or HW => Writes register to PICMIC, CHK => Write registers + read back and compare
+    - Reset  = 1 => Counters are reset after reading
     
     Returns
-    - An error code, 0 => OK, < 0 => error
+    - A dict : WrNb = FCmdWrOneReg writes collected, W8Nb = W8 collected, CmdNb = commands sent,
+      FlushNb = flushes, ErrNb = failed flushes, PendingNb = W8 waiting
     
-    29/09/2022 M.SPECHT CNRS/IN2P3/IPHC/C4PI    
-    
-    '''       
+    '''
+    VDCounters = FGetWrCoalescer ().FGetCounters ()
     
-    VRet = 0
+    if ( Reset == 1 ):
+        FGetWrCoalescer ().FResetCounters ()
+        
+    return (VDCounters)
+
+
+
+def FGetCmdMetrics ( Rolling = 0 ) :
+
+    '''
+    ...
     
-    # Build request buffer
+    Gets the commands metrics, see Picmic_CmdMetrics.FGetReport
     
-    VCmdRq = [RegOp]
+    Param
+    - Rolling  = 0 => Whole session since last FResetCmdMetrics, 1 => Rolling window of the last VGCmdMetrics.WindowS s
     
-     
-    # FSendCmd ( CmdId, CmdADataW8, CmdRetADataW8Sz )
-     
-       
-     
-    VRet = FSendCmd ( TCmd.DEACTIVATE_OUTPUTS.value, VCmdRq, 0 )
+    Returns
+    - A dict of metrics
     
+    '''
+    return ( FGetMetrics ().FGetReport ( Rolling ) )
+
+
+
+def FPrintCmdMetrics ( Rolling = 0 ) :
+
+    '''
+    ...
     
-    if ( VRet < 0 ):
-        print ( "Cmd set ctrl HW signals failed !" )
+    Prints the commands metrics table
     
+    Param
+    - Rolling  = 0 => Whole session since last FResetCmdMetrics, 1 => Rolling window
     
-    return (VRet)
- 
- 
-def FPrintArdAns () :
-
-    global  VGAArdAns
+    Returns
+    - Nothing
     
+    '''
     print ( "" )
-    print ( "VGAArdAns = {}".format (VGAArdAns) )
+    
+    for VLine in FGetMetrics ().FFormatReport ( Rolling ) :
+        print ( VLine )
+        
     print ( "" )
 
 
-def FSetRegsSavingFileName(FileName,Comment):
+
+def FDumpCmdMetrics ( FileName, Comment = "" ) :
+
     '''
     ...
     
-    Sets the file name 
-    
-    
-    It stores data in global variable VGAArdAns
-    It sets the flag VGArdAnsReady after data reception
-    It VPrint is set to 1, it prints
-    - the request "loop back time" = time elapsed since request sending to UC until getting data back
-    - the data, up to 255 W8
+    Writes the commands metrics ( session and rolling window ) in a text file
     
     Param
-    - FileName          =  Name of the file to store the I2C registers values to be sent to picmic 
+    - FileName  = Name of the file
+    - Comment   = Comment written at the beginning of the file
     
     Returns
-    - Nothing
-    
-    16/05/2023 M.SPECHT CNRS/IN2P3/IPHC/C4PI    
+    - An error code, 0 => OK, -1 => file error
     
     '''
-    global VGRegSaveToFile
-    global VGFileToSaveRegs
+    logger = logging.getLogger('pm0_sc')
+    
+    try :
+        with open ( FileName, 'w' ) as VFile:
+            VFile.write ( ":" + Comment + "\n" )
+            VFile.write ( "\n".join ( FGetMetrics ().FFormatReport ( 0 ) ) + "\n\n" )
+            VFile.write ( "\n".join ( FGetMetrics ().FFormatReport ( 1 ) ) + "\n" )
+    except IOError as e:
+        logger.error("I/O error({0}): {1}".format(e.errno, e.strerror))
+        return (-1)
+        
+    return (0)
 
 
 
-    VGFileToSaveRegs = FileName
-    try:
-        # Saving enabled : open the file and save the comment in the file
-        with open(VGFileToSaveRegs, 'w') as Regsfile:
-            Regsfile.write(":"+Comment+"\n")
-    except :
-        print('Could not write the saving file')
-        
+def FResetCmdMetrics ( ) :
+
+    '''
+    ...
+    
+    Resets the commands metrics, for example at the beginning of a scan
+    
+    '''
+    FGetMetrics ().FReset ()
+
 
 
 def FEnableRegsSavingInFile(Enable):
@@ -1476,6 +5469,11 @@ def FEnableRegsSavingInFile(Enable):
     '''
     global VGRegSaveToFile
     VGRegSaveToFile = Enable
+    
+    # 18/10/2026 : saving disabled => the file is complete and can be read
+    
+    if ( Enable == 0 ):
+        VGRegJournal.FFlush ()
 
 
 def handleIncomingSysEx(*byteArray):
@@ -1486,11 +5484,8 @@ def handleIncomingSysEx(*byteArray):
     Handles Firmata SysEx commands from UC
     
     
-    It stores data in global variable VGAArdAns
-    It sets the flag VGArdAnsReady after data reception
-    It VPrint is set to 1, it prints
-    - the request "loop back time" = time elapsed since request sending to UC until getting data back
-    - the data, up to 255 W8
+    18/10/2026 : The answer is given to the commands pipeline which completes the oldest command in flight
+    The request "loop back time" and data prints are now done by Picmic_CmdPipeline.FHandleSysEx ( VGPipe.VPrint )
     
     Param
     - byteArray          =  Command data 
@@ -1502,53 +5497,270 @@ def handleIncomingSysEx(*byteArray):
 
     '''
     
+    VGPipe.FHandleSysEx ( *byteArray )
 
-    global VGTimeBeg
-    global VGBuffW8Sz
-    global VGAArdAns
-    global VGArdAnsReady
+
+
+def FSetCmdWindow ( WindowSz, TimeoutS = 2.0 ) :
+
+    '''
+    ...
+    
+    Sets the maximum number of commands in flight and the answer timeout of the commands pipeline
+    Taken into account at next FConnect and immediately if already connected
+    
+    Param
+    - WindowSz  = Maximum number of commands sent to DUE and waiting for their answer, 1 => no pipelining
+    - TimeoutS  = Maximum time in s to wait for the answer of a command
     
-    VPrint     = 0   # 0 = No print, 1 = Prints execution time, 2 = Prints execution time + data
-    VPrintW8Nb = 255 # Maximum number of W8 to print
+    Returns
+    - Nothing
+    
+    '''
+    global VGCmdWindowSz
+    global VGCmdTimeoutS
+    
+    VGCmdWindowSz = max ( 1, WindowSz )
+    VGCmdTimeoutS = TimeoutS
+    
+    if ( VGPipe != None ):
+        VGPipe.FDrain ()
+        VGPipe.WindowSz = VGCmdWindowSz
+        VGPipe.TimeoutS = VGCmdTimeoutS
 
 
 
-    VGAArdAns = FConVectMidi7bTo8bV1 ( byteArray, 0 )
+def FImportDueEmul ( ) :
+
+    '''
+    ...
+    
+    Imports the virtual DUE module given by the dueEmulator key of modules/Modules.conf
+    It is imported only when used, it imports this module
+    
+    Returns
+    - The module
     
-    # print ( "handleIncomingSysEx - {:d} W8 received - W[0] = {:d}".format ( len (VGAArdAns), VGAArdAns[0] ) )
-    # input ( "Type enter to continue" )    
+    '''
+    config = configparser.ConfigParser(allow_no_value=True)
+    config.read("modules/Modules.conf")
     
+    return ( importlib.import_module ( config['ModuleName']['dueEmulator'], package=None ) )
 
-    v_time_end = time.perf_counter ()
-    v_time_s   = v_time_end - VGTimeBeg
-      
+
+
+def FOpenBoard ( UsbPort, dsrdtr = False, RawSerial = None ) :
+
+    '''
+    ...
     
-    VDataRate = VGBuffW8Sz / v_time_s
+    Opens the connection to an Arduino DUE I2C controller, raises an exception in case of error
     
-    if ( VPrint >= 1 ) :
-        print ( "" )
-        print ( "Request loop back time = {:.6f} s = {:.1f} ms".format (v_time_s, v_time_s * 1000) )
-        print ( "Data rate = {:.1f} W8/S = {:.1f} bauds".format (VDataRate, VDataRate * 10) )  
+    Param
+    - UsbPort    =  The USB port string, "EMUL..." => virtual DUE + PICMIC, see mod_pm0_due_emul_XX
+    - dsrdtr     =  True => Automatic reset of the arduino board at connection disabled
+    - RawSerial  =  1 => Picmic_RawSerialBoard transport, 0 => pyfirmata, None => VGRawSerial
+    
+    Returns
+    - The board object
+    
+    18/10/2026 ( moved from FConnect )
+    
+    '''
+    
+    if ( RawSerial == None ):
+        RawSerial = VGRawSerial
+    
+    if ( UsbPort.upper ().startswith ( "EMUL" ) ):
+        return ( FImportDueEmul ().Picmic_EmulDue ( UsbPort ) )
+    
+    if ( RawSerial == 1 ):
+        return ( Picmic_RawSerialBoard ( UsbPort, dsrdtr ) )
+    
+    if (dsrdtr == True):
+        return ( Arduino ( UsbPort ,dsrdtr=dsrdtr ) )
+    
+    return ( Arduino ( UsbPort ) )
+
 
+
+def FCreatePipe ( Board, Handler, Metrics ) :
+
+    '''
+    ...
+    
+    Creates the commands pipeline of a board and installs its answers handler
+    
+    pyfirmata command handlers are stored in a class attribute => shared by all boards
+    Each board gets its own copy, otherwise the answers of all the boards would go to the last pipeline created
+    
+    Param
+    - Board    =  The board object, see FOpenBoard
+    - Handler  =  The SysEx answers handler, None => Pipe.FHandleSysEx
+    - Metrics  =  The Picmic_CmdMetrics which records the commands
+    
+    Returns
+    - The pipeline, its reader thread is started if VGCmdReaderThread = 1
+    
+    18/10/2026 ( moved from FConnect )
+    
+    '''
+    
+    VPipe = Picmic_CmdPipeline ( Board, VGCmdWindowSz, DUE_RX_BUFF_SZ, VGCmdTimeoutS )
+    VPipe.Metrics = Metrics
+    
+    if ( Handler == None ):
+        Handler = VPipe.FHandleSysEx
+    
+    Board._command_handlers = dict ( Board._command_handlers )
+    Board.add_cmd_handler ( pyfirmata.START_SYSEX, Handler )
     
-    if ( VPrint >= 2 ) :    
-        print ( "Data from Arduino : {:d} W8".format ( len (VGAArdAns) )  )
-        print ( "Prints the first {:d} W8".format (VPrintW8Nb) )
+    # Raw serial transport => answers given as bytes to the pipeline, no parameters unpacking
+    
+    if ( isinstance ( Board, Picmic_RawSerialBoard ) ):
+        Board.FrameHandler = VPipe.FHandleFrame
+    
+    # Answers are read by the reader thread from now on
+    
+    if ( VGCmdReaderThread == 1 ):
+        VPipe.FStartReader ()
+        
+    return (VPipe)
 
-        Vi = 0;    
 
-        for x in VGAArdAns:
-            print ( x )
-            Vi = Vi + 1
-            if (Vi >= VPrintW8Nb ):
-                break # Prints only 10 first data
+
+class Picmic_ScSession () :
+
+    '''
+    ...
+    
+    Slow control session with one DUE board / one PICMIC : board, commands pipeline, registers shadow, deferred verification, writes coalescing, commands metrics
+    
+    Several sessions can be opened, one per serial port, to configure several chips at the same time from
+    several threads ( see mod_pm0_sc_multi_XX ). A session is bound to the calling thread by a with statement,
+    all the FCmd... functions called by this thread inside the with block are sent to its board
+    
+    >>> VSession = Picmic_ScSession ( "Chip1" )
+    >>> VSession.FConnect ( "COM4" )
+    >>> with VSession :
+    ...     FCmdSetWrReg ( 4, 2, 0, 0, [10,20,30,40,50] )
+    >>> VSession.FDisconnect ()
+    
+    The commands of a session are not written in the registers saving file
+    
+    The FCmd... functions of a session are serialized by its lock ( see FSessionLocked ) => a session can be
+    used by several threads, ex : GUI thread + background registers monitor on the default session VGDefSession
+    
+    Param
+    - Name  = Name of the session, used in logs
+    
+    '''
+
+    def __init__ ( self, Name = "" ) :
+        self.Name      = Name
+        self.Port      = None
+        self.Board     = None
+        self.Pipe      = None
+        self.RegShadow = Picmic_RegShadow ()
+        self.RegVerifier = Picmic_RegVerifier ()
+        self.WrCoalescer = Picmic_WrCoalescer ()
+        self.Metrics   = Picmic_CmdMetrics ()
+        self.Lock      = threading.RLock ()  # Serializes the FCmd... functions called by several threads
+        self.AAns      = []    # Answer data of the last command waited for
+        self.TimeBeg   = 0     # Sending time of the last command waited for
+        self.APrevSession = []  # Sessions bound to the thread before the with blocks in progress
+        
+        
+    def FConnect ( self, UsbPort, dsrdtr = False, RawSerial = None ) :
+    
+        '''
+        ...
+        
+        Connects the session to an Arduino DUE I2C controller, see FOpenBoard
+        If the session is already connected, it is disconnected first
+        
+        Returns
+        - An error code, 0 => OK, < 0 => error
+    
+        '''
+        logger = logging.getLogger('pm0_sc')
+        
+        # Else the previous port and reader thread would stay open
+        
+        if ( self.Board != None ):
+            logger.warning ( "Session {:s} already connected to {}, disconnected first".format (self.Name, self.Port) )
+            self.FDisconnect ()
+        
+        try :
+            self.Board = FOpenBoard ( UsbPort, dsrdtr, RawSerial )
+            self.Pipe  = FCreatePipe ( self.Board, None, self.Metrics )
+        except :
+            logger.error("Session {:s} could not connect to the Arduno board on {:s}:{}".format(self.Name, UsbPort, sys.exc_info()[1]))
+            self.Board = None
+            return (-1)
+        
+        self.Port = UsbPort
+        self.RegShadow.FInvalidate ()
+        self.RegVerifier.FClear ( 1 )
+        
+        logger.info ( "Session {:s} connected to {:s}, firmware = {} {}".format (self.Name, UsbPort, self.Board.firmware, self.Board.firmware_version) )
+        
+        return (0)
+        
+        
+    def FDisconnect ( self ) :
+    
+        '''
+        ...
+        
+        Disconnects the session once all the commands in flight are answered
+        
+        Returns
+        - An error code, 0 => OK, < 0 => error
+    
+        '''
+        
+        if ( self.Board == None ):
+            return (-1)
+        
+        with self, self.Lock :
+        
+            self.WrCoalescer.FFlush ()
             
+            self.Pipe.FDrain ()
+            self.Pipe.FStopReader ()
+            self.Pipe = None
             
-    VGArdAnsReady = 1        
+            self.Board.exit ()
+            self.Board = None
+        
+        return (0)
+        
+        
+    def __enter__ ( self ) :
+        self.APrevSession.append ( getattr ( VGThreadSession, "Session", None ) )
+        VGThreadSession.Session = self
+        return (self)
+        
+        
+    def __exit__ ( self, *Exc ) :
+        VGThreadSession.Session = self.APrevSession.pop ()
+        return (False)
+
 
 
+# Default session : used by the FCmd... functions when no session is bound to the calling thread, connected by FConnect
+# VGBoard / VGPipe are its board / pipeline, kept for compatibility
 
-def FConnect ( UsbPort,dsrdtr = False ) :
+VGDefSession = Picmic_ScSession ( "Default" )
+VGDefSession.RegShadow   = VGRegShadow
+VGDefSession.RegVerifier = VGRegVerifier
+VGDefSession.WrCoalescer = VGWrCoalescer
+VGDefSession.Metrics     = VGCmdMetrics
+
+
+
+def FConnect ( UsbPort,dsrdtr = False, RawSerial = None ) :
 
     '''
     ...
@@ -1556,63 +5768,62 @@ def FConnect ( UsbPort,dsrdtr = False ) :
     Connects from Arduino DUE I2C controller
     
     Param
-    - UsbPort    =  The USB port string
+    - UsbPort    =  The USB port string, "EMUL..." => virtual DUE + PICMIC, see mod_pm0_due_emul_XX
     - dsrdtr     =  True : Automatic reset of  the arduino board at connection disabled
                     False : Automatic reset of  the arduino board at connection enabled
+    - RawSerial  =  1 => Picmic_RawSerialBoard transport, 0 => pyfirmata, None => VGRawSerial
     
     Returns
     - An error code, 0 => OK, < 0 => error
     
     27/12/2021 G.CLAUS CNRS/IN2P3/IPHC/C4PI
+    18/10/2026 : connects the default session VGDefSession
     
     '''
     
     global VGBoard
+    global VGPipe
     logger = logging.getLogger('pm0_sc')
     
     logger.info('Port:{} / Auto reset disabled:{}'.format(UsbPort,dsrdtr))
     
     
-    try:
-        if (dsrdtr == True):
-            VGBoard = Arduino ( UsbPort ,dsrdtr=dsrdtr ) 
-        else:
-            VGBoard = Arduino ( UsbPort ) 
-        
-
-        print("Communication Successfully started - Arduino board obj created")
-        
-        
-        VGBoard.add_cmd_handler(pyfirmata.START_SYSEX, handleIncomingSysEx )
-            
-        
-        VGBoard.callback_holder = dict()
-      
-       
-      
-        # Print infos
+    # 18/10/2026 : Virtual DUE, no hardware needed, see FOpenBoard
+    # Nothing is known about PICMIC registers after connection, see Picmic_ScSession.FConnect
+    
+    with VGDefSession.Lock :
+    
+        if ( VGDefSession.FConnect ( UsbPort, dsrdtr, RawSerial ) < 0 ):
+            print ( "Could not connect to the Arduno board on {}".format (UsbPort) )
+            return (-1)
         
-        print ( "============================================" )
-        print ( "firmware         = {0}".format (VGBoard.firmware) )
-        print ( "firmware_version = {0}".format (VGBoard.firmware_version) )
-        print ( "firmata_version  = {0}".format (VGBoard.firmata_version) )
-        print ( "============================================" )
-
-        logger.info ( "============================================" )
-        logger.info ( "firmware         = {0}".format (VGBoard.firmware) )
-        logger.info ( "firmware_version = {0}".format (VGBoard.firmware_version) )
-        logger.info ( "firmata_version  = {0}".format (VGBoard.firmata_version) )
-        logger.info ( "============================================" )
+        VGBoard = VGDefSession.Board
+        VGPipe  = VGDefSession.Pipe
+    
 
+    print("Communication Successfully started - Arduino board obj created")
+    
+    VGBoard.callback_holder = dict()
+  
+   
+  
+    # Print infos
+    
+    print ( "============================================" )
+    print ( "firmware         = {0}".format (VGBoard.firmware) )
+    print ( "firmware_version = {0}".format (VGBoard.firmware_version) )
+    print ( "firmata_version  = {0}".format (VGBoard.firmata_version) )
+    print ( "============================================" )
 
-        
-        return (0)
+    logger.info ( "============================================" )
+    logger.info ( "firmware         = {0}".format (VGBoard.firmware) )
+    logger.info ( "firmware_version = {0}".format (VGBoard.firmware_version) )
+    logger.info ( "firmata_version  = {0}".format (VGBoard.firmata_version) )
+    logger.info ( "============================================" )
 
 
-    except : 
-        logger.error("Could not connect to the Arduno board:{}".format(sys.exc_info()[1]))
-        print(sys.exc_info()[1])
-        return (-1)
+    
+    return (0)
     
     
     
@@ -1632,16 +5843,21 @@ def FDisconnect ( ) :
     - An error code, 0 => OK, < 0 => error
     
     05/01/2022 G.CLAUS CNRS/IN2P3/IPHC/C4PI
+    18/10/2026 : disconnects the default session VGDefSession
     
     '''
     
     global VGBoard
+    global VGPipe
     
-    VGBoard.exit()
+    VRet = VGDefSession.FDisconnect ()
     
-    del ( VGBoard )
+    VGPipe  = None
+    VGBoard = None
     
-    return (0)
+    VGRegJournal.FFlush ()
+    
+    return (VRet)
     
     
     
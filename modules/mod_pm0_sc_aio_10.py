@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Module containing an asyncio client for the PICMIC 0 slow control ( mod_pm0_sc_XX module )
+
+Each client owns a slow control session ( PM0SC.Picmic_ScSession ) => one client per DUE board, clients are independent.
+It is a wrapper, not an asyncio native transport : the serial link is still handled by PM0SC.
+The PM0SC functions are executed in one worker thread per client ( thread executor ), with the session bound to it.
+
+FSendCmd / FCmdSetWrReg / FCmdGetRdReg only submit the command in the worker thread ( PM0SC.FSubmitCmd ),
+then await its pipeline ticket => the commands of several tasks overlap on the link, up to PM0SC.VGCmdWindowSz in flight.
+The other commands are executed as whole blocking PM0SC calls in the worker thread, in the order they are queued.
+The event loop is never blocked by the serial link => chip configuration can overlap file I/O and analysis.
+
+Example
+
+>>> import asyncio
+>>> from modules.mod_pm0_sc_aio_10 import Picmic_ScAioClient
+>>> async def main () :
+...     VClient = Picmic_ScAioClient ( "Chip0" )
+...     await VClient.FConnect ( "COM3" )
+...     VErr = await VClient.FCmdSetWrReg ( 4, 2, 0, 0, [10,20,30,40,50] )
+...     VErr, VARead = await VClient.FCmdGetRdReg ( 4, 2, 0, 0 )
+...     await VClient.FDisconnect ()
+>>> asyncio.run ( main () )
+
+
+ Version V1.1
+
+ Versions list
+
+ V1.0 18/10/2026 : first implementation
+ V1.1 18/10/2026 : one session per client, FSendCmd / FCmdSetWrReg / FCmdGetRdReg await the pipeline tickets
+
+"""
+
+__version__ = '0.1.0'
+__date__ = "2026-10-18"
+
+
+# ===========================================================================
+# Modules import
+# ===========================================================================
+
+
+import logging
+import asyncio
+import concurrent.futures
+
+import importlib
+import configparser    # for the ini file configuration retrieving
+
+# retrieve the modules names from the Modules.conf file
+config = configparser.ConfigParser(allow_no_value=True)
+config.read("modules/Modules.conf")
+
+
+PM0SC_Name = config['ModuleName']['slowControlLowLevel']
+PM0SC = importlib.import_module(PM0SC_Name, package=None)
+
+
+
+class Picmic_ScAioClient():
+
+    def __init__(self, Name = "Aio"):
+        """
+            Constructor of the class
+
+            The worker thread is the only one which accesses the DUE board of the session,
+            it is created by FConnect ( or the first command ) and stopped by FDisconnect
+        """
+        self.logger = logging.getLogger('pm0_sc')
+
+        self.Session = PM0SC.Picmic_ScSession ( Name )
+        self.VExecutor = None
+        self.VConnected = False
+
+
+    def FRunInSession ( self, Funct, *Args ) :
+        '''
+        ...
+
+        Executes Funct ( *Args ) in the worker thread with the session of the client bound to it,
+        as Picmic_ScSessionPool.FRunOne does
+
+        '''
+        with self.Session :
+            return ( Funct ( *Args ) )
+
+
+    async def FRun ( self, Funct, *Args ) :
+        '''
+        ...
+
+        Queues a PM0SC function call in the worker thread and waits for its result
+
+        Param
+        - Funct  = The PM0SC function
+        - Args   = Its parameters
+
+        Returns
+        - The result of the function
+
+        '''
+        VLoop = asyncio.get_running_loop ()
+
+        if ( self.VExecutor == None ) :
+            self.VExecutor = concurrent.futures.ThreadPoolExecutor ( max_workers = 1 )
+
+        return await VLoop.run_in_executor ( self.VExecutor, self.FRunInSession, Funct, *Args )
+
+
+    async def FConnect ( self, UsbPort, dsrdtr = False, RawSerial = None ) :
+        '''
+        ...
+
+        Connects the session of the client to the Arduino DUE I2C controller, see PM0SC.Picmic_ScSession.FConnect
+        The client can be connected again after FDisconnect, a new worker thread is then created
+
+        Returns
+        - An error code, 0 => OK, < 0 => error
+
+        '''
+        VErr = await self.FRun ( self.Session.FConnect, UsbPort, dsrdtr, RawSerial )
+
+        self.VConnected = ( VErr == 0 )
+
+        return (VErr)
+
+
+    async def FDisconnect ( self ) :
+        '''
+        ...
+
+        Disconnects from the Arduino DUE I2C controller once all queued commands are done
+        and stops the worker thread
+
+        Returns
+        - An error code, 0 => OK, < 0 => error
+
+        '''
+        VErr = 0
+
+        if ( self.VConnected ) :
+            VErr = await self.FRun ( self.Session.FDisconnect )
+            self.VConnected = False
+
+        if ( self.VExecutor != None ) :
+            self.VExecutor.shutdown ( wait = True )
+            self.VExecutor = None
+
+        return (VErr)
+
+
+    async def FSendCmd ( self, CmdId, CmdADataW8, CmdRetADataW8Sz ) :
+        '''
+        ...
+
+        Sends a command and awaits its answer, see PM0SC.FSendCmd
+
+        The command is submitted in the worker thread, its ticket is awaited outside of it
+        => the worker thread is free for the commands of the other tasks meanwhile.
+        Without reader thread ( PM0SC.VGCmdReaderThread = 0 ) the answer is read by FWaitCmd in the worker thread.
+
+        Returns
+        - An error code, 0 if ok
+        - An array of results if CmdRetADataW8Sz > 0
+
+        '''
+        VErr, VTicket = await self.FRun ( PM0SC.FSubmitCmd, CmdId, list ( CmdADataW8 ), CmdRetADataW8Sz )
+
+        if ( VErr < 0 ) :
+            return ( VErr if ( CmdRetADataW8Sz == 0 ) else (VErr, []) )
+
+        if ( (VTicket.Ready == 0) and (self.Session.Pipe.Reader != None) ) :
+            VLoop = asyncio.get_running_loop ()
+            await VLoop.run_in_executor ( None, VTicket.Event.wait, self.Session.Pipe.TimeoutS )
+
+        # Ticket done => FWaitCmd only updates the registers shadow, else it fails the command at the deadline
+
+        return await self.FRun ( PM0SC.FWaitCmd, VTicket )
+
+
+    async def FCmdSetWrReg ( self, RegId, RegOp, PrePostOp, PrePostParam, RegAW8 ) :
+        '''
+        ...
+
+        Set / write a register to PICMIC, see PM0SC.FCmdSetWrReg
+        With the partial writes of the registers shadow enabled, PM0SC.FCmdSetWrReg is executed as a whole
+
+        Returns
+        - An error code, 0 => OK, -1 sw error, -2 readback value <> write one
+
+        '''
+        VRegSz = PM0SC.VGARegW8ESz[RegId]
+
+        if ( len ( RegAW8 ) != VRegSz ) :
+            self.logger.error ( "Abort : Data sz = {:d} != Register sz = {:d}".format (len ( RegAW8 ), VRegSz) )
+            return (-1)
+
+        if ( self.Session.RegShadow.PartialWr == 1 ) :
+            return await self.FRun ( PM0SC.FCmdSetWrReg, RegId, RegOp, PrePostOp, PrePostParam, list ( RegAW8 ) )
+
+        VErr = await self.FSendCmd ( PM0SC.TCmd.SET_WR_REG.value, [RegId, RegOp, PrePostOp, PrePostParam, VRegSz] + list ( RegAW8 ), 0 )
+
+        if ( VErr != 0 ) :
+            self.logger.error ( "Write register {:d} - Error = {:d}".format (RegId, VErr) )
+
+        return (VErr)
+
+
+    async def FCmdSetWrRegBatch ( self, RegOp, PrePostOp, PrePostParam, RegIdAW8List ) :
+        '''
+        ...
+
+        Set / write a list of registers to PICMIC, see PM0SC.FCmdSetWrRegBatch
+
+        Returns
+        - An error code, 0 => OK, < 0 => error, > 0 number of register R/W errors
+        - A list of error codes, one per register
+
+        '''
+        return await self.FRun ( PM0SC.FCmdSetWrRegBatch, RegOp, PrePostOp, PrePostParam, list ( RegIdAW8List ) )
+
+
+    async def FCmdGetRdReg ( self, RegId, RegOp, PrePostOp, PrePostParam ) :
+        '''
+        ...
+
+        Get / read a register to PICMIC, see PM0SC.FCmdGetRdReg
+
+        Returns
+        - An error code, 0 => OK, < 0 => error
+        - An array of register data
+
+        '''
+        VRegSz = PM0SC.VGARegW8ESz[RegId]
+
+        VErr, VARead = await self.FSendCmd ( PM0SC.TCmd.GET_RD_REG.value, [RegId, RegOp, PrePostOp, PrePostParam, VRegSz], VRegSz )
+
+        if ( (VErr >= 0) and (len ( VARead ) != VRegSz) ) :
+            VErr = -1
+            self.logger.error ( "Abort => Register sz from uC = {:d} <> expected register sz = {:d}".format (len ( VARead ), VRegSz) )
+
+        if ( VErr != 0 ) :
+            self.logger.error ( "Read register {:d} - Error = {:d}".format (RegId, VErr) )
+
+        return (VErr, VARead)
+
+
+    async def FCmdWrAllReg ( self, RegOp ) :
+        '''
+        ...
+
+        Writes all registers to PICMIC, see PM0SC.FCmdWrAllReg
+
+        Returns
+        - An error code, 0 => OK, < 0 => error
+
+        '''
+        return await self.FRun ( PM0SC.FCmdWrAllReg, RegOp )
+
+
+    async def FCmdRdAllReg ( self, RegOp ) :
+        '''
+        ...
+
+        Reads all registers from PICMIC, see PM0SC.FCmdRdAllReg
+
+        Returns
+        - An error code, 0 => OK, < 0 => error
+
+        '''
+        return await self.FRun ( PM0SC.FCmdRdAllReg, RegOp )
+
+
+    async def FCmdCtrlHwSig ( self, Cmd, RstSt, RstI2CSt, StartSt, TestmodeSt, PulseWidthUs ) :
+        '''
+        ...
+
+        Controls the HW signals RST, RST_I2C, START, TESTMODE, see PM0SC.FCmdCtrlHwSig
+
+        Returns
+        - An error code, 0 => OK, < 0 => error
+
+        '''
+        return await self.FRun ( PM0SC.FCmdCtrlHwSig, Cmd, RstSt, RstI2CSt, StartSt, TestmodeSt, PulseWidthUs )
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Module containing a pool of slow control sessions ( PM0SC.Picmic_ScSession ), one per DUE board / PICMIC chip,
+to configure several chips at the same time
+
+Each job is executed by one worker thread per chip, with the chip session bound to the thread
+=> the job can call the usual PM0SC.FCmd... functions, they are sent to the chip of the session.
+The serial links are independent, the configuration time of N chips is close to the one of the slowest chip.
+
+Example
+
+>>> from modules.mod_pm0_sc_multi_10 import Picmic_ScSessionPool, FJobConfigure
+>>> VPool = Picmic_ScSessionPool ()
+>>> VPool.FConnectAll ( ["COM3", "COM4", "COM5"] )
+>>> VAResult = VPool.FRun ( FJobConfigure, 2, 0, 0, [(4, [10,20,30,40,50])], VBitMap, 0xC1, 0x40 )
+>>> VPool.FPrintResults ( VAResult )
+>>> VPool.FDisconnectAll ()
+
+
+ Version V1.0
+
+ Versions list
+
+ V1.0 18/10/2026 : first implementation
+
+"""
+
+__version__ = '0.1.0'
+__date__ = "2026-10-18"
+
+
+# ===========================================================================
+# Modules import
+# ===========================================================================
+
+
+import logging
+import sys
+import time
+import concurrent.futures
+
+import numpy as np
+
+import importlib
+import configparser    # for the ini file configuration retrieving
+
+# retrieve the modules names from the Modules.conf file
+config = configparser.ConfigParser(allow_no_value=True)
+config.read("modules/Modules.conf")
+
+
+PM0SC_Name = config['ModuleName']['slowControlLowLevel']
+PM0SC = importlib.import_module(PM0SC_Name, package=None)
+
+
+
+def FJobConfigure ( Session, RegOp, PrePostOp, PrePostParam, RegIdAW8List, BitMap = None, PulsingVal = 0, NotPulsingVal = 0, Mode = PM0SC.TPixWrMode.DIFF.value ) :
+
+    '''
+    ...
+
+    Configuration job of one chip : registers ( DACs etc ... ) then pixel bitmap
+    Executed by Picmic_ScSessionPool.FRun with Session bound to the worker thread
+
+    Param
+    - Session        = The chip session
+    - RegOp          = Operation, see PM0SC.TRegOp
+    - PrePostOp      = Pre / post operation mode, see PM0SC.TPrePostOp
+    - PrePostParam   = Pre / post operation param
+    - RegIdAW8List   = List of (RegId, RegAW8) written first
+    - BitMap         = None => no pixel configuration, 128 x 54 array => pixels at 1 get PulsingVal, the others NotPulsingVal
+    - PulsingVal     = Configuration W8 of the pulsed pixels
+    - NotPulsingVal  = Configuration W8 of the other pixels
+    - Mode           = Pixel write mode, see PM0SC.TPixWrMode and PM0SC.FWrPixelMatrix ( broadcasts planning, diff with the chip shadow )
+
+    Returns
+    - An error code, 0 => OK, < 0 => error of the first failed step, > 0 number of register R/W errors
+
+    '''
+
+    VRet = 0
+
+    if ( len ( RegIdAW8List ) > 0 ):
+        VRet, VAOpErr = PM0SC.FCmdSetWrRegBatch ( RegOp, PrePostOp, PrePostParam, RegIdAW8List )
+
+        if ( VRet < 0 ):
+            return (VRet)
+
+    if ( BitMap is None ):
+        return (VRet)
+
+    # Pixels configuration written by the planner of the session, as done for one chip
+
+    VAPixCfg = PM0SC.FSetPixCfgLayer ( PM0SC.FComposePixCfg ( NotPulsingVal ), np.asarray ( BitMap ) == 1, PulsingVal )
+
+    VErr, VRegWrNb = PM0SC.FWrPixelMatrix ( VAPixCfg, RegOp, PrePostOp, PrePostParam, Mode )
+
+    if ( (VErr < 0) or (VRet < 0) ):
+        return ( min ( VErr, VRet ) )
+
+    return (VRet + VErr)
+
+
+
+class Picmic_ScSessionPool () :
+
+    '''
+    ...
+
+    Pool of slow control sessions, one per DUE board, and of worker threads, one per session
+
+    '''
+
+    def __init__ ( self ) :
+
+        self.logger = logging.getLogger('pm0_sc')
+
+        self.ASession = []
+
+
+    def FConnectAll ( self, APort, dsrdtr = False, RawSerial = None ) :
+
+        '''
+        ...
+
+        Opens one session per port, the connections are done at the same time ( DUE reset wait )
+
+        Param
+        - APort      = List of USB ports, session i is named "Chip<i>"
+        - dsrdtr     = See PM0SC.FConnect
+        - RawSerial  = See PM0SC.FConnect
+
+        Returns
+        - An error code, 0 => OK, < 0 number of sessions which could not connect, they are not kept in the pool
+
+        '''
+
+        VASession = [PM0SC.Picmic_ScSession ( "Chip{:d}".format (len ( self.ASession ) + VIndex) ) for VIndex in range ( len ( APort ) )]
+
+        with concurrent.futures.ThreadPoolExecutor ( max_workers = max ( 1, len ( APort ) ) ) as VExecutor :
+            VAErr = list ( VExecutor.map ( lambda VArgs : VArgs[0].FConnect ( VArgs[1], dsrdtr, RawSerial ), zip ( VASession, APort ) ) )
+
+        VErrNb = 0
+
+        for VSession, VErr in zip ( VASession, VAErr ) :
+
+            if ( VErr == 0 ):
+                self.ASession.append ( VSession )
+            else :
+                VErrNb = VErrNb + 1
+
+        return (-VErrNb)
+
+
+    def FDisconnectAll ( self ) :
+
+        '''
+        ...
+
+        Disconnects all the sessions and empties the pool
+
+        '''
+
+        for VSession in self.ASession :
+            VSession.FDisconnect ()
+
+        self.ASession = []
+
+
+    def FRunOne ( self, Session, Job, Args ) :
+
+        '''
+        ...
+
+        Executes Job ( Session, *Args ) with Session bound to the calling thread
+
+        Returns
+        - A dict : Name, Port, Ret ( Job result ), Err ( 0 or error code of Job result ), TimeS, Exception ( None or message )
+
+        '''
+
+        VDResult = { "Name" : Session.Name, "Port" : Session.Port, "Ret" : None, "Err" : -1, "TimeS" : 0.0, "Exception" : None }
+
+        VTimeBeg = time.perf_counter ()
+
+        try :
+            with Session :
+                VDResult["Ret"] = Job ( Session, *Args )
+
+            # Job result = error code or tuple beginning with the error code
+
+            VRet = VDResult["Ret"]
+
+            if ( isinstance ( VRet, tuple ) and (len ( VRet ) > 0) ):
+                VRet = VRet[0]
+
+            VDResult["Err"] = VRet if isinstance ( VRet, int ) else 0
+
+        except :
+            VDResult["Exception"] = "{}".format (sys.exc_info()[1])
+            self.logger.error ( "{:s} job failed:{}".format (Session.Name, sys.exc_info()[1]) )
+
+        VDResult["TimeS"] = time.perf_counter () - VTimeBeg
+
+        return (VDResult)
+
+
+    def FRun ( self, Job, *Args ) :
+
+        '''
+        ...
+
+        Executes Job ( Session, *Args ) for all the sessions at the same time, one worker thread per session
+
+        Param
+        - Job   = The job function, its first param is the session, see FJobConfigure
+        - Args  = The other params of Job, the same for all the chips
+
+        Returns
+        - A list of results, one dict per session, see FRunOne
+
+        '''
+
+        return ( self.FRunEach ( Job, [Args] * len ( self.ASession ) ) )
+
+
+    def FRunEach ( self, Job, AArgs ) :
+
+        '''
+        ...
+
+        Executes Job ( Session i, *AArgs[i] ) for all the sessions at the same time => one configuration per chip
+
+        Param
+        - Job    = The job function, its first param is the session
+        - AArgs  = List of params tuples, one per session
+
+        Returns
+        - A list of results, one dict per session, see FRunOne
+
+        '''
+
+        if ( len ( self.ASession ) == 0 ):
+            return ([])
+
+        VTimeBeg = time.perf_counter ()
+
+        with concurrent.futures.ThreadPoolExecutor ( max_workers = len ( self.ASession ) ) as VExecutor :
+            VAFuture = [VExecutor.submit ( self.FRunOne, VSession, Job, VArgs ) for VSession, VArgs in zip ( self.ASession, AArgs )]
+            VAResult = [VFuture.result () for VFuture in VAFuture]
+
+        VTimeS = time.perf_counter () - VTimeBeg
+
+        for VDResult in VAResult :
+            VStatus = "{:s} on {} : error = {:d} - {:.3f} s".format (VDResult["Name"], VDResult["Port"], VDResult["Err"], VDResult["TimeS"])
+            if ( VDResult["Err"] >= 0 ):
+                self.logger.info ( VStatus )
+            else :
+                self.logger.error ( VStatus )
+
+        self.logger.info ( "{:d} chips done in {:.3f} s, sum of chips times = {:.3f} s".format (len ( VAResult ), VTimeS, sum ( [VDResult["TimeS"] for VDResult in VAResult] )) )
+
+        return (VAResult)
+
+
+    def FPrintResults ( self, AResult ) :
+
+        '''
+        ...
+
+        Prints the results of FRun : time and error per chip
+
+        '''
+
+        print ( "" )
+        print ( "{:<10s} {:<15s} {:>6s} {:>10s}".format ("Chip", "Port", "Err", "Time s") )
+
+        for VDResult in AResult :
+            print ( "{:<10s} {:<15s} {:6d} {:10.3f} {:s}".format (VDResult["Name"], "{}".format (VDResult["Port"]), VDResult["Err"], VDResult["TimeS"], VDResult["Exception"] or "") )
+
+        print ( "" )
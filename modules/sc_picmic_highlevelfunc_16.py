@@ -15,6 +15,18 @@ Module containing the class for the high level functions for the picmic slow con
  V1.4 23/11/2022 - MS : added a param to the FConnectToDueBoard function
  V1.5 25/11/2022 - MS : modified the importing system : using a Modules.conf file to store the modules names to avoid the multiple name
  V1.6 17/05/2023 - MS : added a function FWrOneI2CRegs() , to be able to send a simple I2C order
+ V1.6 18/10/2026 : added a function FWrRegsBatch() , to send a list of registers in batch frames
+ V1.6 18/10/2026 : added the functions FSetRegShadowMode(), FGetRegShadowCounters(), FResyncRegShadow() to skip redundant registers writes
+ V1.6 18/10/2026 : added the functions FGetCmdMetrics(), FResetCmdMetrics(), FDumpCmdMetrics() for slow control commands latency / throughput
+ V1.6 18/10/2026 : added the RawSerial param to FConnectToDueBoard() to select the raw serial transport
+ V1.6 18/10/2026 : added the functions FSetDeferredVerifyMode(), FVerifyDeferredWrites() to verify the writes once instead of after each write
+ V1.6 18/10/2026 : added a function FReplayI2CRegsFile() , to send a whole I2C requests file in a few writes
+ V1.6 18/10/2026 : added the functions FSetWrCoalescingMode(), FFlushI2CRegs() to merge the I2C writes of adjacent addresses
+ V1.6 18/10/2026 : added the FullRefresh param to FSetBitmapInPixMemFromFile() , by default only the modified pixels are written
+ V1.6 18/10/2026 : FWriteByteInPixelMemory() writes the row / col only if needed ( registers shadow enabled ), added FWriteBytesInPixelMemory() to write a list of pixels
+ V1.6 18/10/2026 : added a function FReadPixelMemory() , to read back the whole pixel memory or a subset and get the mismatch map
+ V1.6 18/10/2026 : added a function FSetCalibratedWaysFromFile() , to write the pixels of a calibration csv file in one batch
+ V1.6 18/10/2026 : added a function FSetBitmapInPixMem() , to set a bitmap built in memory ( ex by mod_pm0_pattern_10 ) without any file
 
  
 """
@@ -120,6 +132,236 @@ class Picmic_HighLevelFuncts():
 
           
 
+    def FWrRegsBatch (self,RegIdAW8List):
+        """
+            Write a list of registers, packed in batch frames when the DUE firmware allows it
+            
+            param:
+                - RegIdAW8List : list of (register id, list of the register values to set)
+            Returns
+                - VErr    : 0 if successfull, negative if failed, positive : number of R/W errors
+                - VAOpErr : list of the error codes, one per register
+
+        """
+
+        VErr, VAOpErr = PM0SC.FCmdSetWrRegBatch ( self.VGRegOp, self.VGPrePostOp, self.VGPrePostParam, RegIdAW8List )
+        VStatus = "Reg op = {:s} - Batch of {:d} registers - Write error = {:d}".format (self.VGStrRegOp[self.VGRegOp], len(RegIdAW8List), VErr)
+        if VErr >= 0:
+            self.logger.info(VStatus)
+        else:
+            self.logger.error(VStatus)
+
+        return VErr, VAOpErr
+
+
+
+    def FSetWrCoalescingMode (self,Enable):
+        """
+            Enable / disable the coalescing of the I2C registers writes done by FWrOneI2CRegs : the writes are
+            collected and the adjacent addresses are sent in one write, by FFlushI2CRegs or before any read
+            
+            param:
+                - Enable : 0 => one write per call, 1 => writes collected
+            Returns
+                - VErr : error of the pending writes sent when disabling, 0 if successfull
+
+        """
+
+        VErr = PM0SC.FEnableWrCoalescing ( Enable )
+        self.logger.info("I2C writes coalescing enabled = {:d}".format(Enable))
+
+        return VErr
+
+
+
+    def FFlushI2CRegs (self):
+        """
+            Send the I2C registers writes collected by the writes coalescing
+            
+            Returns
+                - VErr : 0 if successfull, negative if failed, positive : number of R/W errors
+
+        """
+
+        VErr = PM0SC.FFlushWrOneReg ()
+        VStatus = "Reg op = {:s} - Flush of the I2C writes - Write error = {:d}".format (self.VGStrRegOp[self.VGRegOp], VErr)
+        if VErr >= 0:
+            self.logger.info(VStatus)
+        else:
+            self.logger.error(VStatus)
+
+        return VErr
+
+
+
+    def FReplayI2CRegsFile (self,FileName):
+        """
+            Write the I2C registers of a requests file ( registers saving file ), the file is compiled once :
+            the contiguous addresses are merged in one write, the writes are pipelined
+            
+            param:
+                - FileName : name of the requests file, text or binary format
+            Returns
+                - VErr : 0 if successfull, negative if failed, positive : number of R/W errors
+
+        """
+
+        VErr, VW8Nb, VCmdNb = PM0SC.FReplayRegsSavingFile ( FileName, self.VGRegOp, self.VGPrePostOp, self.VGPrePostParam )
+        VStatus = "Reg op = {:s} - Replay of {:s} : {:d} bytes in {:d} writes - Write error = {:d}".format (self.VGStrRegOp[self.VGRegOp], FileName, VW8Nb, VCmdNb, VErr)
+        if VErr >= 0:
+            self.logger.info(VStatus)
+        else:
+            self.logger.error(VStatus)
+
+        return VErr
+
+
+
+    def FSetRegShadowMode (self,Enable,PartialWr = 0):
+        """
+            Enable / disable the skipping of the registers writes whose value is already in the chip
+            
+            param:
+                - Enable    : 0 => all writes are sent, 1 => redundant writes are skipped
+                - PartialWr : 1 => only the modified bytes of a register are written
+
+        """
+
+        PM0SC.FEnableRegShadow ( Enable, PartialWr )
+        self.logger.info("Registers shadow enabled = {:d} - Partial writes = {:d}".format(Enable,PartialWr))
+
+
+
+    def FGetRegShadowCounters (self,Reset = 0):
+        """
+            Get the counters of the registers shadow
+            
+            param:
+                - Reset : 1 => counters are reset after reading
+            Returns
+                - dict of counters, WrRegSavedNb = number of registers writes skipped
+
+        """
+
+        VDCounters = PM0SC.FGetRegShadowCounters ( Reset )
+        self.logger.info("Registers shadow : {:d} writes skipped / {:d} requested, {:d} bytes saved".format(VDCounters["WrRegSavedNb"],VDCounters["WrRegNb"],VDCounters["WrW8SavedNb"]))
+
+        return VDCounters
+
+
+
+    def FResyncRegShadow (self,ReadBack = 0):
+        """
+            Forget the registers values known by the shadow, to be called after a chip power cycle
+            
+            param:
+                - ReadBack : 1 => the registers are read back from the chip
+            Returns
+                - VErr : 0 if successfull, negative if failed
+
+        """
+
+        VErr = PM0SC.FRegShadowResync ( ReadBack )
+        VStatus = "Registers shadow resync - Read back = {:d} - error = {:d}".format (ReadBack, VErr)
+        if VErr >= 0:
+            self.logger.info(VStatus)
+        else:
+            self.logger.error(VStatus)
+
+        return VErr
+
+
+
+    def FSetDeferredVerifyMode (self,Enable,EveryNb = 0,PixSweep = 1):
+        """
+            Enable / disable the deferred verification : the writes in Check mode are sent in Hardware mode
+            and verified once by FVerifyDeferredWrites ( read back, only the wrong registers / pixels are rewritten )
+            
+            param:
+                - Enable   : 0 => each write is checked, 1 => the writes are verified later
+                - EveryNb  : > 0 => verification done automatically every EveryNb writes
+                - PixSweep : 0 => registers only, 1 => pixels written one by one read back too, 2 => all written pixels read back
+
+        """
+
+        PM0SC.FEnableDeferredVerify ( Enable, EveryNb, PixSweep )
+        self.logger.info("Deferred verification enabled = {:d} - every {:d} writes - pixels sweep = {:d}".format(Enable,EveryNb,PixSweep))
+
+
+
+    def FVerifyDeferredWrites (self,PixSweep = 1):
+        """
+            Verify the writes done since the last verification, to be called at the end of a configuration
+            
+            param:
+                - PixSweep : see FSetDeferredVerifyMode
+            Returns
+                - VErr : 0 if successfull, negative if failed, positive = number of registers / pixels still wrong
+
+        """
+
+        VErr, VMismatchNb = PM0SC.FVerifyDeferred ( PixSweep )
+        VStatus = "Deferred verification - {:d} registers / pixels rewritten - error = {:d}".format (VMismatchNb, VErr)
+        if VErr == 0:
+            self.logger.info(VStatus)
+        else:
+            self.logger.error(VStatus)
+
+        return VErr
+
+
+
+    def FGetCmdMetrics (self,Rolling = 0):
+        """
+            Get the round-trip latency / throughput metrics of the slow control commands
+            
+            param:
+                - Rolling : 0 => since the last reset, 1 => rolling window of the last commands
+            Returns
+                - dict of metrics, Cmd = dict command name => Nb, P50Ms, P95Ms, P99Ms, TimeoutNb ...
+
+        """
+
+        VDReport = PM0SC.FGetCmdMetrics ( Rolling )
+        self.logger.info("SC metrics : {:d} commands in {:.1f} s - {:.1f} cmd/s - {:.1f} W8/s - errors = {:d} - timeouts = {:d}".format(VDReport["CmdNb"],VDReport["DurationS"],VDReport["CmdPerS"],VDReport["W8PerS"],VDReport["ErrNb"],VDReport["TimeoutNb"]))
+
+        return VDReport
+
+
+
+    def FResetCmdMetrics (self):
+        """
+            Reset the metrics of the slow control commands, to be called at the beginning of a scan
+
+        """
+
+        PM0SC.FResetCmdMetrics ()
+
+
+
+    def FDumpCmdMetrics (self,FileName,Comment = ""):
+        """
+            Write the metrics of the slow control commands in a text file, to be called at the end of a scan
+            
+            param:
+                - FileName : name of the file
+                - Comment  : comment written at the beginning of the file
+            Returns
+                - VErr : 0 if successfull, negative if failed
+
+        """
+
+        VErr = PM0SC.FDumpCmdMetrics ( FileName, Comment )
+        VStatus = "SC metrics written in file {:s} - error = {:d}".format (FileName, VErr)
+        if VErr >= 0:
+            self.logger.info(VStatus)
+        else:
+            self.logger.error(VStatus)
+
+        return VErr
+
+
+
     # Set GLB_CMD
 
 
@@ -662,12 +904,13 @@ class Picmic_HighLevelFuncts():
 
 
     # Connect  
-    def FConnectToDueBoard (self,ComPortParam, dsrdtr = False):
+    def FConnectToDueBoard (self,ComPortParam, dsrdtr = False, RawSerial = None):
         """
             Connect to the Due Board
             
             param:
                 - ComPortParam : Com port to connect to
+                - RawSerial    : 1 => SysEx directly over pyserial, 0 => pyfirmata, None => PM0SC default ( FEnableRawSerial )
             Returns
                 - VErr :  if 0 : connection successfull
                             -1 : connection already established, nothing done
@@ -690,7 +933,7 @@ class Picmic_HighLevelFuncts():
             VUsbPort = ComPortParam
             self.VGUsbConnectErr = PM0SC.TErrUsb.CONNECT.value  # Sets error source, in case of function crash ;-), set to 0 by function if OK
             
-            self.VGUsbConnectErr = PM0SC.FConnect ( VUsbPort , dsrdtr = dsrdtr )
+            self.VGUsbConnectErr = PM0SC.FConnect ( VUsbPort , dsrdtr = dsrdtr, RawSerial = RawSerial )
             
             if ( self.VGUsbConnectErr == PM0SC.TErrUsb.OK.value ) :
                 PM0SC.FCmdSetLog ( 0, 2 ) # FCmdSetLog ( LogRaw, LogCmd )
@@ -1013,7 +1256,7 @@ class Picmic_HighLevelFuncts():
 
     def FWriteByteInPixelMemory (self,VRowVal,VColVal,VDefVal):
         """
-            Setting of the logging level
+            Writes one pixel register
 
         Param
 
@@ -1029,50 +1272,54 @@ class Picmic_HighLevelFuncts():
         """
 
 
-        # write row value :1
-        VErr = PM0SC.FCmdSetWrReg ( PM0SC.TRegId.PIX_CONF_ROW.value, self.VGRegOp, self.VGPrePostOp, self.VGPrePostParam, [VRowVal] )
-        VStatus = "Write row, Reg op = {:s} - Write error = {:d}".format (self.VGStrRegOp[self.VGRegOp], VErr)
-        if VErr >= 0:
-            self.logger.info(VStatus)
-        else:
-            self.logger.error(VStatus)
-        # write col value :1
-        VErr = PM0SC.FCmdSetWrReg ( PM0SC.TRegId.CONF_COL.value, self.VGRegOp, self.VGPrePostOp, self.VGPrePostParam, [VColVal] )
-        VStatus = "Write col, Reg op = {:s} - Write error = {:d}".format (self.VGStrRegOp[self.VGRegOp], VErr)
+        # row / col written only if not already selected, then col unselected
+
+        VErr, VRegWrNb = PM0SC.FWrPixels ( [(VRowVal, VColVal, VDefVal)], self.VGRegOp, self.VGPrePostOp, self.VGPrePostParam )
+        VStatus = "Write pixel row = {:d}, col = {:d}, {:d} registers writes, Reg op = {:s} - Write error = {:d}".format (VRowVal, VColVal, VRegWrNb, self.VGStrRegOp[self.VGRegOp], VErr)
         if VErr >= 0:
             self.logger.info(VStatus)
         else:
             self.logger.error(VStatus)
 
-        # Set data to pixel
+        return VErr
 
-        VErr = PM0SC.FCmdSetWrReg ( PM0SC.TRegId.CONF_DATA.value, self.VGRegOp, self.VGPrePostOp, self.VGPrePostParam, [VDefVal] )
-        VStatus = "write pixel reg value, Reg op = {:s} - Write error = {:d}".format (self.VGStrRegOp[self.VGRegOp], VErr)
-        if VErr >= 0:
-            self.logger.info(VStatus)
-        else:
-            self.logger.error(VStatus)
+
+
+    def FWriteBytesInPixelMemory (self,VAPixWr):
+        """
+            Writes a list of pixels registers, ordered to change the row / col selection as few times as possible
+
+        Param
+
+            - VAPixWr      = List of (Row, Col, Value) of the targeted pixels registers
+        Return
         
-        # deselect all col : write 0x80 in col_cfg
-        VErr = PM0SC.FCmdSetWrReg ( PM0SC.TRegId.CONF_COL.value, self.VGRegOp, self.VGPrePostOp, self.VGPrePostParam, [0x80] )
-        VStatus = "Write col, Reg op = {:s} - Write error = {:d}".format (self.VGStrRegOp[self.VGRegOp], VErr)
+            - VErr:   Error code for he execution of  the function :  - 0 : successfull
+                                                                        - negative : failed
+            
+        """
+
+        VErr, VRegWrNb = PM0SC.FWrPixels ( VAPixWr, self.VGRegOp, self.VGPrePostOp, self.VGPrePostParam )
+        VStatus = "Write {:d} pixels, {:d} registers writes, Reg op = {:s} - Write error = {:d}".format (len ( VAPixWr ), VRegWrNb, self.VGStrRegOp[self.VGRegOp], VErr)
         if VErr >= 0:
             self.logger.info(VStatus)
         else:
             self.logger.error(VStatus)
-      
+
+        return VErr
 
 
 
-    def FSetBitmapInPixMemFromFile (self,VParam,VEmulFileName,VPulsingReg,VNotPulsingReg):
+    def FSetBitmapInPixMemFromFile (self,VParam,VEmulFileName,VPulsingReg,VNotPulsingReg,FullRefresh = 0):
         """
             Set a bitmap in the pixel memory, using data from a file
 
         Param
 
             - VParam             = 0 : send all pixels even the ones not set ( longer)
-                                   1 : send only the pixels to be set (faster)
+                                   1 : send only the pixels to be set (faster), only the ones modified since the last bitmap
             - VEmulFileName      = Filename of the file to be used
+            - FullRefresh        = 1 : with VParam = 1, all the pixels are reset before setting the pixels of the bitmap
         Return
             - FuncResult  result code for the execution of  the function :  - 0 : successfull
                                                                             - negative : failed
@@ -1086,13 +1333,66 @@ class Picmic_HighLevelFuncts():
         """
 
 
-        FuncResult, BitMap, HitNb = PM0EMUL.FSetBitMapFromFile(VParam,VEmulFileName,VPulsingReg,VNotPulsingReg,self.VGRegOp, self.VGPrePostOp, self.VGPrePostParam)
+        FuncResult, BitMap, HitNb = PM0EMUL.FSetBitMapFromFile(VParam,VEmulFileName,VPulsingReg,VNotPulsingReg,self.VGRegOp, self.VGPrePostOp, self.VGPrePostParam, FullRefresh)
         Result, CommentsFromFile = PM0EMUL.FGetCommentsFromFile(VEmulFileName)
         
         return FuncResult, BitMap,CommentsFromFile, HitNb
      
 
 
+    def FSetBitmapInPixMem (self,VParam,VBitMap,VPulsingReg,VNotPulsingReg,FullRefresh = 0):
+        """
+            Set a bitmap in the pixel memory, the bitmap is given as param ( ex a pattern of mod_pm0_pattern_10 )
+
+        Param
+
+            - VParam             = 0 : send all pixels even the ones not set ( longer)
+                                   1 : send only the pixels to be set (faster), only the ones modified since the last bitmap
+            - VBitMap            = 128 x 54 array, 1 => pulsed pixel
+            - FullRefresh        = 1 : with VParam = 1, all the pixels are reset before setting the pixels of the bitmap
+        Return
+            - FuncResult  result code for the execution of  the function :  - 0 : successfull
+                                                                            - negative : failed
+            - BitMap               : matrix containing the bitmap applied to the pixel matrix ( without the dummy pixels )
+            - HitNb                : Number of hits in the bitmap
+            
+        """
+
+        FuncResult, BitMap, HitNb = PM0EMUL.FSetBitMap(VParam,VBitMap,VPulsingReg,VNotPulsingReg,self.VGRegOp, self.VGPrePostOp, self.VGPrePostParam, FullRefresh)
+        
+        return FuncResult, BitMap, HitNb
+     
+
+
+
+    def FSetCalibratedWaysFromFile (self,VFileName,VDefVal = 0xAF,VMask = 0xFF,ProgressFunct = None):
+        """
+            Set the calibrated pixels configuration in the pixel memory, using a calibration csv file ( Row, Column, Name [, Value] )
+
+        Param
+
+            - VFileName          = Filename of the csv file
+            - VDefVal            = Configuration of the pixels without Value in the file
+            - VMask              = Bits of the configuration given by the file, ex 0x07 => IADJ only, 0xFF => whole configuration
+            - ProgressFunct      = None or function called with ( pixels written, pixels nb ) during the writing
+        Return
+            - FuncResult  result code for the execution of  the function :  - 0 : successfull
+                                                                            - negative : failed
+            - TrimMap              : 128 x 54 array loaded from the file, -1 => pixel not in the file
+            - PixNb                : Number of pixels written
+            
+        """
+
+        FuncResult, TrimMap, PixNb = PM0EMUL.FSetTrimMapFromFile(VFileName,VDefVal,VMask,self.VGRegOp, self.VGPrePostOp, self.VGPrePostParam, ProgressFunct)
+        VStatus = "Calibration file {} : {:d} pixels written - Result = {:d}".format (VFileName, PixNb, FuncResult)
+        if FuncResult >= 0:
+            self.logger.info(VStatus)
+        else:
+            self.logger.error(VStatus)
+        
+        return FuncResult, TrimMap, PixNb
+     
+
 
     def FPrintBitmapLoadedFromFile (self):
         """
@@ -1188,6 +1488,35 @@ class Picmic_HighLevelFuncts():
         return VErr, VARead
         
 
+    def FReadPixelMemory (self,VAPixExp = None,VAMask = None):
+        '''
+        
+        - Read back the pixel memory, whole matrix or subset, and compare it to the expected configuration
+        
+        Param
+        - VAPixExp : Expected configuration of the pixels ( 128 x 54 array ), None => no comparison
+        - VAMask   : Pixels to read ( 128 x 54 array, <> 0 => read ), None => all the pixels
+                     ex : the bitmap returned by FSetBitmapInPixMemFromFile to check only the pulsed pixels
+        
+        Returns
+            - VErr       :  Result of the function : 0 if successfull, negative if failed, positive = number of pixels not read
+            - VAPixRd    :  128 x 54 array of the values read, -1 => not read
+            - VAMismatch :  128 x 54 array, True => pixel <> expected, None if VAPixExp = None
+        
+        '''
+
+        VErr, VAPixRd, VAMismatch = PM0SC.FRdPixelMatrix ( VAPixExp, VAMask )
+        VStatus = "Read pixel memory, {:d} pixels read - Read error = {:d}".format (int ( (VAPixRd >= 0).sum () ), VErr)
+        if VAMismatch is not None:
+            VStatus = VStatus + " - {:d} pixels <> expected".format (int ( VAMismatch.sum () ))
+        if VErr == 0 and (VAMismatch is None or not VAMismatch.any ()):
+            self.logger.info(VStatus)
+        else:
+            self.logger.error(VStatus)
+     
+        return VErr, VAPixRd, VAMismatch
+        
+
     def FSetResetSignal (self,ResetLevel):
         '''
         
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Fixtures shared by the tests : connection to the virtual DUE + PICMIC ( see mod_pm0_due_emul_XX )
+
+"""
+
+import os
+import sys
+
+import pytest
+
+VGProjectDir = os.path.join ( os.path.dirname ( os.path.abspath ( __file__ ) ), ".." )
+sys.path.insert ( 0, VGProjectDir )
+
+VCwd = os.getcwd ()
+os.chdir ( VGProjectDir )   # Modules.conf is read at import
+
+import modules.mod_pm0_sc_25 as PM0SC
+import modules.mod_pm0_due_emul_10 as PM0DUE
+
+os.chdir ( VCwd )
+
+
+
+def FEmulBoard () :
+
+    '''
+    ...
+
+    Default session connected to the emulator, registers shadow disabled, no registers saving file
+
+    Returns
+    - The virtual DUE ( Picmic_EmulDue ), its APixel / DRegChip are the PICMIC memories
+
+    '''
+
+    VCwd = os.getcwd ()
+    os.chdir ( VGProjectDir )
+
+    PM0SC.VGRegSaveToFile = 0
+    assert PM0SC.FConnect ( "EMUL" ) == 0
+    PM0SC.FEnableRegShadow ( 0 )
+
+    yield PM0SC.VGBoard
+
+    PM0SC.FEnableRegShadow ( 0 )
+    PM0SC.FDisconnect ()
+    os.chdir ( VCwd )
+
+
+
+@pytest.fixture
+def emul_board () :
+
+    yield from FEmulBoard ()
+
+
+
+@pytest.fixture
+def emul_fast_board () :
+
+    '''
+    ...
+
+    Same as emul_board without link / I2C time => the long pixel writes run in a few s
+
+    '''
+
+    PM0DUE.FSetEmulParams ( BaudRate = 0, CmdProcS = 0.0, I2CW8S = 0.0 )
+
+    yield from FEmulBoard ()
+
+    PM0DUE.FSetEmulParams ()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Tests of the text bitmap files parser ( mod_pm0_bitmap_10 )
+
+The one pass parser must give the same bitmap, hits nb and comments as the line by line parsing of the
+previous FLoadBitmapFromFile / FGetCommentsFromFile ( mod_pm0_emul_func_11 V1.0 ), kept here as reference.
+
+python -m pytest tests
+
+"""
+
+import glob
+import os
+import sys
+
+import numpy as np
+import pytest
+
+VGProjectDir = os.path.join ( os.path.dirname ( os.path.abspath ( __file__ ) ), ".." )
+sys.path.insert ( 0, VGProjectDir )
+
+import modules.mod_pm0_bitmap_10 as PM0BMP
+
+
+VGAPulsingFile = sorted ( glob.glob ( os.path.join ( VGProjectDir, "Pulsing_Files", "*.txt" ) ) )
+
+
+
+def FRefParseBitmapText ( Text ) :
+
+    '''
+    ...
+
+    Line by line parsing of FLoadBitmapFromFile / FGetCommentsFromFile V1.0
+
+    Returns
+    - An error code, 0 => OK, -2 => more than 128 rows or 54 cols
+    - BitMap, HitNb, Comments
+
+    '''
+
+    VBitMap   = np.zeros ( (PM0BMP.PIX_ROW_NB, PM0BMP.PIX_COL_NB), dtype = int )
+    VHitNb    = 0
+    VComments = ""
+    VRow      = 0
+
+    try :
+        for VLine in Text.splitlines ( True ) :
+            if ( VLine[0] == ':' ):
+                VComments += VLine[1:]
+                continue
+            VCol = 0
+            for VChar in VLine :
+                if ( VChar in ["0", "1"] ):
+                    VBitMap[VRow, VCol] = int ( VChar )
+                    if ( VChar == "1" ):
+                        VHitNb += 1
+                    VCol += 1
+            VRow += 1
+
+    except IndexError :
+        return (-2, None, 0, VComments)
+
+    return (0, VBitMap, VHitNb, VComments)
+
+
+
+def test_pulsing_files_found () :
+    assert len ( VGAPulsingFile ) > 0
+
+
+
+@pytest.mark.parametrize ( "FileName", VGAPulsingFile, ids = os.path.basename )
+def test_parse_pulsing_file ( FileName ) :
+
+    with open ( FileName, "r" ) as VFile :
+        VText = VFile.read ()
+
+    VRefResult, VRefBitMap, VRefHitNb, VRefComments = FRefParseBitmapText ( VText )
+
+    VResult, VBitMap, VHitNb, VComments = PM0BMP.FReadBitmapTextFile ( FileName )
+
+    assert VResult == VRefResult == 0
+    assert (VBitMap == VRefBitMap).all ()
+    assert VHitNb == VRefHitNb
+    assert VComments == VRefComments
+
+
+
+@pytest.mark.parametrize ( "Text", [ "",
+                                     ":only a comment\n",
+                                     "1 0 1\n\n:comment between rows\n0 1 1",        # Empty row, no final newline
+                                     "x1y0 z1\n:a\n:b\n  11\t01\n",                  # Other characters ignored
+                                     "1" * 54 + "\n" + ("10" * 27 + "\n") * 127 ] )  # Full matrix
+def test_parse_text ( Text ) :
+
+    VRefResult, VRefBitMap, VRefHitNb, VRefComments = FRefParseBitmapText ( Text )
+
+    VResult, VBitMap, VHitNb, VComments = PM0BMP.FParseBitmapText ( Text )
+
+    assert VResult == VRefResult == 0
+    assert (VBitMap == VRefBitMap).all ()
+    assert VHitNb == VRefHitNb
+    assert VComments == VRefComments
+
+
+
+@pytest.mark.parametrize ( "Text", [ "1" * 55 + "\n", "1\n" * 129 ] )
+def test_parse_too_big ( Text ) :
+    assert PM0BMP.FParseBitmapText ( Text )[0] == FRefParseBitmapText ( Text )[0] == -2
+
+
+
+def test_write_read_round_trip ( tmp_path ) :
+
+    VBitMap  = np.random.default_rng ( 22 ).integers ( 0, 2, (PM0BMP.PIX_ROW_NB, PM0BMP.PIX_COL_NB) )
+    VFileName = str ( tmp_path / "cfg_round_trip.txt" )
+
+    assert PM0BMP.FWriteBitmapTextFile ( VFileName, VBitMap, "first\nsecond" ) == 0
+
+    VResult, VBitMapRd, VHitNb, VComments = PM0BMP.FReadBitmapTextFile ( VFileName )
+
+    assert VResult == 0
+    assert (VBitMapRd == VBitMap).all ()
+    assert VHitNb == np.count_nonzero ( VBitMap )
+    assert VComments == "first\nsecond\n"
+
+    # Modified file => parsed again, not taken from the cache
+
+    assert PM0BMP.FWriteBitmapTextFile ( VFileName, 1 - VBitMap ) == 0
+
+    os.utime ( VFileName, ns = (os.stat ( VFileName ).st_atime_ns, os.stat ( VFileName ).st_mtime_ns + 1000000) )
+
+    VResult, VBitMapRd, VHitNb, VComments = PM0BMP.FReadBitmapTextFile ( VFileName )
+
+    assert (VResult == 0) and (VComments == "")
+    assert (VBitMapRd == 1 - VBitMap).all ()
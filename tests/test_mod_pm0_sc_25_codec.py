@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Tests of the Firmata 7 / 8 bits codecs ( mod_pm0_sc_25 ) : the translation tables versions ( FConVect8bToMidi7bV2,
+FConVectMidi7bTo8bV3 ) must give the same results as the loops versions ( FConVect8bToMidi7b, FConVectMidi7bTo8bV1 )
+
+See Picmic_SC_codec_bench.py for the execution times
+
+python -m pytest tests
+
+"""
+
+import random
+
+import pytest
+
+import modules.mod_pm0_sc_25 as PM0SC
+
+
+VGASz = list ( range ( PM0SC.MAX_CMD_BUFF_SZ + 1 ) )
+
+
+
+def FGetRandomW8 ( Sz ) :
+    VRng = random.Random ( Sz )
+    return ( [VRng.randrange ( 256 ) for _ in range ( Sz )] )
+
+
+
+@pytest.mark.parametrize ( "Sz", VGASz )
+def test_encode_same_as_v1 ( Sz ) :
+
+    VAW8 = FGetRandomW8 ( Sz )
+
+    VAW7 = PM0SC.FConVect8bToMidi7bV2 ( VAW8, 0 )
+
+    assert isinstance ( VAW7, bytearray )
+    assert list ( VAW7 ) == PM0SC.FConVect8bToMidi7b ( VAW8, 0 )
+
+    # Other sources types
+
+    assert PM0SC.FConVect8bToMidi7bV2 ( bytes ( VAW8 ), 0 ) == VAW7
+    assert PM0SC.FConVect8bToMidi7bV2 ( tuple ( VAW8 ), 0 ) == VAW7
+
+
+
+@pytest.mark.parametrize ( "Sz", VGASz )
+def test_round_trip ( Sz ) :
+
+    VAW8 = FGetRandomW8 ( Sz )
+    VAW7 = PM0SC.FConVect8bToMidi7bV2 ( VAW8, 0 )
+
+    # Answers are given as a tuple of int by pyfirmata, as bytes by the raw serial transport
+
+    for VSrc in (tuple ( VAW7 ), bytes ( VAW7 )) :
+        assert PM0SC.FConVectMidi7bTo8bV3 ( VSrc, 0 ) == VAW8
+        assert PM0SC.FConVectMidi7bTo8bV1 ( VSrc, 0 ) == VAW8
+
+
+
+@pytest.mark.parametrize ( "Sz", range ( PM0SC.MIDI_DEC_V1_W8_NB_MAX + 2 ) )
+def test_short_answer ( Sz ) :
+
+    # Short answers are decoded by V1 ( FConVectMidi7bTo8bV3 and Picmic_CmdPipeline.FHandleFrame ), longer ones by the tables
+
+    VAW8 = FGetRandomW8 ( Sz )
+    VAW7 = tuple ( PM0SC.FConVect8bToMidi7bV2 ( VAW8, 0 ) )
+
+    assert PM0SC.FConVectMidi7bTo8bV3 ( VAW7, 0 ) == PM0SC.FConVectMidi7bTo8bV1 ( VAW7, 0 )
+
+    VPipe   = PM0SC.Picmic_CmdPipeline ( None )
+    VTicket = PM0SC.Picmic_CmdTicket ( 0, PM0SC.TCmd.GET_STATUS.value, max ( 0, Sz - 1 ), 0, 0 )
+
+    VPipe.APending.append ( VTicket )
+    VPipe.FHandleFrame ( VAW7 )
+
+    assert VTicket.Ready == 1
+
+    if ( Sz == 0 ):
+        assert (VTicket.Ret, VTicket.AAns) == (-1, [])
+    else :
+        assert (VTicket.Ret, VTicket.AAns) == (PM0SC.FConvU8ToS8 ( VAW8[0] ), VAW8[1:])
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Tests of the commands pipeline resync after a DUE timeout ( mod_pm0_sc_25.Picmic_CmdPipeline )
+
+The answers have no sequence tag, they are matched to the commands in FIFO order
+=> after a timeout, a late answer must never be given to the next command.
+
+The emulator connection is given by the emul_board fixture ( conftest.py )
+
+python -m pytest tests
+
+"""
+
+import pytest
+
+import modules.mod_pm0_sc_25 as PM0SC
+
+
+VGDacW8A = [0x10, 0x20, 0x30, 0x40, 0x50]
+VGDacW8B = [0x11, 0x21, 0x31, 0x41, 0x51]
+
+
+
+@pytest.fixture
+def short_timeout ( emul_board ) :
+
+    VTimeoutS = PM0SC.VGPipe.TimeoutS
+    PM0SC.VGPipe.TimeoutS = 0.1
+
+    yield emul_board
+
+    PM0SC.VGPipe.TimeoutS = VTimeoutS
+
+
+
+def FRdDac () :
+    return ( PM0SC.FCmdGetRdReg ( PM0SC.TRegId.DAC_VAL.value, PM0SC.TRegOp.HW.value, 0, 0 ) )
+
+
+
+def FWrDac ( RegAW8 ) :
+    return ( PM0SC.FCmdSetWrReg ( PM0SC.TRegId.DAC_VAL.value, PM0SC.TRegOp.HW.value, 0, 0, RegAW8 ) )
+
+
+
+def test_late_answer_dropped ( short_timeout ) :
+
+    VBoard    = short_timeout
+    VCmdProcS = VBoard.CmdProcS
+
+    assert FWrDac ( VGDacW8A ) == 0
+
+    # DUE slower than the timeout => the write is failed, its answer comes after the resync start
+
+    VBoard.CmdProcS = 0.25
+    assert FWrDac ( VGDacW8B ) == -3
+    VBoard.CmdProcS = VCmdProcS
+
+    # The write has been done by the DUE, the reads get their own answers
+
+    assert FRdDac () == (0, VGDacW8B)
+    assert FRdDac () == (0, VGDacW8B)
+
+    assert PM0SC.VGPipe.LateAnsNb == 1
+    assert VBoard.FGetStats ()["NoAnsNb"] == 0
+
+
+
+def test_lost_answer ( short_timeout ) :
+
+    VBoard = short_timeout
+
+    assert FWrDac ( VGDacW8A ) == 0
+
+    # Answer lost by the DUE ( NoAnsNb injection ) => timeout, nothing late to drop
+
+    VBoard.NoAnsRate = 1.0
+    assert FWrDac ( VGDacW8B ) == -3
+    VBoard.NoAnsRate = 0.0
+
+    assert VBoard.FGetStats ()["NoAnsNb"] == 1
+
+    assert FRdDac () == (0, VGDacW8B)
+    assert FWrDac ( VGDacW8A ) == 0
+    assert FRdDac () == (0, VGDacW8A)
+
+    assert PM0SC.VGPipe.LateAnsNb == 0
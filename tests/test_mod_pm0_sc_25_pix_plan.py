@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Tests of the pixels writes planner ( mod_pm0_sc_25.FPlanPixelMatrix / Picmic_PixWrList )
+
+Each plan is sent to the emulator, the emulated pixel memory must be equal to the target whatever the
+prior state, the broadcasts ( matrix, rows, cols ) and the skipped selection writes included.
+
+The emulator connection is given by the emul_fast_board fixture ( conftest.py )
+
+python -m pytest tests
+
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+VGProjectDir = os.path.join ( os.path.dirname ( os.path.abspath ( __file__ ) ), ".." )
+sys.path.insert ( 0, VGProjectDir )
+
+import modules.mod_pm0_sc_25 as PM0SC
+
+
+VGPixShape = (PM0SC.PIX_ROW_NB, PM0SC.PIX_COL_NB)
+
+VGRegOp    = PM0SC.TRegOp.HW.value
+
+
+
+def FGetTarget ( Name, Rng ) :
+
+    '''
+    ...
+
+    Builds a target pixels config, each one exercises a part of the planner
+
+    '''
+
+    if ( Name == "UNIFORM" ):
+        return ( np.full ( VGPixShape, 0x48, dtype = np.int16 ) )
+
+    # Majority value + a few other pixels => matrix broadcast then pixels
+
+    if ( Name == "SPARSE" ):
+        VAPix = np.full ( VGPixShape, 0x48, dtype = np.int16 )
+        VAPix[Rng.random ( VGPixShape ) < 0.03] = 0xAF
+        return (VAPix)
+
+    # Rows broadcast ( row register = row, col register = PIX_COL_ALL )
+
+    if ( Name == "ROWS" ):
+        VAPix = np.repeat ( Rng.integers ( 0, 256, (PM0SC.PIX_ROW_NB, 1) ), PM0SC.PIX_COL_NB, axis = 1 )
+        VAPix[::7, 3] = 0x11
+        return (VAPix.astype ( np.int16 ))
+
+    # Cols broadcast ( row register = PIX_ROW_ALL, col register = col )
+
+    if ( Name == "COLS" ):
+        VAPix = np.repeat ( Rng.integers ( 0, 256, (1, PM0SC.PIX_COL_NB) ), PM0SC.PIX_ROW_NB, axis = 0 )
+        VAPix[5, ::4] = 0x22
+        return (VAPix.astype ( np.int16 ))
+
+    if ( Name == "CHECKER" ):
+        VARow, VACol = np.indices ( VGPixShape )
+        return ( np.where ( (VARow + VACol) % 2 == 0, 0xC1, 0x40 ).astype ( np.int16 ) )
+
+    if ( Name == "RANDOM" ):
+        return ( Rng.integers ( 0, 256, VGPixShape ).astype ( np.int16 ) )
+
+    raise ValueError ( Name )
+
+
+
+VGATarget = ["UNIFORM", "SPARSE", "ROWS", "COLS", "CHECKER", "RANDOM"]
+
+VGAMode   = [PM0SC.TPixWrMode.ALL.value, PM0SC.TPixWrMode.FULL.value, PM0SC.TPixWrMode.DIFF.value]
+
+
+
+@pytest.mark.parametrize ( "Mode", VGAMode )
+@pytest.mark.parametrize ( "Target", VGATarget )
+def test_plan_reaches_target ( emul_fast_board, Mode, Target ) :
+
+    # Shadow disabled => DIFF plans from an unknown matrix
+
+    VRng = np.random.default_rng ( 18 )
+
+    emul_fast_board.APixel[:] = VRng.integers ( 0, 256, VGPixShape )
+
+    VAPixCfg = FGetTarget ( Target, VRng )
+
+    VErr, VWrNb = PM0SC.FWrPixelMatrix ( VAPixCfg, VGRegOp, 0, 0, Mode )
+
+    assert (VErr == 0) and (VWrNb > 0)
+    assert (emul_fast_board.APixel == VAPixCfg).all ()
+
+
+
+@pytest.mark.parametrize ( "Target", VGATarget )
+def test_diff_plan_from_known_state ( emul_fast_board, Target ) :
+
+    # Shadow enabled => the random prior state is known, DIFF writes only what differs
+
+    PM0SC.FEnableRegShadow ( 1 )
+
+    VRng = np.random.default_rng ( 18 )
+
+    VAPixPrior = VRng.integers ( 0, 256, VGPixShape ).astype ( np.int16 )
+
+    assert PM0SC.FWrPixelMatrix ( VAPixPrior, VGRegOp, 0, 0, PM0SC.TPixWrMode.FULL.value )[0] == 0
+    assert (emul_fast_board.APixel == VAPixPrior).all ()
+
+    VAPixCfg = FGetTarget ( Target, VRng )
+
+    VErr, VWrNb = PM0SC.FWrPixelMatrix ( VAPixCfg, VGRegOp, 0, 0, PM0SC.TPixWrMode.DIFF.value )
+
+    assert VErr == 0
+    assert VWrNb <= len ( PM0SC.FPlanPixelMatrix ( VAPixCfg ) )
+    assert (emul_fast_board.APixel == VAPixCfg).all ()
+
+    # Same target again => nothing to write
+
+    assert PM0SC.FWrPixelMatrix ( VAPixCfg, VGRegOp, 0, 0, PM0SC.TPixWrMode.DIFF.value ) == (0, 0)
+
+
+
+def test_pixels_reuse_selection ( emul_fast_board ) :
+
+    # Shadow enabled => each FWrPixels call starts from the selection left by the previous one
+
+    PM0SC.FEnableRegShadow ( 1 )
+
+    VRng = np.random.default_rng ( 18 )
+
+    VAPixExp = emul_fast_board.APixel.astype ( np.int16 )
+
+    for VCall in range ( 20 ) :
+
+        VPixNb = int ( VRng.integers ( 1, 30 ) )
+        VARow  = VRng.integers ( 0, PM0SC.PIX_ROW_NB, VPixNb )
+        VACol  = VRng.integers ( 0, 3, VPixNb ) if VCall % 2 else VRng.integers ( 0, PM0SC.PIX_COL_NB, VPixNb )
+        VAW8   = VRng.integers ( 0, 256, VPixNb )
+
+        VAPixWr = [ (int ( VRow ), int ( VCol ), int ( VW8 )) for VRow, VCol, VW8 in zip ( VARow, VACol, VAW8 ) ]
+
+        assert PM0SC.FWrPixels ( VAPixWr, VGRegOp, 0, 0 )[0] == 0
+
+        for VRow, VCol, VW8 in VAPixWr :
+            VAPixExp[VRow, VCol] = VW8
+
+        assert (emul_fast_board.APixel == VAPixExp).all ()
+
+
+
+@pytest.mark.parametrize ( "Row, Col, SelNb", [ (None,               None,                7),
+                                                  (7,                  PM0SC.PIX_COL_NONE,  6),
+                                                  (PM0SC.PIX_ROW_ALL,  9,                   6),
+                                                  (3,                  PM0SC.PIX_COL_ALL,   6) ] )
+def test_pix_wr_list_skips_selection ( Row, Col, SelNb ) :
+
+    # As many cols as rows => grouped by col : 2 col writes + 4 row writes + the final unselect,
+    # minus the row or col already selected, which is accessed first
+
+    VPixWrList = PM0SC.Picmic_PixWrList ( Row, Col )
+
+    VAPix = [ (3, 9), (7, 9), (7, 2), (3, 2) ]
+
+    VPixWrList.FWrPixels ( VAPix, [1, 2, 3, 4] )
+
+    VARegWr = VPixWrList.FClose ()
+
+    VDataNb = sum ( 1 for VRegId, VAW8 in VARegWr if VRegId == PM0SC.TRegId.CONF_DATA.value )
+
+    assert VDataNb == len ( VAPix )
+    assert len ( VARegWr ) - VDataNb == SelNb
+    assert VARegWr[-1] == (PM0SC.TRegId.CONF_COL.value, [PM0SC.PIX_COL_NONE])
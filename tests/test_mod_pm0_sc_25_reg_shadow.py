@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Tests of the registers shadow invalidation ( mod_pm0_sc_25.Picmic_RegShadow )
+
+The commands which change PICMIC registers without the shadow knowing their values must make it forget them,
+else the next skip-if-unchanged writes are not sent.
+
+The emulator connection is given by the emul_board fixture ( conftest.py )
+
+python -m pytest tests
+
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+VGProjectDir = os.path.join ( os.path.dirname ( os.path.abspath ( __file__ ) ), ".." )
+sys.path.insert ( 0, VGProjectDir )
+
+import modules.mod_pm0_sc_25 as PM0SC
+
+
+# Commands which must invalidate the shadow, with their data
+
+VGACmdInvalidate = [ ("TEST_I2C_REGS",      [PM0SC.TRegId.DAC_VAL.value, 1, 0]),
+                     ("ACTIVATE_OUTPUTS",   [PM0SC.TRegOp.HW.value]),
+                     ("DEACTIVATE_OUTPUTS", [PM0SC.TRegOp.HW.value]) ]
+
+VGDacW8 = [0x10, 0x20, 0x30, 0x40, 0x50]
+
+
+
+def FSetWrRegCmd ( RegId, RegAW8 ) :
+    return ( [RegId, PM0SC.TRegOp.HW.value, PM0SC.TPrePostOp.NONE.value, 0, len ( RegAW8 )] + RegAW8 )
+
+
+
+@pytest.mark.parametrize ( "CmdName, CmdADataW8", VGACmdInvalidate )
+def test_shadow_invalidated_by_cmd ( CmdName, CmdADataW8 ) :
+
+    VShadow = PM0SC.Picmic_RegShadow ()
+    VShadow.Enabled = 1
+
+    VCmdWr = FSetWrRegCmd ( PM0SC.TRegId.DAC_VAL.value, VGDacW8 )
+
+    assert VShadow.FOnSubmit ( PM0SC.TCmd.SET_WR_REG.value, VCmdWr ) == 0
+    assert VShadow.FOnSubmit ( PM0SC.TCmd.SET_WR_REG.value, VCmdWr ) == 1   # Redundant => skipped
+
+    assert VShadow.FOnSubmit ( PM0SC.TCmd[CmdName].value, CmdADataW8 ) == 0
+
+    assert len ( VShadow.DKnown ) == 0
+    assert VShadow.FOnSubmit ( PM0SC.TCmd.SET_WR_REG.value, VCmdWr ) == 0   # Sent again
+
+
+
+@pytest.fixture
+def emul_connection ( emul_board ) :
+
+    PM0SC.FEnableRegShadow ( 1 )
+
+    yield emul_board
+
+
+
+@pytest.mark.parametrize ( "CmdFunct, CmdArgs", [ ("FCmdTestI2CRegs",       (PM0SC.TRegId.DAC_VAL.value, 1)),
+                                                  ("FCmdActivateOutputs",   (PM0SC.TRegOp.HW.value,)),
+                                                  ("FCmdDeactivateOutputs", (PM0SC.TRegOp.HW.value,)) ] )
+def test_write_sent_after_cmd ( emul_connection, CmdFunct, CmdArgs ) :
+
+    VRegId = PM0SC.TRegId.DAC_VAL.value
+    VRegOp = PM0SC.TRegOp.HW.value
+
+    assert PM0SC.FCmdSetWrReg ( VRegId, VRegOp, PM0SC.TPrePostOp.NONE.value, 0, VGDacW8 ) == 0
+
+    VSavedNb = PM0SC.FGetRegShadowCounters ()["WrRegSavedNb"]
+
+    getattr ( PM0SC, CmdFunct ) ( *CmdArgs )
+
+    assert PM0SC.FCmdSetWrReg ( VRegId, VRegOp, PM0SC.TPrePostOp.NONE.value, 0, VGDacW8 ) == 0
+    assert PM0SC.FGetRegShadowCounters ()["WrRegSavedNb"] == VSavedNb
+
+
+
+@pytest.mark.parametrize ( "Mode", [PM0SC.TPixWrMode.DIFF.value, PM0SC.TPixWrMode.FULL.value] )
+def test_disabled_shadow_refreshes_pixels ( emul_board, Mode ) :
+
+    # Disabled shadow => the pixels shadow is not trusted, a matrix changed outside the host is written again
+
+    VAPixCfg = np.full ( (PM0SC.PIX_ROW_NB, PM0SC.PIX_COL_NB), 0x48, dtype = np.int16 )
+    VAPixCfg[::3, ::5] = 0xAF
+
+    VRegOp = PM0SC.TRegOp.HW.value
+
+    VErr, VWrNb = PM0SC.FWrPixelMatrix ( VAPixCfg, VRegOp, 0, 0, Mode )
+    assert (VErr == 0) and (VWrNb > 0)
+    assert (emul_board.APixel == VAPixCfg).all ()
+
+    emul_board.APixel[:] = 0   # PICMIC reset outside the host
+
+    VErr, VWrNb = PM0SC.FWrPixelMatrix ( VAPixCfg, VRegOp, 0, 0, Mode )
+    assert (VErr == 0) and (VWrNb > 0)
+    assert (emul_board.APixel == VAPixCfg).all ()
+
+
+
+def test_enabled_shadow_writes_diff_only ( emul_connection ) :
+
+    VAPixCfg = np.full ( (PM0SC.PIX_ROW_NB, PM0SC.PIX_COL_NB), 0x48, dtype = np.int16 )
+
+    VRegOp = PM0SC.TRegOp.HW.value
+
+    assert PM0SC.FWrPixelMatrix ( VAPixCfg, VRegOp, 0, 0 )[0] == 0
+    assert PM0SC.FWrPixelMatrix ( VAPixCfg, VRegOp, 0, 0 ) == (0, 0)
+
+    VAPixCfg[5, 7] = 0xAF
+
+    assert PM0SC.FWrPixelMatrix ( VAPixCfg, VRegOp, 0, 0 )[0] == 0
+    assert (emul_connection.APixel == VAPixCfg).all ()
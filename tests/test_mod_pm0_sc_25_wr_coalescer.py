@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Tests of the FCmdWrOneReg writes coalescing ( mod_pm0_sc_25.Picmic_WrCoalescer ) on the virtual DUE + PICMIC
+
+- the pending writes are sent before the next command => a read gets the value written
+- a failed flush is given to the caller of the command which triggered it, the command is not sent
+
+The emulator connection is given by the emul_board fixture ( conftest.py )
+
+python -m pytest tests
+
+"""
+
+import pytest
+
+import modules.mod_pm0_sc_25 as PM0SC
+
+
+VGRegId   = PM0SC.TRegId.DAC_VAL.value
+VGRegAddr = PM0SC.VGARegAddr[VGRegId]
+VGRegOp   = PM0SC.TRegOp.HW.value
+
+
+
+@pytest.fixture
+def coalescing ( emul_board ) :
+
+    PM0SC.FEnableWrCoalescing ( 1 )
+    PM0SC.FGetWrCoalescingCounters ( 1 )
+
+    yield emul_board
+
+    PM0SC.FEnableWrCoalescing ( 0 )
+
+
+
+def FGetRdRegNb ( Board ) :
+    return ( Board.FGetStats ()["DCmdNb"].get ( PM0SC.TCmd.GET_RD_REG.name, 0 ) )
+
+
+
+def test_flush_before_read ( coalescing ) :
+
+    assert PM0SC.FCmdWrOneReg ( VGRegAddr, VGRegOp, 0, 0, [0x33] ) == 0
+    assert PM0SC.FCmdWrOneReg ( VGRegAddr + 1, VGRegOp, 0, 0, [0x44] ) == 0
+
+    assert PM0SC.FGetWrCoalescingCounters ()["PendingNb"] == 2
+
+    VErr, VARead = PM0SC.FCmdGetRdReg ( VGRegId, VGRegOp, 0, 0 )
+
+    assert VErr == 0
+    assert VARead[:2] == [0x33, 0x44]
+
+    VDCnt = PM0SC.FGetWrCoalescingCounters ()
+
+    assert (VDCnt["PendingNb"] == 0) and (VDCnt["CmdNb"] == 1) and (VDCnt["ErrNb"] == 0)
+
+
+
+def test_flush_error_fails_next_cmd ( coalescing ) :
+
+    VBoard = coalescing
+
+    assert PM0SC.FCmdWrOneReg ( VGRegAddr, VGRegOp, 0, 0, [0x55] ) == 0
+
+    VRdRegNb = FGetRdRegNb ( VBoard )
+
+    VBoard.I2CErrRate = 1.0
+    VErr, VARead = PM0SC.FCmdGetRdReg ( VGRegId, VGRegOp, 0, 0 )
+    VBoard.I2CErrRate = 0.0
+
+    # The write error is given to the read, which is not sent
+
+    assert VErr < 0
+    assert VARead == []
+    assert FGetRdRegNb ( VBoard ) == VRdRegNb
+    assert PM0SC.FGetWrCoalescingCounters ()["ErrNb"] == 1
+
+    # Nothing pending any more => the next read is sent
+
+    assert PM0SC.FCmdGetRdReg ( VGRegId, VGRegOp, 0, 0 )[0] == 0
+    assert FGetRdRegNb ( VBoard ) == VRdRegNb + 1
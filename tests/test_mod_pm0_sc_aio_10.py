@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Tests of the asyncio client ( mod_pm0_sc_aio_10.Picmic_ScAioClient ) on the virtual DUE + PICMIC
+
+- each client drives its own session => two clients don't disconnect / mix each other
+- the commands of several tasks overlap on the link ( several pipeline tickets in flight )
+
+python -m pytest tests
+
+"""
+
+import os
+import sys
+import asyncio
+
+VGProjectDir = os.path.join ( os.path.dirname ( os.path.abspath ( __file__ ) ), ".." )
+sys.path.insert ( 0, VGProjectDir )
+
+VCwd = os.getcwd ()
+os.chdir ( VGProjectDir )   # Modules.conf is read at import
+
+import modules.mod_pm0_sc_25 as PM0SC
+from modules.mod_pm0_sc_aio_10 import Picmic_ScAioClient
+
+os.chdir ( VCwd )
+
+
+VGRegId = PM0SC.TRegId.DAC_VAL.value
+VGRegOp = PM0SC.TRegOp.HW.value
+
+
+
+def FRunAsync ( Coro ) :
+
+    VCwd = os.getcwd ()
+    os.chdir ( VGProjectDir )
+
+    try :
+        return ( asyncio.run ( Coro ) )
+    finally :
+        os.chdir ( VCwd )
+
+
+
+def test_clients_independent () :
+
+    async def FMain () :
+
+        VAClient = [Picmic_ScAioClient ( "Chip0" ), Picmic_ScAioClient ( "Chip1" )]
+
+        for VClient in VAClient :
+            assert await VClient.FConnect ( "EMUL", False, 0 ) == 0
+
+        # The second connection must not close the first board
+
+        assert VAClient[0].Session.Board != None
+
+        assert await VAClient[0].FCmdSetWrReg ( VGRegId, VGRegOp, 0, 0, [1, 2, 3, 4, 5] ) == 0
+        assert await VAClient[1].FCmdSetWrReg ( VGRegId, VGRegOp, 0, 0, [6, 7, 8, 9, 10] ) == 0
+
+        assert await VAClient[0].FCmdGetRdReg ( VGRegId, VGRegOp, 0, 0 ) == (0, [1, 2, 3, 4, 5])
+        assert await VAClient[1].FCmdGetRdReg ( VGRegId, VGRegOp, 0, 0 ) == (0, [6, 7, 8, 9, 10])
+
+        # The default session is not used
+
+        assert PM0SC.VGDefSession.Board == None
+
+        for VClient in VAClient :
+            assert await VClient.FDisconnect () == 0
+
+        # Reconnection
+
+        assert await VAClient[0].FConnect ( "EMUL", False, 0 ) == 0
+        assert await VAClient[0].FCmdGetRdReg ( VGRegId, VGRegOp, 0, 0 ) == (0, [0, 0, 0, 0, 0])
+        assert await VAClient[0].FDisconnect () == 0
+
+    FRunAsync ( FMain () )
+
+
+
+def test_commands_overlap () :
+
+    async def FMain () :
+
+        VClient = Picmic_ScAioClient ( "Chip0" )
+        assert await VClient.FConnect ( "EMUL", False, 0 ) == 0
+
+        # Number of tickets in flight seen at each submission
+
+        VPipe    = VClient.Session.Pipe
+        VFSubmit = VPipe.FSubmit
+        VAInFlight = []
+
+        def FSubmitSpy ( *Args ) :
+            VAInFlight.append ( len ( VPipe.APending ) )
+            return ( VFSubmit ( *Args ) )
+
+        VPipe.FSubmit = FSubmitSpy
+
+        assert await VClient.FCmdSetWrReg ( VGRegId, VGRegOp, 0, 0, [1, 2, 3, 4, 5] ) == 0
+
+        VARes = await asyncio.gather ( *[VClient.FCmdGetRdReg ( VGRegId, VGRegOp, 0, 0 ) for _ in range ( 8 )] )
+
+        assert VARes == [(0, [1, 2, 3, 4, 5])] * 8
+        assert max ( VAInFlight ) > 1
+
+        assert await VClient.FDisconnect () == 0
+
+    FRunAsync ( FMain () )
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Tests of the multi chips configuration ( mod_pm0_sc_multi_10 ) on virtual DUE + PICMIC boards
+
+python -m pytest tests
+
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+VGProjectDir = os.path.join ( os.path.dirname ( os.path.abspath ( __file__ ) ), ".." )
+sys.path.insert ( 0, VGProjectDir )
+
+VCwd = os.getcwd ()
+os.chdir ( VGProjectDir )   # Modules.conf is read at import
+
+import modules.mod_pm0_sc_25 as PM0SC
+import modules.mod_pm0_sc_multi_10 as PM0MULTI
+import modules.mod_pm0_due_emul_10 as PM0DUE
+
+os.chdir ( VCwd )
+
+
+VGDacW8 = [10, 20, 30, 40, 50]
+
+
+
+@pytest.fixture
+def pool () :
+
+    # No link / I2C time => the ALL mode ( one write per pixel ) runs in a few s
+
+    PM0DUE.FSetEmulParams ( BaudRate = 0, CmdProcS = 0.0, I2CW8S = 0.0 )
+
+    VPool = PM0MULTI.Picmic_ScSessionPool ()
+    assert VPool.FConnectAll ( ["EMUL0", "EMUL1"] ) == 0
+
+    yield VPool
+
+    VPool.FDisconnectAll ()
+    PM0DUE.FSetEmulParams ()
+
+
+
+@pytest.mark.parametrize ( "Mode", [PM0SC.TPixWrMode.ALL.value, PM0SC.TPixWrMode.FULL.value, PM0SC.TPixWrMode.DIFF.value] )
+def test_job_configure ( pool, Mode ) :
+
+    VRng    = np.random.default_rng ( 1 )
+    VBitMap = (VRng.random ( (PM0SC.PIX_ROW_NB, PM0SC.PIX_COL_NB) ) < 0.05).astype ( int )
+
+    # Random configuration left by a previous run
+
+    for VSession in pool.ASession :
+        VSession.Board.APixel[:] = VRng.integers ( 0, 256, (PM0SC.PIX_ROW_NB, PM0SC.PIX_COL_NB) )
+
+    VARes = pool.FRun ( PM0MULTI.FJobConfigure, PM0SC.TRegOp.HW.value, 0, 0, [(PM0SC.TRegId.DAC_VAL.value, VGDacW8)], VBitMap, 0xC1, 0x40, Mode )
+
+    VAExp = np.where ( VBitMap == 1, 0xC1, 0x40 )
+
+    for VSession, VDRes in zip ( pool.ASession, VARes ) :
+
+        assert (VDRes["Err"] == 0) and (VDRes["Exception"] == None)
+        assert (VSession.Board.APixel == VAExp).all ()
+
+        VRegAddr = PM0SC.VGARegAddr[PM0SC.TRegId.DAC_VAL.value]
+        assert [VSession.Board.DRegChip[VRegAddr + VIndex] for VIndex in range ( len ( VGDacW8 ) )] == VGDacW8